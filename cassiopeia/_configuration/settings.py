@@ -1,10 +1,10 @@
-from typing import TypeVar, Type, Dict, Union, List
+from typing import TypeVar, Type, Dict, Union, List, Mapping, Any
 import logging
 import importlib
 import inspect
 import copy
 
-from datapipelines import DataPipeline, DataSink, DataSource, CompositeDataTransformer, DataTransformer
+from datapipelines import DataPipeline, DataSink, DataSource, CompositeDataTransformer, DataTransformer, NotFoundError, NoConversionError
 
 from ..data import Region, Platform
 
@@ -13,6 +13,51 @@ T = TypeVar("T")
 logging.basicConfig(format='%(asctime)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S', level=logging.WARNING)
 
 
+class _SingleFlightPipeline(DataPipeline):
+    # Concurrent requests for the same object that miss the cache are fetched once from the sources after it, and share
+    # the result. They're matched by the keys the cache looked them up by, so a cache hit costs nothing extra.
+    _cache = None
+
+    def get(self, type: Type[T], query: Mapping[str, Any]) -> T:
+        if self._cache is None:
+            return super().get(type, query)
+
+        try:
+            handlers = self._get_types[type]
+        except KeyError:
+            try:
+                handlers = self._get_handlers(type)
+            except NoConversionError:
+                handlers = None
+            self._get_types[type] = handlers
+
+        if handlers is None:
+            raise NoConversionError("No source can provide \"{type}\"".format(type=type.__name__))
+
+        context = self._new_context()
+        for position, handler in enumerate(handlers):
+            try:
+                return handler.get(query, context)
+            except NotFoundError:
+                pass
+            keys = self._cache.lookup_keys(type, context)
+            if keys:
+                # That was the cache missing
+                rest = handlers[position + 1:]
+                return self._cache.single_flight(keys, lambda: self._get_from(rest, query, context))
+
+        raise NotFoundError("No source returned a query result!")
+
+    @staticmethod
+    def _get_from(handlers: List, query: Mapping[str, Any], context) -> T:
+        for handler in handlers:
+            try:
+                return handler.get(query, context)
+            except NotFoundError:
+                pass
+        raise NotFoundError("No source returned a query result!")
+
+
 def create_pipeline(service_configs: Dict, enable_ghost_loading: bool, verbose: int = 0) -> DataPipeline:
     transformers = []
 
@@ -58,7 +103,7 @@ def create_pipeline(service_configs: Dict, enable_ghost_loading: bool, verbose:
         enable_ghost_transformers(riotapi_transformer)
 
     services.append(PatchSource())
-    pipeline = DataPipeline(services, transformers)
+    pipeline = _SingleFlightPipeline(services, transformers)
 
     # Manually put the cache on the pipeline.
     for datastore in services:
@@ -166,7 +211,9 @@ def get_default_config():
         "global": {
             "version_from_match": "patch",
             "default_region": None,
-            "enable_ghost_loading": True
+            "enable_ghost_loading": True,
+            "json_decoder": None,
+            "keep_raw_json": False
         },
         "plugins": {},
         "pipeline": {
@@ -194,6 +241,8 @@ class Settings(object):
         if self.__default_region is not None:
             self.__default_region = Region(self.__default_region.upper())
         self.__enable_ghost_loading = globals_.get("enable_ghost_loading", _defaults["global"]["enable_ghost_loading"])
+        self.__json_decoder = globals_.get("json_decoder", _defaults["global"]["json_decoder"])
+        self.__keep_raw_json = globals_.get("keep_raw_json", _defaults["global"]["keep_raw_json"])
 
         self.__plugins = settings.get("plugins", _defaults["plugins"])
 
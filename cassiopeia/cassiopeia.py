@@ -1,10 +1,12 @@
-from typing import List, Set, Dict, Union, TextIO
+from typing import List, Set, Dict, Union, TextIO, BinaryIO, Iterable, Callable, Any
 import arrow
 import datetime
 
 from .data import Region, Queue, Season
+from .core.common import CassiopeiaObject, export_ndjson as _export_ndjson
 from .core import Champion, Summoner, Account, ChampionMastery, Rune, Item, Match, Map, SummonerSpell, Realms, ProfileIcon, LanguageStrings, CurrentMatch, ShardStatus, Versions, MatchHistory, Champions, ChampionMasteries, Runes, Items, SummonerSpells, Maps, FeaturedMatches, Locales, ProfileIcons, ChallengerLeague, MasterLeague, SummonerLeagues, LeagueEntries, Patch, VerificationString
 from .datastores import common as _common_datastore
+from .datastores.riotapi.ratelimits import RequestPriority, request_priority
 from ._configuration import Settings, load_config, get_default_config
 from . import configuration
 
@@ -25,6 +27,7 @@ def apply_settings(config: Union[str, TextIO, Dict, Settings]):
         imported_plugin = importlib.import_module("cassiopeia.plugins.{plugin}.monkeypatch".format(plugin=plugin))
 
     print_calls(settings._Settings__default_print_calls, settings._Settings__default_print_riot_api_key)
+    set_json_decoder(settings._Settings__json_decoder, settings._Settings__keep_raw_json)
 
     # Overwrite the old settings
     configuration._settings = settings
@@ -43,6 +46,10 @@ def print_calls(calls: bool, api_key: bool = False):
     _common_datastore._print_api_key = api_key
 
 
+def set_json_decoder(decoder: Union[str, Callable[[Union[bytes, str]], Any]] = None, keep_raw_json: bool = False):
+    _common_datastore.set_json_decoder(decoder, keep_raw_json)
+
+
 # Data endpoints
 
 def get_league_positions(summoner: Summoner, region: Union[Region, str] = None) -> LeagueEntries:
@@ -150,3 +157,9 @@ def get_version(date: datetime.date = None, region: Union[Region, str] = None) -
 
 def get_verification_string(summoner: Summoner) -> VerificationString:
     return VerificationString(summoner=summoner)
+
+
+# Exporting
+
+def export_ndjson(objects: Iterable[CassiopeiaObject], file: Union[str, BinaryIO]) -> int:
+    return _export_ndjson(objects, file)
@@ -1,6 +1,6 @@
 from abc import abstractmethod, abstractclassmethod
 import types
-from typing import Mapping, Set, Union, Optional, Type, Generator
+from typing import Mapping, Set, Union, Optional, Type, Generator, Iterable, BinaryIO, Callable, Any, Dict
 import functools
 import logging
 from enum import Enum
@@ -64,26 +64,120 @@ def get_latest_version(region: Union[Region, str], endpoint: Optional[str]):
         return Realms(region=region).version
 
 
-class CoreData(object):
+class _Raw(object):
+    # The value a `lazy_field` was set to, before it has been built
+    def __init__(self, value):
+        self.value = value
+
+
+class lazy_field(object):
+    """A CoreData field that is set to raw (DTO) data and built from it by the decorated method the first time it's read.
+
+    The field's value is kept in the attribute with the same name prefixed with "_", which is given a slot in classes
+    that declare their `_fields`.
+    """
+    def __init__(self, build):
+        self._build = build
+        functools.update_wrapper(self, build)
+
+    def __set_name__(self, owner, name):
+        self._name = name
+        self._attribute = "_" + name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = getattr(instance, self._attribute)
+        if isinstance(value, _Raw):
+            value = self._build(instance, value.value)
+            setattr(instance, self._attribute, value)
+        return value
+
+    def __set__(self, instance, value):
+        setattr(instance, self._attribute, value)
+
+    def __delete__(self, instance):
+        delattr(instance, self._attribute)
+
+    def set_raw(self, instance, value):
+        setattr(instance, self._attribute, _Raw(value))
+
+
+class _CoreDataType(type):
+    # Classes that declare their `_fields` get a slot for each of them and for the values of their lazy fields, which
+    # takes much less memory than a `__dict__` per instance. Fields that weren't declared (e.g. ones the Riot API has
+    # added) are kept in a single "_overflow" dict.
+    def __new__(mcs, name, bases, namespace, **kwargs):
+        if "_fields" in namespace and "__slots__" not in namespace:
+            inherited = {slot for base in bases for klass in base.__mro__ for slot in klass.__dict__.get("__slots__", ())}
+            lazy_fields = ["_" + key for key, value in namespace.items() if isinstance(value, lazy_field)]
+            slots = list(namespace["_fields"]) + lazy_fields + ["_overflow"]
+            namespace["__slots__"] = tuple(slot for slot in slots if slot not in inherited)
+        return super().__new__(mcs, name, bases, namespace, **kwargs)
+
+
+class CoreData(object, metaclass=_CoreDataType):
+    # Subclasses can declare their fields in `_fields` to keep them in slots instead of a `__dict__` (see `_CoreDataType`)
+    __slots__ = ()
+    _fields = ()
+    _lazy_fields = ()
+
     @property
     @abstractclassmethod
     def _renamed(cls) -> Mapping[str, str]:
         pass
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = []
+        for klass in reversed(cls.__mro__):
+            fields.extend(field for field in klass.__dict__.get("_fields", ()) if field not in fields)
+        cls._fields = tuple(fields)
+        # The values of lazy fields are kept in private attributes, and are listed under the fields' names
+        cls._lazy_fields = tuple(name for name in dir(cls) if isinstance(getattr(cls, name, None), lazy_field))
+
     def __init__(self, **kwargs):
         self(**kwargs)
 
     def __call__(self, **kwargs):
         for key, value in kwargs.items():
             new_key = self._renamed.get(key, key)
-            setattr(self, new_key, value)
+            try:
+                setattr(self, new_key, value)
+            except AttributeError:
+                if not hasattr(type(self), "_overflow"):
+                    raise
+                # A field that wasn't declared
+                try:
+                    self._overflow[new_key] = value
+                except AttributeError:
+                    self._overflow = {new_key: value}
         return self
 
+    def __getattr__(self, name):
+        # Only called for attributes that aren't set, so that fields in the overflow can be read like any other
+        if name != "_overflow" and not name.startswith("__"):
+            try:
+                return self._overflow[name]
+            except (AttributeError, KeyError):
+                pass
+        raise AttributeError("'{cls}' object has no attribute '{name}'".format(cls=type(self).__name__, name=name))
+
+    def _items(self):
+        # The fields that have been set, declared ones first
+        for field in self._fields + self._lazy_fields:
+            try:
+                yield field, getattr(self, field)
+            except AttributeError:
+                pass
+        try:
+            yield from vars(self).items()
+        except TypeError:  # Slotted, so the fields that weren't declared are in the overflow
+            yield from getattr(self, "_overflow", {}).items()
+
     def to_dict(self):
         d = {}
-        attrs = {attrname for attrname in dir(self)} - {attrname for attrname in dir(self.__class__)}
-        for attr in attrs:
-            v = getattr(self, attr)
+        for attr, v in self._items():
             if isinstance(v, CoreData):
                 v = v.to_dict()
             elif hasattr(v, "__iter__") and not isinstance(v, str):
@@ -252,7 +346,27 @@ class CassiopeiaPipelineObject(CassiopeiaObject, metaclass=GetFromPipeline):
         return not self == other
 
 
+# The version of the format ghosts are pickled in. It's increased whenever that format changes, so that objects pickled
+# by one version of Cassiopeia aren't silently misread by another.
+_PICKLE_VERSION = 1
+
+
+def _unpickle_ghost(cls, version, state):
+    if version != _PICKLE_VERSION:
+        raise ValueError("{cls} was pickled in format version {version}, but only version {supported} can be read".format(cls=cls.__name__, version=version, supported=_PICKLE_VERSION))
+    # Like `from_data`, this skips the metaclass so that nothing is looked up in the pipeline
+    self = cls.__new__(cls)
+    self.__dict__.update(state)
+    return self
+
+
 class CassiopeiaGhost(CassiopeiaPipelineObject, Ghost):
+    def __reduce_ex__(self, protocol):
+        # The object's data and which of its load groups have been loaded are kept. Values cached by `lazy_property`s
+        # are left out because they're rebuilt from the data when they're next used.
+        state = {key: value for key, value in vars(self).items() if not key.startswith("_lazy__")}
+        return _unpickle_ghost, (self.__class__, _PICKLE_VERSION, state)
+
     def load(self) -> "CassiopeiaGhost":
         if self._Ghost__all_loaded:
             return self
@@ -359,3 +473,107 @@ class CassiopeiaJsonEncoder(json.JSONEncoder):
         elif isinstance(obj, datetime.timedelta):
             return obj.seconds
         return json.JSONEncoder.default(self, obj)
+
+
+# Functions that turn a value of a type into something a JSON encoder can write without help, made the first time a
+# value of that type is exported. They give the same JSON as `to_json`.
+_plain_converters = {}  # type: Dict[type, Callable[[Any], Any]]
+_PLAIN_TYPES = frozenset((str, int, float, bool, type(None)))
+
+
+def _to_plain(value: Any) -> Any:
+    try:
+        converter = _plain_converters[value.__class__]
+    except KeyError:
+        converter = _plain_converters[value.__class__] = _plain_converter(value.__class__)
+    return converter(value)
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _plain_dict(value: Mapping) -> Dict[Any, Any]:
+    return {key: item if item.__class__ in _PLAIN_TYPES else _to_plain(item) for key, item in value.items()}
+
+
+def _plain_list(value: Iterable) -> list:
+    return [item if item.__class__ in _PLAIN_TYPES else _to_plain(item) for item in value]
+
+
+def _core_data_converter(cls: Type[CoreData]) -> Callable[[CoreData], Dict[str, Any]]:
+    # The same as `CoreData._items`, but with the fields looked up once for the type instead of once per object
+    fields = cls._fields + cls._lazy_fields
+    slotted = hasattr(cls, "_overflow")
+
+    def convert(data: CoreData) -> Dict[str, Any]:
+        d = {}
+        for field in fields:
+            try:
+                value = getattr(data, field)
+            except AttributeError:
+                continue
+            d[field] = value if value.__class__ in _PLAIN_TYPES else _to_plain(value)
+        try:
+            others = data._overflow if slotted else data.__dict__
+        except AttributeError:  # Nothing has overflowed
+            others = {}
+        for field, value in others.items():
+            d[field] = value if value.__class__ in _PLAIN_TYPES else _to_plain(value)
+        return d
+    return convert
+
+
+def _plain_converter(cls: type) -> Callable[[Any], Any]:
+    if cls in _PLAIN_TYPES:
+        return _identity
+    if issubclass(cls, CoreData):
+        return _core_data_converter(cls)
+    if issubclass(cls, Enum):
+        return lambda value: value.name
+    if issubclass(cls, (datetime.datetime, arrow.Arrow)):
+        return lambda value: value.isoformat()
+    if issubclass(cls, datetime.timedelta):
+        return lambda value: value.seconds
+    if issubclass(cls, (str, int, float)):
+        return _identity
+    if issubclass(cls, Mapping):
+        return _plain_dict
+    if hasattr(cls, "__iter__"):
+        return _plain_list
+    return _identity  # Left for the encoder to write, or to fail on
+
+
+def _ndjson_encoder() -> Callable[[Any], bytes]:
+    # Both encoders only ever see plain values, so the stdlib one can do all its work in C if orjson isn't installed
+    try:
+        import orjson
+    except ImportError:
+        encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        return lambda obj: (encode(obj) + "\n").encode("utf-8")
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+    return lambda obj: orjson.dumps(obj, option=options)
+
+
+def export_ndjson(objects: Iterable[CassiopeiaObject], file: Union[str, BinaryIO]) -> int:
+    """Writes `objects` (e.g. matches, timelines or summoners) to `file` as newline-delimited JSON, one object per line,
+    and returns how many were written. Each line has the same data as the object's `to_json()`. `file` is a path or a file
+    opened in binary mode. Objects that haven't been loaded yet are loaded first.
+
+    `objects` is read one at a time, so it can be a generator that's much too large to hold in memory.
+    """
+    if isinstance(file, str):
+        with open(file, "wb", buffering=1024 * 1024) as opened:
+            return export_ndjson(objects, opened)
+    encode = _ndjson_encoder()
+    write = file.write
+    count = 0
+    for obj in objects:
+        if isinstance(obj, CassiopeiaGhost):
+            obj.load()
+        line = {}
+        for data_type in obj._data_types:
+            line.update(_to_plain(obj._data[data_type]))
+        write(encode(line))
+        count += 1
+    return count
@@ -8,7 +8,7 @@ from merakicommons.container import searchable, SearchableList, SearchableLazyLi
 
 from .. import configuration
 from ..data import Region, Platform, Tier, GameType, GameMode, Queue, Side, Season, Lane, Role, Key
-from .common import CoreData, CoreDataList, CassiopeiaObject, CassiopeiaGhost, CassiopeiaLazyList, provide_default_region, ghost_load_on
+from .common import CoreData, CoreDataList, CassiopeiaObject, CassiopeiaGhost, CassiopeiaLazyList, provide_default_region, ghost_load_on, lazy_field
 from ..dto import match as dto
 from .patch import Patch
 from .summoner import Summoner
@@ -73,11 +73,17 @@ class MatchListData(CoreDataList):
     _renamed = {"champion": "championIds", "queue": "queues", "season": "seasons"}
 
 
+# The fields of a participant's stats that are its runes
+_RUNE_STATS = {"runes"} | {"perk{}".format(i) for i in range(6)} | {"perk{}Var{}".format(i, var) for i in range(6) for var in range(1, 4)}
+
+
 class PositionData(CoreData):
+    _fields = ("x", "y")
     _renamed = {}
 
 
 class EventData(CoreData):
+    _fields = ("type", "timestamp", "participantId", "side", "teamId", "position", "killerId", "victimId", "assistingParticipants", "creatorId", "itemId", "beforeId", "afterId", "skill", "levelUpType", "wardType", "buildingType", "laneType", "towerType", "monsterType", "monsterSubType", "ascendedType", "capturedPoint")
     _renamed = {"eventType": "type", "teamId": "side", "pointCaptured": "capturedPoint", "assistingParticipantIds": "assistingParticipants", "skillSlot": "skill"}
 
     def __call__(self, **kwargs):
@@ -88,6 +94,7 @@ class EventData(CoreData):
 
 
 class ParticipantFrameData(CoreData):
+    _fields = ("participantId", "position", "currentGold", "goldEarned", "level", "experience", "creepScore", "neutralMinionsKilled", "dominionScore", "teamScore")
     _renamed = {"totalGold": "goldEarned", "minionsKilled": "creepScore", "xp": "experience", "jungleMinionsKilled": "neutralMinionsKilled"}
 
     def __call__(self, **kwargs):
@@ -98,29 +105,44 @@ class ParticipantFrameData(CoreData):
 
 
 class FrameData(CoreData):
+    _fields = ("timestamp",)
     _renamed = {}
 
     def __call__(self, **kwargs):
         if "events" in kwargs:
-            self.events = [EventData(**event) for event in kwargs.pop("events")]
+            FrameData.events.set_raw(self, kwargs.pop("events"))
         if "participantFrames" in kwargs:
-            self.participantFrames = {int(key): ParticipantFrameData(**pframe) for key, pframe in kwargs.pop("participantFrames").items()}
+            FrameData.participantFrames.set_raw(self, kwargs.pop("participantFrames"))
         super().__call__(**kwargs)
         return self
 
+    @lazy_field
+    def events(self, events):
+        return [EventData(**event) for event in events]
+
+    @lazy_field
+    def participantFrames(self, participant_frames):
+        return {int(key): ParticipantFrameData(**pframe) for key, pframe in participant_frames.items()}
+
 
 class TimelineData(CoreData):
     _dto_type = dto.TimelineDto
+    _fields = ("id", "region", "frame_interval")
     _renamed = {"matchId": "id", "frameInterval": "frame_interval"}
 
     def __call__(self, **kwargs):
         if "frames" in kwargs:
-            self.frames = [FrameData(**frame) for frame in kwargs.pop("frames")]
+            TimelineData.frames.set_raw(self, kwargs.pop("frames"))
         super().__call__(**kwargs)
         return self
 
+    @lazy_field
+    def frames(self, frames):
+        return [FrameData(**frame) for frame in frames]
+
 
 class ParticipantTimelineData(CoreData):
+    _fields = ("id", "lane", "role", "creepsPerMinDeltas", "csDiffPerMinDeltas", "goldPerMinDeltas", "xpPerMinDeltas", "xpDiffPerMinDeltas", "damageTakenPerMinDeltas", "damageTakenDiffPerMinDeltas")
     _renamed = {"participantId": "id"}
 
     def __call__(self, **kwargs):
@@ -135,28 +157,38 @@ class ParticipantTimelineData(CoreData):
 
 
 class ParticipantStatsData(CoreData):
+    _fields = ("participantId", "win", "item0", "item1", "item2", "item3", "item4", "item5", "item6",
+               "kills", "deaths", "assists", "largestKillingSpree", "largestMultiKill", "killingSprees", "longestTimeSpentLiving",
+               "doubleKills", "tripleKills", "quadraKills", "pentaKills", "unrealKills",
+               "totalDamageDealt", "magicDamageDealt", "physicalDamageDealt", "trueDamageDealt", "largestCriticalStrike",
+               "totalDamageDealtToChampions", "magicDamageDealtToChampions", "physicalDamageDealtToChampions", "trueDamageDealtToChampions",
+               "totalHeal", "totalUnitsHealed", "damageSelfMitigated", "damageDealtToObjectives", "damageDealtToTurrets",
+               "visionScore", "timeCCingOthers", "totalDamageTaken", "magicalDamageTaken", "physicalDamageTaken", "trueDamageTaken",
+               "goldEarned", "goldSpent", "turretKills", "inhibitorKills", "totalMinionsKilled",
+               "neutralMinionsKilled", "neutralMinionsKilledTeamJungle", "neutralMinionsKilledEnemyJungle", "totalTimeCrowdControlDealt",
+               "champLevel", "visionWardsBoughtInGame", "sightWardsBoughtInGame", "wardsPlaced", "wardsKilled",
+               "firstBloodKill", "firstBloodAssist", "firstTowerKill", "firstTowerAssist", "firstInhibitorKill", "firstInhibitorAssist",
+               "combatPlayerScore", "objectivePlayerScore", "totalPlayerScore", "totalScoreRank",
+               "playerScore0", "playerScore1", "playerScore2", "playerScore3", "playerScore4",
+               "playerScore5", "playerScore6", "playerScore7", "playerScore8", "playerScore9",
+               "perkPrimaryStyle", "perkSubStyle", "altarsCaptured", "altarsNeutralized", "teamObjective",
+               "nodeCapture", "nodeCaptureAssist", "nodeNeutralize", "nodeNeutralizeAssist")
     _renamed = {}
 
 
 class ParticipantData(CoreData):
+    _fields = ("id", "championId", "side", "summonerSpellDId", "summonerSpellFId", "rankLastSeason", "masteries",
+               "platformId", "accountId", "summonerName", "summonerId", "currentPlatformId", "currentAccountId", "matchHistoryUri", "profileIconId", "isBot")
     _renamed = {"participantId": "id", "spell1Id": "summonerSpellDId", "spell2Id": "summonerSpellFId", "highestAchievedSeasonTier": "rankLastSeason", "bot": "isBot", "profileIcon": "profileIconId"}
 
     def __call__(self, **kwargs):
         if "stats" in kwargs:
             stats = kwargs.pop("stats")
             if "perk0" in stats:  # Assume all the rest are too
-                self.runes = {
-                    stats.pop("perk0"): [stats.pop("perk0Var1"), stats.pop("perk0Var2"), stats.pop("perk0Var3")],
-                    stats.pop("perk1"): [stats.pop("perk1Var1"), stats.pop("perk1Var2"), stats.pop("perk1Var3")],
-                    stats.pop("perk2"): [stats.pop("perk2Var1"), stats.pop("perk2Var2"), stats.pop("perk2Var3")],
-                    stats.pop("perk3"): [stats.pop("perk3Var1"), stats.pop("perk3Var2"), stats.pop("perk3Var3")],
-                    stats.pop("perk4"): [stats.pop("perk4Var1"), stats.pop("perk4Var2"), stats.pop("perk4Var3")],
-                    stats.pop("perk5"): [stats.pop("perk5Var1"), stats.pop("perk5Var2"), stats.pop("perk5Var3")]
-                }
-                stats.pop("runes", None)
-            self.stats = ParticipantStatsData(**stats)
+                ParticipantData.runes.set_raw(self, stats)
+            ParticipantData.stats.set_raw(self, stats)
         if "timeline" in kwargs:
-            self.timeline = ParticipantTimelineData(**kwargs.pop("timeline"))
+            ParticipantData.timeline.set_raw(self, kwargs.pop("timeline"))
         if "teamId" in kwargs:
             self.side = Side(kwargs.pop("teamId"))
 
@@ -166,8 +198,24 @@ class ParticipantData(CoreData):
         super().__call__(**kwargs)
         return self
 
+    @lazy_field
+    def runes(self, stats):
+        return {stats["perk{}".format(i)]: [stats["perk{}Var{}".format(i, var)] for var in range(1, 4)] for i in range(6)}
+
+    @lazy_field
+    def stats(self, stats):
+        if "perk0" in stats:
+            stats = {key: value for key, value in stats.items() if key not in _RUNE_STATS}
+        return ParticipantStatsData(**stats)
+
+    @lazy_field
+    def timeline(self, timeline):
+        return ParticipantTimelineData(**timeline)
+
 
 class TeamData(CoreData):
+    _fields = ("side", "isWinner", "bans", "participants", "firstBloodKiller", "firstTowerKiller", "firstInhibitorKiller", "firstBaronKiller", "firstDragonKiller", "firstRiftHeraldKiller",
+               "towerKills", "inhibitorKills", "baronKills", "dragonKills", "vilemawKills", "riftHeraldKills", "dominionScore")
     _renamed = {"dominionVictoryScore": "dominionScore", "firstBaron": "firstBaronKiller", "firstBlood": "firstBloodKiller", "firstDragon": "firstDragonKiller", "firstInhibitor": "firstInhibitorKiller", "firstRiftHerald": "firstRiftHeraldKiller", "firstTower": "firstTowerKiller"}
 
     def __call__(self, **kwargs):
@@ -199,6 +247,7 @@ class MatchReferenceData(CoreData):
 
 class MatchData(CoreData):
     _dto_type = dto.MatchDto
+    _fields = ("id", "region", "platformId", "creation", "duration", "gameCreation", "gameDuration", "queueId", "mapId", "seasonId", "version", "mode", "type")
     _renamed = {"gameId": "id", "gameVersion": "version", "gameMode": "mode", "gameType": "type"}
 
     def __call__(self, **kwargs):
@@ -207,36 +256,43 @@ class MatchData(CoreData):
         if "gameDuration" in kwargs:
             self.duration = datetime.timedelta(seconds=kwargs["gameDuration"])
 
+        # The participants and teams, which are most of a match's data, are only built when they're first used
         if "participants" in kwargs:
-            for participant in kwargs["participants"]:
-                for pid in kwargs["participantIdentities"]:
-                    if participant["participantId"] == pid["participantId"] and "player" in pid:
-                        participant["player"] =  pid["player"]
-                        break
-            self.participants = []
-            for i in range(len(kwargs["participants"])):
-                for participant in kwargs["participants"]:
-                    if i == participant["participantId"] - 1:
-                        participant = ParticipantData(**participant)
-                        self.participants.append(participant)
-                        break
-            assert len(self.participants) == len(kwargs["participants"])
-            kwargs.pop("participants")
-            kwargs.pop("participantIdentities")
-
+            MatchData.participants.set_raw(self, (kwargs.pop("participants"), kwargs.pop("participantIdentities")))
         if "teams" in kwargs:
-            self.teams = []
-            for team in kwargs.pop("teams"):
-                team_side = Side(team["teamId"])
-                participants = []
-                for participant in self.participants:
-                    if participant.side is team_side:
-                        participants.append(participant)
-                self.teams.append(TeamData(**team, participants=participants))
+            MatchData.teams.set_raw(self, kwargs.pop("teams"))
 
         super().__call__(**kwargs)
         return self
 
+    @lazy_field
+    def participants(self, raw):
+        participants, identities = raw
+        # The players are added to copies, since the participants are still part of the DTO
+        players = {pid["participantId"]: pid["player"] for pid in identities if "player" in pid}
+        participants = [dict(participant, player=players[participant["participantId"]]) if participant["participantId"] in players else participant
+                        for participant in participants]
+        result = []
+        for i in range(len(participants)):
+            for participant in participants:
+                if i == participant["participantId"] - 1:
+                    result.append(ParticipantData(**participant))
+                    break
+        assert len(result) == len(participants)
+        return result
+
+    @lazy_field
+    def teams(self, teams):
+        result = []
+        for team in teams:
+            team_side = Side(team["teamId"])
+            participants = []
+            for participant in self.participants:
+                if participant.side is team_side:
+                    participants.append(participant)
+            result.append(TeamData(**team, participants=participants))
+        return result
+
 
 ##############
 # Core Types #
@@ -3,3 +3,6 @@ from .riotapi import RiotAPI
 from .ddragon import DDragon
 from .ghost import UnloadedGhostStore
 from .patch import PatchSource
+from .sqlite import SQLiteStore
+from .archive import MatchArchive
+from .snapshot import StaticDataSnapshot
@@ -0,0 +1,248 @@
+from typing import Type, TypeVar, MutableMapping, Any, Iterable, Generator, Dict, Tuple, List
+import json
+import mmap
+import os
+import shutil
+import struct
+import threading
+import zlib
+
+from datapipelines import DataSource, DataSink, PipelineContext, Query, NotFoundError, validate_query
+
+from ..data import Region, Platform
+from ..dto.match import MatchDto, TimelineDto
+from .common import json_loads
+from .uniquekeys import convert_region_to_platform
+
+T = TypeVar("T")
+
+# Each record is a header (platform, game id, length and CRC-32 of the data) followed by the zlib-compressed JSON data
+_HEADER = struct.Struct("<4sQII")
+_SEGMENT_SUFFIX = ".seg"
+# The fields that hold the game id. They and the region aren't in the JSON the Riot API returns, so they're set from the
+# index when a record is read, and a DTO's raw JSON can be stored as it is.
+_ID_FIELDS = {MatchDto: "gameId", TimelineDto: "matchId"}
+
+
+class _Segments(object):
+    """The append-only segment files of one type, and an index of where each game's latest record is in them."""
+    def __init__(self, directory: str, segment_size: int) -> None:
+        self._directory = directory
+        self._segment_size = segment_size
+        self._lock = threading.Lock()
+        self._index = {}  # type: Dict[Tuple[str, int], Tuple[int, int, int]]  # (platform, game id) -> (segment, offset, length)
+        self._maps = {}  # type: Dict[int, mmap.mmap]
+        self._writer = None
+        self._writer_number = None
+        os.makedirs(directory, exist_ok=True)
+        numbers = self._numbers()
+        for number in numbers:
+            self._scan(number)
+        self._open_writer(numbers[-1] if numbers else 0)
+
+    def _numbers(self) -> List[int]:
+        return sorted(int(name[:-len(_SEGMENT_SUFFIX)]) for name in os.listdir(self._directory) if name.endswith(_SEGMENT_SUFFIX))
+
+    def _path(self, number: int) -> str:
+        return os.path.join(self._directory, "{:08d}{}".format(number, _SEGMENT_SUFFIX))
+
+    def _scan(self, number: int) -> None:
+        # Rebuilds the index from a segment. A record that was only partly written (e.g. the process died while
+        # appending it) ends the segment and is cut off, so the next record is written after the last complete one.
+        path = self._path(number)
+        size = os.path.getsize(path)
+        valid = 0
+        if size > 0:
+            with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                while valid + _HEADER.size <= size:
+                    platform, game_id, length, crc = _HEADER.unpack_from(data, valid)
+                    start = valid + _HEADER.size
+                    if start + length > size or zlib.crc32(data[start:start + length]) != crc:
+                        break
+                    self._index[(platform.rstrip(b"\0").decode("ascii"), game_id)] = (number, start, length)
+                    valid = start + length
+        if valid < size:
+            with open(path, "r+b") as file:
+                file.truncate(valid)
+
+    def _open_writer(self, number: int) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._writer = open(self._path(number), "ab")
+        self._writer_number = number
+
+    def _map(self, number: int, end: int) -> mmap.mmap:
+        # Maps are reused until the segment being written to has grown past the end of its map
+        segment = self._maps.get(number)
+        if segment is None or len(segment) < end:
+            if segment is not None:
+                segment.close()
+            with open(self._path(number), "rb") as file:
+                segment = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[number] = segment
+        return segment
+
+    def get(self, platform: str, game_id: int) -> bytes:
+        with self._lock:
+            try:
+                number, offset, length = self._index[(platform, game_id)]
+            except KeyError:
+                raise NotFoundError
+            return zlib.decompress(self._map(number, offset + length)[offset:offset + length])
+
+    def append(self, records: Iterable[Tuple[str, int, bytes]]) -> None:
+        with self._lock:
+            for platform, game_id, data in records:
+                if self._writer.tell() >= self._segment_size:
+                    self._open_writer(self._writer_number + 1)
+                offset = self._writer.tell() + _HEADER.size
+                self._writer.write(_HEADER.pack(platform.encode("ascii"), game_id, len(data), zlib.crc32(data)))
+                self._writer.write(data)
+                self._index[(platform, game_id)] = (self._writer_number, offset, len(data))
+            self._writer.flush()
+
+    def __contains__(self, key: Tuple[str, int]) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self) -> None:
+        with self._lock:
+            for segment in self._maps.values():
+                segment.close()
+            self._maps = {}
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    def delete(self) -> None:
+        self.close()
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+
+class MatchArchive(DataSource, DataSink):
+    """A data store for matches and timelines, which don't change once they're over.
+
+    Each is compressed and appended to the end of a segment file, and an index of where every match is is kept in memory
+    (and rebuilt from the segments when the archive is opened). Reads are served from memory-mapped segments. Nothing
+    is ever overwritten in place, so storing a match again only makes the index point to the new copy.
+
+    Only one process should write to an archive at a time.
+    """
+    def __init__(self, path: str = "matcharchive", segment_size: int = 256 * 1024 * 1024, compression_level: int = 6) -> None:
+        self._path = path
+        self._segment_size = segment_size
+        self._compression_level = compression_level
+        self._segments = {type: _Segments(os.path.join(path, type.__name__), segment_size) for type in (MatchDto, TimelineDto)}
+
+    @DataSource.dispatch
+    def get(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> T:
+        pass
+
+    @DataSource.dispatch
+    def get_many(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> Iterable[T]:
+        pass
+
+    @DataSink.dispatch
+    def put(self, type: Type[T], item: T, context: PipelineContext = None) -> None:
+        pass
+
+    @DataSink.dispatch
+    def put_many(self, type: Type[T], items: Iterable[T], context: PipelineContext = None) -> None:
+        pass
+
+    def _get(self, type: Type[T], platform: Platform, game_id: int) -> T:
+        item = type(json_loads(self._segments[type].get(platform.value, game_id)))
+        item[_ID_FIELDS[type]] = game_id
+        item["region"] = platform.region.value
+        return item
+
+    def _get_many(self, type: Type[T], platform: Platform, game_ids: Iterable[int]) -> Generator[T, None, None]:
+        segments = self._segments[type]
+        game_ids = list(game_ids)
+        for game_id in game_ids:
+            if (platform.value, game_id) not in segments:
+                raise NotFoundError
+
+        def generator():
+            for game_id in game_ids:
+                yield self._get(type, platform, game_id)
+
+        return generator()
+
+    def _put_many(self, type: Type[T], items: Iterable[T]) -> None:
+        records = []
+        for item in items:
+            platform = Region(item["region"]).platform.value
+            data = item.raw_json
+            if data is None:
+                data = json.dumps(item, separators=(",", ":")).encode("utf-8")
+            records.append((platform, item[_ID_FIELDS[type]], zlib.compress(data, self._compression_level)))
+        self._segments[type].append(records)
+
+    def clear(self, type: Type[T] = None):
+        for segments_type in list(self._segments):
+            if type is None or type is segments_type:
+                self._segments[segments_type].delete()
+                self._segments[segments_type] = _Segments(os.path.join(self._path, segments_type.__name__), self._segment_size)
+
+    def expire(self, type: Type[T] = None):
+        # Finished matches and their timelines never change, so nothing in the archive expires
+        pass
+
+    def close(self) -> None:
+        for segments in self._segments.values():
+            segments.close()
+
+    _validate_get_match_query = Query. \
+        has("id").as_(int).also. \
+        has("platform").as_(Platform)
+
+    _validate_get_many_match_query = Query. \
+        has("ids").as_(Iterable).also. \
+        has("platform").as_(Platform)
+
+    #########
+    # Match #
+    #########
+
+    @get.register(MatchDto)
+    @validate_query(_validate_get_match_query, convert_region_to_platform)
+    def get_match(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> MatchDto:
+        return self._get(MatchDto, query["platform"], query["id"])
+
+    @get_many.register(MatchDto)
+    @validate_query(_validate_get_many_match_query, convert_region_to_platform)
+    def get_many_match(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> Generator[MatchDto, None, None]:
+        return self._get_many(MatchDto, query["platform"], query["ids"])
+
+    @put.register(MatchDto)
+    def put_match(self, item: MatchDto, context: PipelineContext = None) -> None:
+        self._put_many(MatchDto, [item])
+
+    @put_many.register(MatchDto)
+    def put_many_match(self, items: Iterable[MatchDto], context: PipelineContext = None) -> None:
+        self._put_many(MatchDto, items)
+
+    ############
+    # Timeline #
+    ############
+
+    @get.register(TimelineDto)
+    @validate_query(_validate_get_match_query, convert_region_to_platform)
+    def get_timeline(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> TimelineDto:
+        return self._get(TimelineDto, query["platform"], query["id"])
+
+    @get_many.register(TimelineDto)
+    @validate_query(_validate_get_many_match_query, convert_region_to_platform)
+    def get_many_timeline(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> Generator[TimelineDto, None, None]:
+        return self._get_many(TimelineDto, query["platform"], query["ids"])
+
+    @put.register(TimelineDto)
+    def put_timeline(self, item: TimelineDto, context: PipelineContext = None) -> None:
+        self._put_many(TimelineDto, [item])
+
+    @put_many.register(TimelineDto)
+    def put_many_timeline(self, items: Iterable[TimelineDto], context: PipelineContext = None) -> None:
+        self._put_many(TimelineDto, items)
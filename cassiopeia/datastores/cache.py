@@ -1,10 +1,16 @@
-from typing import Type, Mapping, Any, Iterable, TypeVar, Tuple, Callable, Generator
+from typing import Type, Mapping, Any, Iterable, TypeVar, Tuple, Callable, Generator, List, Dict, Optional
+from copy import deepcopy
 import datetime
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from datapipelines import DataSource, DataSink, PipelineContext, validate_query, NotFoundError
-from merakicommons.cache import Cache as CommonsCache
+from datapipelines import DataPipeline, DataSource, DataSink, PipelineContext, validate_query, NotFoundError
 
 from . import uniquekeys
+from .cachestorage import CacheStorage, EvictionPolicy
+from .singleflight import SingleFlight
 from ..core.staticdata.champion import ChampionData, ChampionListData, Champion, Champions
 from ..core.staticdata.rune import RuneData, RuneListData, Rune, Runes
 from ..core.staticdata.item import ItemData, ItemListData, Item, Items
@@ -22,9 +28,22 @@ from ..core.summoner import SummonerData, Summoner
 from ..core.status import ShardStatusData, ShardStatus
 from ..core.spectator import CurrentGameInfoData, FeaturedGamesData, CurrentMatch, FeaturedMatches
 from ..core.champion import ChampionStatusData, ChampionStatusListData
+from ..core.common import CassiopeiaGhost
 
 T = TypeVar("T")
 
+LOGGER = logging.getLogger("default")
+
+# Set in the PipelineContext by `Cache._get` to the type and keys it looked the query up by, so that a miss can be
+# coalesced with other requests for the same keys (see `Cache.lookup_keys`)
+_LOOKUP_KEYS = "cache.lookup_keys"
+
+
+class _Tombstone(object):
+    # The type under which the cache records queries that were recently not found. They're kept in their own storage,
+    # so that they don't count towards the bounds or the stats of the cached objects.
+    pass
+
 
 default_expirations = {
     ChampionStatusData: datetime.timedelta(hours=6),
@@ -60,17 +79,55 @@ default_expirations = {
 }
 
 
+def _types_from_names(mapping: Mapping[Any, Any]) -> dict:
+    # Settings files refer to the cached types by name
+    return {globals()[key] if isinstance(key, str) else key: value for key, value in mapping.items()}
+
+
+def _expirations_in_seconds(expirations: Mapping[type, Any]) -> dict:
+    expirations = dict(expirations)
+    for key, value in expirations.items():
+        if value != -1 and isinstance(value, datetime.timedelta):
+            expirations[key] = value.seconds + 24 * 60 * 60 * value.days
+    return expirations
+
+
 class Cache(DataSource, DataSink):
-    def __init__(self, expirations: Mapping[type, float] = None) -> None:
-        self._cache = CommonsCache()
-        self._expirations = dict(expirations) if expirations is not None else default_expirations
-        for key, value in list(self._expirations.items()):
-            if isinstance(key, str):
-                new_key = globals()[key]
-                self._expirations[new_key] = self._expirations.pop(key)
-                key = new_key
-            if value != -1 and isinstance(value, datetime.timedelta):
-                self._expirations[key] = value.seconds + 24 * 60 * 60 * value.days
+    def __init__(self,
+                 expirations: Mapping[type, float] = None,
+                 max_entries: int = None,
+                 max_bytes: int = None,
+                 max_entries_per_type: Mapping[type, int] = None,
+                 max_bytes_per_type: Mapping[type, int] = None,
+                 eviction_policy: str = "lru",
+                 tombstone_expirations: Mapping[type, float] = None,
+                 max_tombstones: int = 10000,
+                 sweep_interval: float = None,
+                 sweep_batch_size: int = 1000,
+                 track_bytes: bool = False,
+                 log_stats_interval: float = None,
+                 stale_while_revalidate: Mapping[type, float] = None) -> None:
+        self._cache = CacheStorage(max_entries=max_entries,
+                                   max_bytes=max_bytes,
+                                   max_entries_per_type=_types_from_names(max_entries_per_type or {}),
+                                   max_bytes_per_type=_types_from_names(max_bytes_per_type or {}),
+                                   eviction_policy=EvictionPolicy(eviction_policy),
+                                   sweep_interval=sweep_interval,
+                                   sweep_batch_size=sweep_batch_size,
+                                   track_bytes=track_bytes)
+        self._flights = SingleFlight()
+        self._expirations = _expirations_in_seconds(_types_from_names(expirations) if expirations is not None else default_expirations)
+        self._tombstone_expirations = _expirations_in_seconds(_types_from_names(tombstone_expirations or {}))
+        self._tombstones = CacheStorage(max_entries=max_tombstones, sweep_interval=sweep_interval, sweep_batch_size=sweep_batch_size)
+        self._tombstoned_types = {}  # The requested types that have been tombstoned, by the type they're cached under
+        self._tombstoned_types_lock = threading.Lock()
+        self._stale_while_revalidate = _expirations_in_seconds(_types_from_names(stale_while_revalidate or {}))
+        self._refreshes = set()  # The (type, key)s of the stale entries being refreshed
+        self._refreshes_lock = threading.Lock()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="CacheRefresh") if self._stale_while_revalidate else None
+        self._refreshing = threading.local()  # The type a refresh thread is currently refreshing
+        if log_stats_interval is not None:
+            threading.Thread(target=self._log_stats_periodically, args=(log_stats_interval,), name="CacheStatsLogger", daemon=True).start()
 
     @DataSource.dispatch
     def get(self, type: Type[T], query: Mapping[str, Any], context: PipelineContext = None) -> T:
@@ -90,55 +147,162 @@ class Cache(DataSource, DataSink):
 
     def _get(self, type: Type[T], query: Mapping[str, Any], key_function: Callable[[Mapping[str, Any]], Any], context: PipelineContext = None) -> T:
         keys = key_function(query)
+        if context is not None:
+            context[_LOOKUP_KEYS] = (type, keys)
         for key in keys:
             try:
-                return self._cache.get(type, key)
+                item, stale = self._cache.lookup(type, key)
             except KeyError:
-                pass
+                continue
+            if stale:
+                if getattr(self._refreshing, "type", None) is type:
+                    continue  # This is the refresh, so it needs the new value
+                self._refresh_in_background(type, query, key, context)
+            self._cache.record_hit(type)
+            return item
         else:
+            self._cache.record_miss(type)
             raise NotFoundError
 
     def _get_many(self, type: Type[T], query: Mapping[str, Any], key_generator: Callable[[Mapping[str, Any]], Any], context: PipelineContext = None) -> Generator[T, None, None]:
         for keys in key_generator(query):
             for key in keys:
                 try:
-                    yield self._cache.get(type, key)
+                    item = self._cache.get(type, key)
                 except KeyError:
                     pass
+                else:
+                    self._cache.record_hit(type)
+                    yield item
+                    break
             else:
+                self._cache.record_miss(type)
                 raise NotFoundError
 
-    @staticmethod
-    def _put_many_generator(items: Iterable[T], key_function: Callable[[T], Any]) -> Generator[Tuple[Any, T], None, None]:
-        for item in items:
-            for key in key_function(item):
-                yield key, item
-
     def _put(self, type: Type[T], item: T, key_function: Callable[[T], Any], context: PipelineContext = None) -> None:
         try:
             expire_seconds = self._expirations[type]
         except KeyError:
             expire_seconds = -1
 
-        if expire_seconds != 0:
+        if expire_seconds != 0 and getattr(self._refreshing, "type", None) is not type:
+            self._cache.record_put(type)
+            stale_seconds = self._stale_while_revalidate.get(type, 0)
             keys = key_function(item)
+            self._cache.put(type, keys, item, expire_seconds, stale_seconds)
             for key in keys:
-                self._cache.put(type, key, item, expire_seconds)
+                self._remove_tombstones(type, key)
 
     def _put_many(self, type: Type[T], items: Iterable[T], key_function: Callable[[T], Any], context: PipelineContext = None) -> None:
-        expire_seconds = self._expirations.get(type, default_expirations[type])
-        for key, item in Cache._put_many_generator(items, key_function):
-            self._cache.put(type, key, item, expire_seconds)
+        expire_seconds = self._expirations.get(type, -1)
+        if expire_seconds != 0 and getattr(self._refreshing, "type", None) is not type:
+            stale_seconds = self._stale_while_revalidate.get(type, 0)
+            for item in items:
+                self._cache.record_put(type)
+                keys = key_function(item)
+                self._cache.put(type, keys, item, expire_seconds, stale_seconds)
+                for key in keys:
+                    self._remove_tombstones(type, key)
+
+    def _refresh_in_background(self, type: Type[T], query: Mapping[str, Any], key: Any, context: PipelineContext = None) -> None:
+        pipeline = context.get(PipelineContext.Keys.PIPELINE) if context is not None else None
+        if pipeline is None:
+            return
+        with self._refreshes_lock:
+            if (type, key) in self._refreshes:
+                return
+            self._refreshes.add((type, key))
+        self._refresh_executor.submit(self._refresh, pipeline, type, deepcopy(query), key)
+
+    def _refresh(self, pipeline: DataPipeline, type: Type[T], query: Mapping[str, Any], key: Any) -> None:
+        # Gets a new `type` for `query` from the rest of the pipeline. The stale item stays in the cache until the new one
+        # has been fully loaded.
+        self._refreshing.type = type
+        try:
+            item = pipeline.get(type, query)
+            if isinstance(item, CassiopeiaGhost):
+                item.load()
+        except Exception as error:
+            LOGGER.warning("Failed to refresh stale {type} for {key}: {error}".format(type=type.__name__, key=key, error=error))
+        else:
+            self._refreshing.type = None
+            self.put(type, item)
+        finally:
+            self._refreshing.type = None
+            with self._refreshes_lock:
+                self._refreshes.discard((type, key))
+
+    @staticmethod
+    def lookup_keys(type: Type[T], context: PipelineContext) -> List[Tuple]:
+        """Returns the keys that the cache last looked up a `type` by in `context`, as (`type`, cached type, key)s, and
+        removes them from the context. The cached type is the one the object is stored under, e.g. Match for MatchData."""
+        try:
+            cached_type, keys = context.pop(_LOOKUP_KEYS)
+        except KeyError:
+            return []
+        return [(type, cached_type, key) for key in keys]
+
+    def single_flight(self, keys: List[Tuple], get: Callable[[], T]) -> T:
+        """Calls `get()`, unless a call for any of the same `keys` (from `lookup_keys`) is already in progress in another
+        thread, in which case that call's result is returned when it finishes.
+
+        If the requested type has a tombstone expiration and `get` raises a NotFoundError, the keys are remembered as not
+        found for that long, and asking for them again raises a NotFoundError without calling `get`.
+        """
+        for key in keys:
+            if self._tombstones.contains(_Tombstone, key):
+                raise NotFoundError("\"{type}\" was not found for this query recently".format(type=key[0].__name__))
+        # A background refresh mustn't be handed the stale item another request is returning, and other requests
+        # shouldn't wait for a refresh when there's a stale item they can return, so refreshes only coalesce with each other
+        refreshing = getattr(self._refreshing, "type", None) is not None
+        flight_keys = [(refreshing,) + key for key in keys]
+        return self._flights.do(flight_keys, lambda: self._get_or_tombstone(keys, get))
+
+    def _get_or_tombstone(self, keys: List[Tuple], get: Callable[[], T]) -> T:
+        try:
+            return get()
+        except NotFoundError:
+            for key in keys:
+                type, cached_type = key[0], key[1]
+                expire_seconds = self._tombstone_expirations.get(type, self._tombstone_expirations.get(cached_type, 0))
+                if expire_seconds != 0:
+                    with self._tombstoned_types_lock:
+                        self._tombstoned_types[cached_type] = self._tombstoned_types.get(cached_type, frozenset()) | {type}
+                    self._tombstones.put(_Tombstone, [key], None, expire_seconds)
+            raise
+
+    def _remove_tombstones(self, type: Type[T], key: Any) -> None:
+        # Something has been found for `key`, so the queries for it that weren't found should be asked again
+        with self._tombstoned_types_lock:
+            requested_types = self._tombstoned_types.get(type, ())
+        for requested_type in requested_types:
+            self._tombstones.delete(_Tombstone, (requested_type, type, key))
+
+    def stats(self) -> Dict[type, Dict[str, Optional[int]]]:
+        """Returns, for each type in the cache, its number of hits, misses, puts, evictions, and expirations so far, and
+        its current number of entries and their approximate size in bytes (None unless sizes are being tracked)."""
+        return self._cache.stats()
+
+    def _log_stats_periodically(self, interval: float) -> None:
+        while True:
+            time.sleep(interval)
+            for type, stats in sorted(self.stats().items(), key=lambda item: item[0].__name__):
+                lookups = stats["hits"] + stats["misses"]
+                LOGGER.info("Cache stats for {type}: {hits} hits, {misses} misses ({ratio}), {puts} puts, {evictions} evictions, "
+                            "{expirations} expirations, {entries} entries, {bytes} bytes".format(
+                                type=type.__name__,
+                                ratio="{:.1%} hit ratio".format(stats["hits"] / lookups) if lookups else "no lookups",
+                                **stats))
 
     def clear(self, type: Type[T] = None):
+        self._cache.clear(type)
         if type is None:
-            for key in self._cache._data:
-                self._cache._data[key].clear()
-        else:
-            self._cache._data[type].clear()
+            self._tombstones.clear()
 
     def expire(self, type: Type[T] = None):
         self._cache.expire(type)
+        if type is None:
+            self._tombstones.expire()
 
 
     ###################
@@ -0,0 +1,389 @@
+import sys
+import heapq
+import itertools
+import threading
+from collections import OrderedDict, defaultdict
+from enum import Enum
+from time import monotonic
+from types import FunctionType, MethodType, ModuleType, GeneratorType
+from typing import Type, Mapping, Any, Dict, Hashable, Optional, Tuple, Sequence
+
+
+class EvictionPolicy(Enum):
+    lru = "lru"  # Evict the entry that was used least recently
+    lfu = "lfu"  # Evict the entry that was used least often (the least recently used one if there's a tie)
+
+
+class _LRU(object):
+    def __init__(self):
+        self._order = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def add(self, key: Hashable) -> None:
+        self._order[key] = None
+        self._order.move_to_end(key)
+
+    def touch(self, key: Hashable) -> None:
+        self._order.move_to_end(key)
+
+    def remove(self, key: Hashable) -> None:
+        self._order.pop(key, None)
+
+    def victim(self, keep: Hashable = None) -> Hashable:
+        for key in self._order:
+            if key != keep:
+                return key
+        return keep
+
+
+class _LFU(object):
+    def __init__(self):
+        self._counts = {}  # type: Dict[Hashable, int]
+        self._buckets = {}  # type: Dict[int, OrderedDict]
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def _unlink(self, key: Hashable, count: int) -> None:
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+
+    def _link(self, key: Hashable, count: int) -> None:
+        self._counts[key] = count
+        try:
+            self._buckets[count][key] = None
+        except KeyError:
+            self._buckets[count] = OrderedDict([(key, None)])
+
+    def add(self, key: Hashable) -> None:
+        self.remove(key)
+        self._link(key, 1)
+
+    def touch(self, key: Hashable) -> None:
+        count = self._counts[key]
+        self._unlink(key, count)
+        self._link(key, count + 1)
+
+    def remove(self, key: Hashable) -> None:
+        count = self._counts.pop(key, None)
+        if count is not None:
+            self._unlink(key, count)
+
+    def victim(self, keep: Hashable = None) -> Hashable:
+        # The entry being put has the lowest count of all, so unless it's kept, nothing new could stay in a full cache
+        for key in self._buckets[min(self._buckets)]:
+            if key != keep:
+                return key
+        # Only the kept entry has the lowest count, so the victim is the first entry with the next lowest
+        counts = sorted(self._buckets)
+        if len(counts) > 1:
+            return next(iter(self._buckets[counts[1]]))
+        return keep
+
+
+_policies = {
+    EvictionPolicy.lru: _LRU,
+    EvictionPolicy.lfu: _LFU,
+}
+
+
+_not_walked = (type, ModuleType, FunctionType, MethodType, GeneratorType, Enum, threading.Thread)
+
+
+def approximate_size(obj: Any, limit: int = 100000) -> int:
+    """Returns an estimate of the number of bytes used by `obj` and everything it references (each object is counted once).
+
+    Containers, instance dictionaries, and slots are followed; classes, modules, functions, and enum members are not.
+    At most `limit` objects are visited, so very large objects are undercounted rather than taking a long time to measure.
+    """
+    seen = set()
+    pending = [obj]
+    size = 0
+    while pending and len(seen) < limit:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, _not_walked):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, (str, bytes, bytearray, int, float, bool)):
+            continue
+        if isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            pending.extend(obj)
+        try:
+            pending.append(obj.__dict__)
+        except AttributeError:
+            pass
+        for cls in type(obj).__mro__:
+            for slot in cls.__dict__.get("__slots__", ()):
+                try:
+                    pending.append(getattr(obj, slot))
+                except AttributeError:
+                    pass
+    return size
+
+
+class _Entry(object):
+    __slots__ = ["keys", "value", "stale_at", "expires_at", "size"]
+
+    def __init__(self, keys: Tuple[Hashable, ...], value: Any, stale_at: Optional[float], expires_at: Optional[float], size: int):
+        self.keys = keys
+        self.value = value
+        self.stale_at = stale_at
+        self.expires_at = expires_at
+        self.size = size
+
+    def stale(self, now: float) -> bool:
+        return self.stale_at is not None and self.stale_at <= now
+
+    def expired(self, now: float) -> bool:
+        return self.expires_at is not None and self.expires_at <= now
+
+
+class _TypeStats(object):
+    __slots__ = ["hits", "misses", "puts", "evictions", "expirations"]
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.puts = 0
+        self.evictions = 0
+        self.expirations = 0
+
+
+class CacheStorage(object):
+    """Thread-safe in-memory storage of the cache's entries, grouped by type.
+
+    An entry is one value stored under one or more keys. The first key is its primary key, and the others are indexed
+    to it, so that expiring, evicting, and counting entries treats the value as one entry no matter how many keys it has.
+
+    Each entry expires after the number of seconds it was put with (or never, if that's -1). It can be kept for a while
+    after that as a stale entry, which `lookup` still returns (but flags as stale) and `get` doesn't. The storage can be bounded
+    by the number of entries and/or by their approximate size in bytes, both in total (`max_entries`, `max_bytes`) and
+    for individual types (`max_entries_per_type`, `max_bytes_per_type`). When a bound is exceeded, entries are evicted
+    according to `eviction_policy` until it no longer is.
+
+    Expired entries are removed when they're accessed, by `expire`, or, if `sweep_interval` is set, by a background
+    thread that removes up to `sweep_batch_size` of them every `sweep_interval` seconds.
+
+    Evictions and expirations are counted per type and reported by `stats`, along with the hits, misses, and puts the
+    owner records. The size of the entries is only reported if they're being measured for a byte bound or `track_bytes` is set.
+    """
+    def __init__(self,
+                 max_entries: int = None,
+                 max_bytes: int = None,
+                 max_entries_per_type: Mapping[type, int] = None,
+                 max_bytes_per_type: Mapping[type, int] = None,
+                 eviction_policy: EvictionPolicy = EvictionPolicy.lru,
+                 sweep_interval: float = None,
+                 sweep_batch_size: int = 1000,
+                 track_bytes: bool = False):
+        self._lock = threading.RLock()
+        self._data = defaultdict(dict)  # type: Dict[type, Dict[Hashable, _Entry]]  # By primary key
+        self._index = defaultdict(dict)  # type: Dict[type, Dict[Hashable, Hashable]]  # Every key to its entry's primary key
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._max_entries_per_type = dict(max_entries_per_type or {})
+        self._max_bytes_per_type = dict(max_bytes_per_type or {})
+        self._eviction_policy = EvictionPolicy(eviction_policy)
+        self._track_bytes = track_bytes or max_bytes is not None or bool(self._max_bytes_per_type)
+        self._stats = defaultdict(_TypeStats)  # type: Dict[type, _TypeStats]
+
+        policy = _policies[self._eviction_policy]
+        # Entries are only ordered for eviction in the scopes that are bounded
+        self._policy = policy() if max_entries is not None or max_bytes is not None else None
+        self._type_policies = {type: policy() for type in set(self._max_entries_per_type) | set(self._max_bytes_per_type)}
+        self._bytes = 0
+        self._type_bytes = defaultdict(int)  # type: Dict[type, int]
+        self._entries = 0
+        # (expires_at, tiebreaker, type, key, entry) for every entry that expires. Entries that are replaced or removed
+        # are left in the heap and skipped when they come up, until there are enough of them to make a rebuild worthwhile.
+        self._expirations = []
+        self._tiebreaker = itertools.count()
+        self._sweep_batch_size = sweep_batch_size
+        self._sweeper = None
+        if sweep_interval is not None:
+            self._stop_sweeping = threading.Event()
+            self._sweeper = threading.Thread(target=self._sweep_periodically, args=(sweep_interval,), name="CacheSweeper", daemon=True)
+            self._sweeper.start()
+
+    def put(self, type: Type, keys: Sequence[Hashable], value: Any, expire_seconds: float = -1, stale_seconds: float = 0) -> None:
+        """Stores `value` under all of `keys`, replacing any entries that were stored under any of them."""
+        keys = tuple(keys)
+        if not keys:
+            return
+        key = keys[0]
+        stale_at = None if expire_seconds == -1 else monotonic() + expire_seconds
+        expires_at = None if stale_at is None else stale_at + stale_seconds
+        size = approximate_size(value) if self._track_bytes else 0
+        with self._lock:
+            index = self._index[type]
+            for alias in keys:
+                if alias in index:
+                    self._remove(type, index[alias])
+            entry = _Entry(keys, value, stale_at, expires_at, size)
+            self._data[type][key] = entry
+            for alias in keys:
+                index[alias] = key
+            if expires_at is not None:
+                heapq.heappush(self._expirations, (expires_at, next(self._tiebreaker), type, key, entry))
+                if len(self._expirations) > 2 * self._entries + 1024:
+                    self._compact()
+            self._entries += 1
+            self._bytes += size
+            self._type_bytes[type] += size
+            if self._policy is not None:
+                self._policy.add((type, key))
+            type_policy = self._type_policies.get(type)
+            if type_policy is not None:
+                type_policy.add(key)
+            self._evict(type, key)
+
+    def get(self, type: Type, key: Hashable) -> Any:
+        value, stale = self.lookup(type, key)
+        if stale:
+            raise KeyError(key)
+        return value
+
+    def lookup(self, type: Type, key: Hashable) -> Tuple[Any, bool]:
+        """Returns the value for `key` and whether it is stale. Raises a KeyError if there is no such entry."""
+        with self._lock:
+            now = monotonic()
+            key = self._index[type][key]
+            entry = self._data[type][key]
+            if entry.expired(now):
+                self._remove(type, key, expired=True)
+                raise KeyError(key)
+            if self._policy is not None:
+                self._policy.touch((type, key))
+            type_policy = self._type_policies.get(type)
+            if type_policy is not None:
+                type_policy.touch(key)
+            return entry.value, entry.stale(now)
+
+    def contains(self, type: Type, key: Hashable) -> bool:
+        with self._lock:
+            key = self._index[type].get(key)
+            entry = self._data[type].get(key) if key is not None else None
+            return entry is not None and not entry.stale(monotonic())
+
+    def delete(self, type: Type, key: Hashable) -> None:
+        """Removes the entry stored under `key`, including its other keys."""
+        with self._lock:
+            key = self._index[type].get(key)
+            if key is not None:
+                self._remove(type, key)
+
+    def expire(self, type: Type = None) -> None:
+        if type is None:
+            self.sweep()
+            return
+        with self._lock:
+            now = monotonic()
+            expired = [key for key, entry in self._data[type].items() if entry.expired(now)]
+            for key in expired:
+                self._remove(type, key, expired=True)
+
+    def sweep(self, limit: int = None) -> int:
+        """Removes up to `limit` (or all, if it's None) expired entries, soonest-expired first. Returns how many were removed."""
+        removed = 0
+        with self._lock:
+            now = monotonic()
+            while self._expirations and self._expirations[0][0] <= now and (limit is None or removed < limit):
+                _, _, type, key, entry = heapq.heappop(self._expirations)
+                if self._data[type].get(key) is entry:
+                    self._remove(type, key, expired=True)
+                    removed += 1
+        return removed
+
+    def _compact(self) -> None:
+        # Must be called with the lock held
+        self._expirations = [item for item in self._expirations if self._data[item[2]].get(item[3]) is item[4]]
+        heapq.heapify(self._expirations)
+
+    def _sweep_periodically(self, interval: float) -> None:
+        while not self._stop_sweeping.wait(interval):
+            self.sweep(self._sweep_batch_size)
+
+    def stop_sweeping(self) -> None:
+        if self._sweeper is not None:
+            self._stop_sweeping.set()
+            self._sweeper.join()
+            self._sweeper = None
+
+    def clear(self, type: Type = None) -> None:
+        with self._lock:
+            types = list(self._data) if type is None else [type]
+            for type in types:
+                for key in list(self._data[type]):
+                    self._remove(type, key)
+
+    def record_hit(self, type: Type) -> None:
+        with self._lock:
+            self._stats[type].hits += 1
+
+    def record_miss(self, type: Type) -> None:
+        with self._lock:
+            self._stats[type].misses += 1
+
+    def record_put(self, type: Type) -> None:
+        with self._lock:
+            self._stats[type].puts += 1
+
+    def stats(self) -> Dict[type, Dict[str, Optional[int]]]:
+        with self._lock:
+            types = set(self._stats) | {type for type, entries in self._data.items() if entries}
+            return {type: {
+                "hits": self._stats[type].hits,
+                "misses": self._stats[type].misses,
+                "puts": self._stats[type].puts,
+                "evictions": self._stats[type].evictions,
+                "expirations": self._stats[type].expirations,
+                "entries": len(self._data[type]),
+                "bytes": self._type_bytes[type] if self._track_bytes else None
+            } for type in types}
+
+    def _remove(self, type: Type, key: Hashable, evicted: bool = False, expired: bool = False) -> Optional[_Entry]:
+        # Must be called with the lock held and the entry's primary key
+        entry = self._data[type].pop(key, None)
+        if entry is None:
+            return None
+        index = self._index[type]
+        for alias in entry.keys:
+            if index.get(alias) == key:
+                del index[alias]
+        if evicted:
+            self._stats[type].evictions += 1
+        if expired:
+            self._stats[type].expirations += 1
+        entry.value = None  # It may still be in the expiration heap, which shouldn't keep the value alive
+        self._entries -= 1
+        self._bytes -= entry.size
+        self._type_bytes[type] -= entry.size
+        if self._policy is not None:
+            self._policy.remove((type, key))
+        type_policy = self._type_policies.get(type)
+        if type_policy is not None:
+            type_policy.remove(key)
+        return entry
+
+    def _evict(self, type: Type, key: Hashable) -> None:
+        # Must be called with the lock held. The entry that was just put under `key` is only evicted if it's the last one left.
+        type_policy = self._type_policies.get(type)
+        if type_policy is not None:
+            max_entries = self._max_entries_per_type.get(type)
+            max_bytes = self._max_bytes_per_type.get(type)
+            while type_policy and ((max_entries is not None and len(self._data[type]) > max_entries) or
+                                   (max_bytes is not None and self._type_bytes[type] > max_bytes)):
+                self._remove(type, type_policy.victim(keep=key), evicted=True)
+        if self._policy is not None:
+            while self._policy and ((self._max_entries is not None and len(self._policy) > self._max_entries) or
+                                    (self._max_bytes is not None and self._bytes > self._max_bytes)):
+                victim_type, victim_key = self._policy.victim(keep=(type, key))
+                self._remove(victim_type, victim_key, evicted=True)
@@ -1,11 +1,18 @@
 import re
+import time
 import zlib
+import asyncio
+import threading
+import concurrent.futures
+import weakref
+from collections import defaultdict, deque
 from contextlib import contextmanager, ExitStack
 from io import BytesIO
-from typing import Mapping, MutableMapping, Any, Union, Dict, List
-from urllib.parse import urlencode
+from typing import Mapping, MutableMapping, Any, Union, Dict, List, Iterable, Tuple, Generator, Callable
+from urllib.parse import urlencode, urlsplit
 
-from pycurl import Curl
+import pycurl
+from pycurl import Curl, CurlMulti, E_CALL_MULTI_PERFORM
 from merakicommons.ratelimits import RateLimiter
 
 try:
@@ -13,15 +20,84 @@ try:
 except ImportError:
     certifi = None
 
-try:
-    import ujson as json
-except ImportError:
-    import json
-
 
 _print_calls = True
 _print_api_key = False
 
+# How often a batch of requests checks for a permit from a rate limiter that can only be waited on
+_PERMIT_POLL_INTERVAL = 0.05
+
+
+def _orjson_loads() -> Callable[[Union[bytes, str]], Any]:
+    import orjson
+    return orjson.loads
+
+
+def _simdjson_loads() -> Callable[[Union[bytes, str]], Any]:
+    import simdjson
+    return simdjson.loads
+
+
+def _ujson_loads() -> Callable[[Union[bytes, str]], Any]:
+    import ujson
+    return ujson.loads
+
+
+def _json_loads() -> Callable[[Union[bytes, str]], Any]:
+    import json
+    return json.loads
+
+
+# The JSON decoders that can be used, fastest first. Each of them can parse bytes as well as str.
+_json_decoders = {
+    "orjson": _orjson_loads,
+    "simdjson": _simdjson_loads,
+    "ujson": _ujson_loads,
+    "json": _json_loads
+}
+
+
+class JSONObject(dict):
+    """A decoded JSON object that also has the bytes it was decoded from, as `raw_json`."""
+    def __init__(self, value: Mapping[str, Any], raw_json: bytes):
+        super().__init__(value)
+        self.raw_json = raw_json
+
+
+def set_json_decoder(decoder: Union[str, Callable[[Union[bytes, str]], Any]] = None, keep_raw_json: bool = False) -> None:
+    """Sets the function that JSON responses are decoded with: the name of one of the supported libraries ("orjson",
+    "simdjson", "ujson", or "json"), a function that takes bytes, or None for the fastest library that is installed.
+
+    If `keep_raw_json` is True, decoded objects are returned as JSONObjects, so that the response can be stored as it
+    was received (e.g. by the MatchArchive) rather than encoded again.
+    """
+    global _decode_json, _keep_raw_json
+    if decoder is None:
+        for load in _json_decoders.values():
+            try:
+                _decode_json = load()
+                break
+            except ImportError:
+                pass
+    elif isinstance(decoder, str):
+        try:
+            _decode_json = _json_decoders[decoder]()
+        except KeyError:
+            raise ValueError("Unknown JSON decoder \"{decoder}\". Valid decoders are {valid}.".format(decoder=decoder, valid=", ".join(_json_decoders)))
+    else:
+        _decode_json = decoder
+    _keep_raw_json = keep_raw_json
+
+
+def json_loads(body: Union[bytes, str]) -> Any:
+    """Decodes `body` with the JSON decoder set by `set_json_decoder`."""
+    return _decode_json(body)
+
+
+_decode_json = None  # type: Callable[[Union[bytes, str]], Any]
+_keep_raw_json = False
+set_json_decoder()
+
 
 class HTTPError(RuntimeError):
     def __init__(self, message, code, response_headers: Dict[str, str] = None):
@@ -30,7 +106,94 @@ class HTTPError(RuntimeError):
         self.response_headers = response_headers or {}
 
 
+class ConnectionPool(object):
+    """A bounded, thread-safe pool of reusable Curl handles, keyed by host.
+
+    The handles share one connection cache, so consecutive requests to the same host skip the TCP and TLS handshakes
+    whether they're made by an HTTPClient or (from a CurlMulti) by an AsyncHTTPClient. At most `max_size` idle handles
+    are kept per host, and handles that have been idle for longer than `idle_timeout` seconds are closed.
+    """
+    def __init__(self, max_size: int = 10, idle_timeout: float = 60.0):
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+        self._idle = defaultdict(deque)  # host -> deque of (Curl, time it was released)
+        self._lock = threading.Lock()
+        # A handle in a CurlMulti uses the multi's connections rather than its own, so the connections (and DNS lookups
+        # and TLS sessions) are kept in a share that every handle from the pool is attached to
+        self._share = pycurl.CurlShare()
+        self._share.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_DNS)
+        self._share.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_SSL_SESSION)
+        if hasattr(pycurl, "LOCK_DATA_CONNECT"):  # libcurl 7.57+
+            self._share.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_CONNECT)
+
+    @staticmethod
+    def _host(url: Union[str, bytes]) -> str:
+        if isinstance(url, bytes):
+            url = url.decode("utf-8")
+        return urlsplit(url).netloc
+
+    def _evict_idle(self, now: float) -> None:
+        # The oldest handles are on the left of each deque
+        for host, handles in list(self._idle.items()):
+            while handles and now - handles[0][1] > self._idle_timeout:
+                curl, _ = handles.popleft()
+                curl.close()
+            if not handles:
+                del self._idle[host]
+
+    def acquire(self, url: Union[str, bytes]) -> Curl:
+        host = self._host(url)
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            handles = self._idle.get(host)
+            if handles:
+                # Prefer the most recently used handle
+                curl, _ = handles.pop()
+                return curl
+        # The share stays attached through reset()
+        curl = Curl()
+        curl.setopt(pycurl.SHARE, self._share)
+        return curl
+
+    def release(self, url: Union[str, bytes], curl: Curl, reuse: bool = True) -> None:
+        if not reuse:
+            curl.close()
+            return
+        # Drop the references to the last request's buffers and callbacks
+        curl.reset()
+        host = self._host(url)
+        with self._lock:
+            now = time.monotonic()
+            self._evict_idle(now)
+            handles = self._idle[host]
+            if len(handles) < self._max_size:
+                handles.append((curl, now))
+                curl = None
+        if curl is not None:
+            curl.close()
+
+    def close(self) -> None:
+        with self._lock:
+            for handles in self._idle.values():
+                for curl, _ in handles:
+                    curl.close()
+            self._idle.clear()
+
+
 class HTTPClient(object):
+    def __init__(self, connection_pool_size: int = 10, connection_idle_timeout: float = 60.0, connection_pool: ConnectionPool = None):
+        # Clients that are given the same `connection_pool` share their connections to each host
+        if connection_pool is not None:
+            self._pool = connection_pool
+        elif connection_pool_size > 0:
+            self._pool = ConnectionPool(max_size=connection_pool_size, idle_timeout=connection_idle_timeout)
+        else:
+            self._pool = None
+
+    @property
+    def connection_pool(self) -> Union[ConnectionPool, None]:
+        return self._pool
+
     @staticmethod
     def _execute(curl: Curl, close_connection: bool) -> int:
         curl.perform()
@@ -40,7 +203,8 @@ class HTTPClient(object):
         return status_code
 
     @staticmethod
-    def _get(url: str, headers: Mapping[str, str] = None, rate_limiters: List[RateLimiter] = None, connection: Curl = None) -> (int, bytes, dict):
+    def _prepare(curl: Curl, url: str, headers: Mapping[str, str] = None) -> (BytesIO, dict):
+        # Sets the request options on `curl` and returns the buffers that the response will be written into
         if not headers:
             request_headers = ["Accept-Encoding: gzip"]
         else:
@@ -61,8 +225,6 @@ class HTTPClient(object):
 
         buffer = BytesIO()
 
-        curl = connection if connection is not None else Curl()
-
         curl.setopt(curl.URL, url)
         curl.setopt(curl.WRITEDATA, buffer)
         curl.setopt(curl.HEADERFUNCTION, get_response_headers)
@@ -80,6 +242,29 @@ class HTTPClient(object):
                 else:
                     _url += "&api_key={}".format(headers["X-Riot-Token"])
             print("Making call: {}".format(_url))
+
+        return buffer, response_headers
+
+    @staticmethod
+    def _read_body(buffer: BytesIO, response_headers: dict) -> bytes:
+        body = buffer.getvalue()
+
+        # Decompress if we got gzipped data
+        try:
+            content_encoding = response_headers["Content-Encoding"].upper()
+            if "GZIP" == content_encoding:
+                body = zlib.decompress(body, zlib.MAX_WBITS | 16)
+        except KeyError:
+            pass
+
+        return body
+
+    @staticmethod
+    def _get(url: str, headers: Mapping[str, str] = None, rate_limiters: List[RateLimiter] = None, connection: Curl = None) -> (int, bytes, dict):
+        curl = connection if connection is not None else Curl()
+
+        buffer, response_headers = HTTPClient._prepare(curl, url, headers)
+
         if rate_limiters:
             with ExitStack() as stack:
                 # Enter each context manager / rate limiter
@@ -90,38 +275,142 @@ class HTTPClient(object):
         else:
             status_code = HTTPClient._execute(curl, connection is None)
 
-        body = buffer.getvalue()
+        body = HTTPClient._read_body(buffer, response_headers)
 
-        # Decompress if we got gzipped data
+        return status_code, body, response_headers
+
+    @staticmethod
+    def _take_permits(rate_limiters: List[RateLimiter], taken: List[RateLimiter], block: bool) -> float:
+        # Takes a permit from each of `rate_limiters` that isn't in `taken` yet, adding it to `taken`. Returns 0 once all of
+        # them have been taken, and otherwise how long until the next one might have a permit.
+        # Unless `block` is True this never waits, because a window often only starts (and a permit is only returned) when
+        # a request that's in flight completes, which can't happen while the thread driving the transfers is waiting.
+        # Rate limiters that can't be asked for a permit without waiting (i.e. that don't have `try_acquire`) are only
+        # entered when `block` is True.
+        for rate_limiter in rate_limiters[len(taken):]:
+            if block:
+                rate_limiter.__enter__()
+            else:
+                try_acquire = getattr(rate_limiter, "try_acquire", None)
+                if try_acquire is None:
+                    return _PERMIT_POLL_INTERVAL
+                wait = try_acquire()
+                if wait > 0:
+                    return wait
+            taken.append(rate_limiter)
+        return 0.0
+
+    @staticmethod
+    def _return_permits(permits: List[RateLimiter]) -> None:
+        for rate_limiter in reversed(permits):
+            rate_limiter.__exit__(None, None, None)
+
+    @staticmethod
+    def _get_multi(urls: Iterable[str], headers: Mapping[str, str] = None, rate_limiters: List[RateLimiter] = None, max_concurrent: int = 10, pool: ConnectionPool = None) -> Generator[Tuple[int, Union[Tuple[int, bytes, dict], pycurl.error]], None, None]:
+        # Runs the requests on a CurlMulti so that up to `max_concurrent` of them are in flight at once.
+        # Yields (index, response) in the order in which the requests finish, where `response` is either the (status code,
+        # body, response headers) or the pycurl.error that the transfer failed with.
+        # If a pool is given, the Curl handles are taken from and returned to it.
+        pending = iter(enumerate(urls))
+        rate_limiters = list(rate_limiters or [])
+        multi = CurlMulti()
+        in_flight = {}  # Curl -> (index, url, buffer, response headers, permits)
+        next_request = None
+        taken = []  # The permits that have been taken for `next_request`
         try:
-            content_encoding = response_headers["Content-Encoding"].upper()
-            if "GZIP" == content_encoding:
-                body = zlib.decompress(body, zlib.MAX_WBITS | 16)
-        except KeyError:
-            pass
+            while True:
+                # Top up the in-flight requests. Each one has to get a permit from every rate limiter before it's sent,
+                # and while one of them has none available, the requests that are in flight are driven until it might.
+                wait = 0.0
+                while len(in_flight) < max_concurrent:
+                    if next_request is None:
+                        next_request = next(pending, None)
+                        if next_request is None:
+                            break
+                    # With nothing in flight, no permit can be waiting on this thread, so it's safe to block
+                    wait = HTTPClient._take_permits(rate_limiters, taken, block=not in_flight)
+                    if wait > 0:
+                        break
+                    index, url = next_request
+                    curl = pool.acquire(url) if pool is not None else Curl()
+                    buffer, response_headers = HTTPClient._prepare(curl, url, headers)
+                    in_flight[curl] = (index, url, buffer, response_headers, taken)
+                    multi.add_handle(curl)
+                    next_request = None
+                    taken = []
+                if not in_flight:
+                    break
 
-        return status_code, body, response_headers
+                while True:
+                    ret, num_handles = multi.perform()
+                    if ret != E_CALL_MULTI_PERFORM:
+                        break
 
-    def get(self, url: str, parameters: MutableMapping[str, Any] = None, headers: Mapping[str, str] = None, rate_limiters: List[RateLimiter] = None, connection: Curl = None, encode_parameters: bool = True) -> (Union[dict, list, str, bytes], dict):
+                while True:
+                    num_queued, succeeded, failed = multi.info_read()
+                    for curl in succeeded:
+                        index, url, buffer, response_headers, permits = in_flight.pop(curl)
+                        HTTPClient._return_permits(permits)
+                        status_code = curl.getinfo(curl.HTTP_CODE)
+                        multi.remove_handle(curl)
+                        if pool is not None:
+                            pool.release(url, curl)
+                        else:
+                            curl.close()
+                        yield index, (status_code, HTTPClient._read_body(buffer, response_headers), response_headers)
+                    for curl, errno, message in failed:
+                        index, url, buffer, response_headers, permits = in_flight.pop(curl)
+                        HTTPClient._return_permits(permits)
+                        multi.remove_handle(curl)
+                        curl.close()  # Don't reuse a handle whose transfer failed part way through
+                        yield index, pycurl.error(errno, message)
+                    if num_queued == 0:
+                        break
+
+                if in_flight:
+                    timeout = multi.timeout()
+                    timeout = min(timeout / 1000, 1.0) if timeout >= 0 else 1.0
+                    if wait > 0:
+                        # Check for a permit again once one might be available
+                        timeout = min(timeout, wait)
+                    multi.select(timeout)
+        finally:
+            HTTPClient._return_permits(taken)
+            for curl, (index, url, buffer, response_headers, permits) in in_flight.items():
+                HTTPClient._return_permits(permits)
+                multi.remove_handle(curl)
+                curl.close()
+            multi.close()
+
+    @staticmethod
+    def _build_url(url: str, parameters: MutableMapping[str, Any] = None, encode_parameters: bool = True) -> str:
         if parameters:
             if encode_parameters:
                 parameters = {k: str(v).lower() if isinstance(v, bool) else v for k, v in parameters.items()}
                 parameters = urlencode(parameters, doseq=True)
             url = "{url}?{params}".format(url=url, params=parameters)
+        return url
 
-        status_code, body, response_headers = HTTPClient._get(url, headers, rate_limiters, connection)
-
+    @staticmethod
+    def _handle_response(status_code: int, body: bytes, response_headers: dict) -> (Union[dict, list, str, bytes], dict):
         content_type = response_headers.get("Content-Type", "application/octet-stream").upper()
 
         # Decode to text if a charset is included
         match = re.search("CHARSET=(\S+)", content_type)
         if match:
             encoding = match.group(1)
-            body = body.decode(encoding)
 
-            # Load JSON if necessary
+            # Load JSON if necessary. UTF-8 is parsed straight from the bytes.
             if "APPLICATION/JSON" in content_type:
-                body = json.loads(body)
+                raw_json = body
+                if encoding.replace("-", "") != "UTF8":
+                    body = body.decode(encoding)
+                    raw_json = None  # Raw JSON is always UTF-8
+                body = json_loads(body)
+                if _keep_raw_json and raw_json is not None and isinstance(body, dict):
+                    body = JSONObject(body, raw_json)
+            else:
+                body = body.decode(encoding)
 
         # Handle errors
         if status_code >= 400:
@@ -136,8 +425,216 @@ class HTTPClient(object):
 
         return body, response_headers
 
+    def get(self, url: str, parameters: MutableMapping[str, Any] = None, headers: Mapping[str, str] = None, rate_limiters: List[RateLimiter] = None, connection: Curl = None, encode_parameters: bool = True) -> (Union[dict, list, str, bytes], dict):
+        url = HTTPClient._build_url(url, parameters, encode_parameters)
+
+        if connection is None and self._pool is not None:
+            pooled = self._pool.acquire(url)
+            try:
+                status_code, body, response_headers = HTTPClient._get(url, headers, rate_limiters, pooled)
+            except BaseException:
+                # Don't reuse a handle whose transfer failed part way through
+                self._pool.release(url, pooled, reuse=False)
+                raise
+            self._pool.release(url, pooled)
+        else:
+            status_code, body, response_headers = HTTPClient._get(url, headers, rate_limiters, connection)
+
+        return HTTPClient._handle_response(status_code, body, response_headers)
+
+    def get_many(self, requests: Iterable[Tuple[str, MutableMapping[str, Any]]], headers: Mapping[str, str] = None, rate_limiters: List[RateLimiter] = None, encode_parameters: bool = True, max_concurrent: int = 10) -> Generator[Tuple[int, Union[Tuple[Union[dict, list, str, bytes], dict], HTTPError, pycurl.error]], None, None]:
+        """Makes a (url, parameters) request for each element of `requests`, keeping up to `max_concurrent` of them in flight at once.
+
+        Yields (index, response) pairs in the order in which the requests finish, where `index` is the position of the
+        request in `requests` and `response` is either the (body, response headers) that `get` would have returned or
+        the HTTPError or pycurl.error that it would have raised. A request that fails doesn't stop the others.
+        """
+        urls = (HTTPClient._build_url(url, parameters, encode_parameters) for url, parameters in requests)
+        for index, response in HTTPClient._get_multi(urls, headers, rate_limiters, max_concurrent, self._pool):
+            if not isinstance(response, pycurl.error):
+                try:
+                    response = HTTPClient._handle_response(*response)
+                except HTTPError as error:
+                    response = error
+            yield index, response
+
     @contextmanager
     def new_session(self) -> Curl:
         session = Curl()
         yield session
         session.close()
+
+
+async def _enter_rate_limiters_async(rate_limiters: List[RateLimiter]) -> Callable:
+    # Enters each rate limiter without blocking the event loop and returns a function that exits them again.
+    # Rate limiters that can wait on the loop provide `acquire_async`; the others block the thread that enters them, so
+    # their waiting is done in the loop's executor.
+    loop = asyncio.get_event_loop()
+    entered = []
+
+    def exit_limiters(exc_type, exc_val, exc_tb):
+        for rate_limiter in reversed(entered):
+            rate_limiter.__exit__(exc_type, exc_val, exc_tb)
+
+    for rate_limiter in rate_limiters or []:
+        if hasattr(rate_limiter, "acquire_async"):
+            try:
+                await rate_limiter.acquire_async()
+            except BaseException:
+                exit_limiters(None, None, None)
+                raise
+            entered.append(rate_limiter)
+            continue
+        future = loop.run_in_executor(None, rate_limiter.__enter__)
+        try:
+            # Shield the permit request so that if we're cancelled, the permit that's eventually granted is still returned
+            await asyncio.shield(future)
+        except asyncio.CancelledError:
+            future.add_done_callback(lambda f, rate_limiter=rate_limiter: f.cancelled() or f.exception() or rate_limiter.__exit__(None, None, None))
+            exit_limiters(None, None, None)
+            raise
+        except BaseException:
+            exit_limiters(None, None, None)
+            raise
+        entered.append(rate_limiter)
+    return exit_limiters
+
+
+class _CurlMultiDriver(object):
+    # Drives a CurlMulti from an asyncio event loop. libcurl tells us which sockets and timeouts to watch through the
+    # socket and timer callbacks, and the loop calls back into libcurl when one of them is ready.
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._multi = CurlMulti()
+        self._multi.setopt(pycurl.M_SOCKETFUNCTION, self._on_socket_change)
+        self._multi.setopt(pycurl.M_TIMERFUNCTION, self._on_timer_change)
+        self._futures = {}  # Curl -> Future of the HTTP status code
+        self._timer = None
+
+    def perform(self, curl: Curl) -> asyncio.Future:
+        future = self._loop.create_future()
+        self._futures[curl] = future
+        future.add_done_callback(lambda f: f.cancelled() and self._remove(curl))
+        self._multi.add_handle(curl)
+        return future
+
+    def _remove(self, curl: Curl) -> None:
+        if self._futures.pop(curl, None) is not None:
+            self._multi.remove_handle(curl)
+
+    def _on_socket_change(self, event: int, fd: int, multi: CurlMulti, data: Any) -> None:
+        if event == pycurl.POLL_REMOVE or event == pycurl.POLL_OUT:
+            self._loop.remove_reader(fd)
+        if event == pycurl.POLL_REMOVE or event == pycurl.POLL_IN:
+            self._loop.remove_writer(fd)
+        if event == pycurl.POLL_IN or event == pycurl.POLL_INOUT:
+            self._loop.add_reader(fd, self._on_socket_ready, fd, pycurl.CSELECT_IN)
+        if event == pycurl.POLL_OUT or event == pycurl.POLL_INOUT:
+            self._loop.add_writer(fd, self._on_socket_ready, fd, pycurl.CSELECT_OUT)
+
+    def _on_timer_change(self, timeout_ms: int) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if timeout_ms >= 0:
+            self._timer = self._loop.call_later(timeout_ms / 1000, self._on_socket_ready, pycurl.SOCKET_TIMEOUT, 0)
+
+    def _on_socket_ready(self, fd: int, event: int) -> None:
+        while True:
+            ret, num_handles = self._multi.socket_action(fd, event)
+            if ret != E_CALL_MULTI_PERFORM:
+                break
+
+        while True:
+            num_queued, succeeded, failed = self._multi.info_read()
+            for curl in succeeded:
+                future = self._futures.pop(curl)
+                self._multi.remove_handle(curl)
+                if not future.done():
+                    future.set_result(curl.getinfo(curl.HTTP_CODE))
+            for curl, errno, message in failed:
+                future = self._futures.pop(curl)
+                self._multi.remove_handle(curl)
+                if not future.done():
+                    future.set_exception(pycurl.error(errno, message))
+            if num_queued == 0:
+                break
+
+
+class AsyncHTTPClient(object):
+    """The asyncio counterpart of HTTPClient. Requests made from one event loop share a single CurlMulti, so any number of
+    them can be in flight at once without tying up a thread each."""
+    def __init__(self, connection_pool_size: int = 10, connection_idle_timeout: float = 60.0, connection_pool: ConnectionPool = None):
+        if connection_pool is not None:
+            self._pool = connection_pool
+        elif connection_pool_size > 0:
+            self._pool = ConnectionPool(max_size=connection_pool_size, idle_timeout=connection_idle_timeout)
+        else:
+            self._pool = None
+        self._drivers = weakref.WeakKeyDictionary()  # event loop -> _CurlMultiDriver
+
+    def _driver(self) -> _CurlMultiDriver:
+        loop = asyncio.get_event_loop()
+        try:
+            return self._drivers[loop]
+        except KeyError:
+            driver = _CurlMultiDriver(loop)
+            self._drivers[loop] = driver
+            return driver
+
+    @property
+    def connection_pool(self) -> Union[ConnectionPool, None]:
+        return self._pool
+
+    async def get(self, url: str, parameters: MutableMapping[str, Any] = None, headers: Mapping[str, str] = None, rate_limiters: List[RateLimiter] = None, encode_parameters: bool = True) -> (Union[dict, list, str, bytes], dict):
+        url = HTTPClient._build_url(url, parameters, encode_parameters)
+
+        exit_limiters = await _enter_rate_limiters_async(rate_limiters)
+
+        curl = self._pool.acquire(url) if self._pool is not None else Curl()
+        buffer, response_headers = HTTPClient._prepare(curl, url, headers)
+
+        driver = self._driver()
+        try:
+            status_code = await driver.perform(curl)
+        except BaseException:
+            driver._remove(curl)
+            exit_limiters(None, None, None)
+            if self._pool is not None:
+                self._pool.release(url, curl, reuse=False)
+            else:
+                curl.close()
+            raise
+        exit_limiters(None, None, None)
+        if self._pool is not None:
+            self._pool.release(url, curl)
+        else:
+            curl.close()
+
+        body = HTTPClient._read_body(buffer, response_headers)
+
+        return HTTPClient._handle_response(status_code, body, response_headers)
+
+
+class BackgroundEventLoop(object):
+    """An event loop running in a daemon thread, so that synchronous code can run coroutines (like the async Riot API
+    requests) and get a concurrent.futures.Future for each of them. Requests that are waiting for a rate limit permit or
+    for a retry's backoff to expire are parked on the loop's timers rather than in a sleeping thread."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+
+    def _ensure_running(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="cassiopeia-event-loop", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def submit(self, coroutine) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_running())
+
+
+background_loop = BackgroundEventLoop()
@@ -13,15 +13,10 @@ from ..dto.staticdata.profileicon import ProfileIconDataDto
 from ..dto.staticdata.language import LanguagesDto, LanguageStringsDto
 from ..dto.staticdata.realm import RealmDto
 from ..dto.staticdata.map import MapDto, MapListDto
-from .common import HTTPClient, HTTPError
+from .common import HTTPClient, HTTPError, json_loads
 from .riotapi.staticdata import _get_latest_version
 from .uniquekeys import _hash_included_data, convert_region_to_platform
 
-try:
-    import ujson as json
-except ImportError:
-    import json
-
 T = TypeVar("T")
 
 
@@ -116,7 +111,7 @@ class DDragon(DataSource):
             locale=locale
         )
         try:
-            body = json.loads(self._client.get(url)[0])
+            body = json_loads(self._client.get(url)[0])
         except HTTPError as e:
             raise NotFoundError(str(e)) from e
 
@@ -190,7 +185,7 @@ class DDragon(DataSource):
     def get_versions(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> VersionListDto:
         url = "https://ddragon.leagueoflegends.com/api/versions.json"
         try:
-            body = json.loads(self._client.get(url)[0])
+            body = json_loads(self._client.get(url)[0])
         except HTTPError as e:
             raise NotFoundError(str(e)) from e
 
@@ -212,7 +207,7 @@ class DDragon(DataSource):
         region = query["platform"].region
         url = "https://ddragon.leagueoflegends.com/realms/{region}.json".format(region=region.value.lower())
         try:
-            body = json.loads(self._client.get(url)[0])
+            body = json_loads(self._client.get(url)[0])
 
         except HTTPError as e:
             raise NotFoundError(str(e)) from e
@@ -232,7 +227,7 @@ class DDragon(DataSource):
     def get_languages(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> LanguagesDto:
         url = "https://ddragon.leagueoflegends.com/cdn/languages.json"
         try:
-            body = json.loads(self._client.get(url)[0])
+            body = json_loads(self._client.get(url)[0])
         except HTTPError as e:
             raise NotFoundError(str(e)) from e
 
@@ -302,7 +297,7 @@ class DDragon(DataSource):
             locale=locale
         )
         try:
-            body = json.loads(self._client.get(url)[0])
+            body = json_loads(self._client.get(url)[0])
         except HTTPError as e:
             raise NotFoundError(str(e)) from e
 
@@ -336,7 +331,7 @@ class DDragon(DataSource):
             locale=locale
         )
         try:
-            body = json.loads(self._client.get(url)[0])
+            body = json_loads(self._client.get(url)[0])
         except HTTPError as e:
             raise NotFoundError(str(e)) from e
 
@@ -416,7 +411,7 @@ class DDragon(DataSource):
             locale=locale
         )
         try:
-            body = json.loads(self._client.get(url)[0])
+            body = json_loads(self._client.get(url)[0])
         except HTTPError as e:
             raise NotFoundError(str(e)) from e
 
@@ -507,7 +502,7 @@ class DDragon(DataSource):
             locale=locale
         )
         try:
-            body = json.loads(self._client.get(url)[0])
+            body = json_loads(self._client.get(url)[0])
         except HTTPError as e:
             raise NotFoundError(str(e)) from e
 
@@ -608,7 +603,7 @@ class DDragon(DataSource):
             locale=locale
         )
         try:
-            body = json.loads(self._client.get(url)[0])
+            body = json_loads(self._client.get(url)[0])
         except HTTPError as e:
             raise NotFoundError(str(e)) from e
 
@@ -651,7 +646,7 @@ class DDragon(DataSource):
             locale=locale
         )
         try:
-            body = json.loads(self._client.get(url)[0])
+            body = json_loads(self._client.get(url)[0])
         except HTTPError as e:
             raise NotFoundError(str(e)) from e
 
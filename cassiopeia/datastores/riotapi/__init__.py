@@ -1,12 +1,19 @@
-from typing import Iterable, Set, Dict
+from typing import Iterable, Set, Dict, Type, Mapping, Any, List, TypeVar
+from concurrent.futures import Future
+from copy import deepcopy
 import os
 
-from datapipelines import CompositeDataSource
-from .common import RiotAPIService, RiotAPIRateLimiter
+from datapipelines import CompositeDataSource, DataSource, PipelineContext, NotFoundError
+from .common import RiotAPIService, RiotAPIRateLimiter, _run_in_executor
+from .circuitbreaker import CircuitBreakers, CircuitState
+from .ratelimits import RequestPriority, RequestScheduler, SharedRateLimitState, PersistentRateLimitState, request_priority, current_request_priority
+from ..common import background_loop
 
+T = TypeVar("T")
 
-def _default_services(api_key: str, limiting_share: float = 1.0, request_by_id: bool = True, request_error_handling: Dict = None) -> Set[RiotAPIService]:
-    from ..common import HTTPClient
+
+def _default_services(api_key: str, limiting_share: float = 1.0, request_by_id: bool = True, request_error_handling: Dict = None, max_concurrent_requests: int = 1, connection_pool_size: int = 10, connection_idle_timeout: float = 60.0, shared_rate_limits: str = None, rate_limit_state: str = None, circuit_breaker: Dict = None) -> Set[RiotAPIService]:
+    from ..common import HTTPClient, AsyncHTTPClient
     from ..image import ImageDataSource
     from .staticdata import StaticDataAPI
     from .champion import ChampionAPI
@@ -18,39 +25,99 @@ def _default_services(api_key: str, limiting_share: float = 1.0, request_by_id:
     from .leagues import LeaguesAPI
     from .thirdpartycode import ThirdPartyCodeAPI
 
-    app_rate_limiter = RiotAPIRateLimiter(limiting_share=limiting_share)
+    shared_state = SharedRateLimitState(shared_rate_limits, api_key=api_key) if shared_rate_limits is not None else None
+    persistent_state = PersistentRateLimitState(rate_limit_state, api_key=api_key) if rate_limit_state is not None else None
+    scheduler = RequestScheduler(shared_state=shared_state, persistent_state=persistent_state)
+    app_rate_limiter = RiotAPIRateLimiter(limiting_share=limiting_share, scheduler=scheduler)
 
-    client = HTTPClient()
+    client = HTTPClient(connection_pool_size=connection_pool_size, connection_idle_timeout=connection_idle_timeout)
+    circuit_breakers = CircuitBreakers(**(circuit_breaker or {}))
+    # The async client takes its connections from the same pool, so both reuse the connections to each host
+    async_client = AsyncHTTPClient(connection_pool=client.connection_pool) if client.connection_pool is not None else AsyncHTTPClient(connection_pool_size=0)
     services = {
         ImageDataSource(client),
-        ChampionAPI(api_key, app_rate_limiter=app_rate_limiter, request_by_id=request_by_id, request_error_handling=request_error_handling, http_client=client),
-        StaticDataAPI(api_key, app_rate_limiter=app_rate_limiter, request_by_id=request_by_id, request_error_handling=request_error_handling, http_client=client),
-        SummonerAPI(api_key, app_rate_limiter=app_rate_limiter, request_by_id=request_by_id, request_error_handling=request_error_handling, http_client=client),
-        ChampionMasteryAPI(api_key, app_rate_limiter=app_rate_limiter, request_by_id=request_by_id, request_error_handling=request_error_handling, http_client=client),
-        MatchAPI(api_key, app_rate_limiter=app_rate_limiter, request_by_id=request_by_id, request_error_handling=request_error_handling, http_client=client),
-        SpectatorAPI(api_key, app_rate_limiter=app_rate_limiter, request_by_id=request_by_id, request_error_handling=request_error_handling, http_client=client),
-        StatusAPI(api_key, app_rate_limiter=app_rate_limiter, request_by_id=request_by_id, request_error_handling=request_error_handling, http_client=client),
-        LeaguesAPI(api_key, app_rate_limiter=app_rate_limiter, request_by_id=request_by_id, request_error_handling=request_error_handling, http_client=client),
-        ThirdPartyCodeAPI(api_key, app_rate_limiter=app_rate_limiter, request_by_id=request_by_id, request_error_handling=request_error_handling, http_client=client)
+        ChampionAPI(api_key, app_rate_limiter=app_rate_limiter, request_by_id=request_by_id, request_error_handling=request_error_handling, http_client=client, max_concurrent_requests=max_concurrent_requests, async_http_client=async_client, circuit_breakers=circuit_breakers),
+        StaticDataAPI(api_key, app_rate_limiter=app_rate_limiter, request_by_id=request_by_id, request_error_handling=request_error_handling, http_client=client, max_concurrent_requests=max_concurrent_requests, async_http_client=async_client, circuit_breakers=circuit_breakers),
+        SummonerAPI(api_key, app_rate_limiter=app_rate_limiter, request_by_id=request_by_id, request_error_handling=request_error_handling, http_client=client, max_concurrent_requests=max_concurrent_requests, async_http_client=async_client, circuit_breakers=circuit_breakers),
+        ChampionMasteryAPI(api_key, app_rate_limiter=app_rate_limiter, request_by_id=request_by_id, request_error_handling=request_error_handling, http_client=client, max_concurrent_requests=max_concurrent_requests, async_http_client=async_client, circuit_breakers=circuit_breakers),
+        MatchAPI(api_key, app_rate_limiter=app_rate_limiter, request_by_id=request_by_id, request_error_handling=request_error_handling, http_client=client, max_concurrent_requests=max_concurrent_requests, async_http_client=async_client, circuit_breakers=circuit_breakers),
+        SpectatorAPI(api_key, app_rate_limiter=app_rate_limiter, request_by_id=request_by_id, request_error_handling=request_error_handling, http_client=client, max_concurrent_requests=max_concurrent_requests, async_http_client=async_client, circuit_breakers=circuit_breakers),
+        StatusAPI(api_key, app_rate_limiter=app_rate_limiter, request_by_id=request_by_id, request_error_handling=request_error_handling, http_client=client, max_concurrent_requests=max_concurrent_requests, async_http_client=async_client, circuit_breakers=circuit_breakers),
+        LeaguesAPI(api_key, app_rate_limiter=app_rate_limiter, request_by_id=request_by_id, request_error_handling=request_error_handling, http_client=client, max_concurrent_requests=max_concurrent_requests, async_http_client=async_client, circuit_breakers=circuit_breakers),
+        ThirdPartyCodeAPI(api_key, app_rate_limiter=app_rate_limiter, request_by_id=request_by_id, request_error_handling=request_error_handling, http_client=client, max_concurrent_requests=max_concurrent_requests, async_http_client=async_client, circuit_breakers=circuit_breakers)
     }
 
     return services
 
 
 class RiotAPI(CompositeDataSource):
-    def __init__(self, api_key: str = None, services: Iterable[RiotAPIService] = None, limiting_share: float = 1.0, request_by_id: bool = True, request_error_handling: Dict = None) -> None:
+    def __init__(self, api_key: str = None, services: Iterable[RiotAPIService] = None, limiting_share: float = 1.0, request_by_id: bool = True, request_error_handling: Dict = None, max_concurrent_requests: int = 1, connection_pool_size: int = 10, connection_idle_timeout: float = 60.0, shared_rate_limits: str = None, rate_limit_state: str = None, circuit_breaker: Dict = None) -> None:
         if api_key is None:
             api_key = "RIOT_API_KEY"  # Use this env variable.
         if not api_key.startswith("RGAPI"):
             api_key = os.environ.get(api_key, None)
 
         if services is None:
-            services = _default_services(api_key=api_key, limiting_share=limiting_share, request_by_id=request_by_id, request_error_handling=request_error_handling)
+            services = _default_services(api_key=api_key, limiting_share=limiting_share, request_by_id=request_by_id, request_error_handling=request_error_handling, max_concurrent_requests=max_concurrent_requests, connection_pool_size=connection_pool_size, connection_idle_timeout=connection_idle_timeout, shared_rate_limits=shared_rate_limits, rate_limit_state=rate_limit_state, circuit_breaker=circuit_breaker)
 
         super().__init__(services)
 
+    def submit(self, type: Type[T], query: Mapping[str, Any], context: PipelineContext = None, priority: RequestPriority = None) -> "Future[T]":
+        # Runs `aget` on a background event loop and returns a future for its result, so the calling thread is free
+        # while the request waits for rate limit permits or for a retry's backoff.
+        if priority is None:
+            priority = current_request_priority()
+        return background_loop.submit(self.aget(type, query, context, priority))
+
+    def submit_many(self, type: Type[T], query: Mapping[str, Any], context: PipelineContext = None, priority: RequestPriority = None) -> "Future[List[T]]":
+        if priority is None:
+            priority = current_request_priority()
+        return background_loop.submit(self.aget_many(type, query, context, priority))
+
+    def circuit_breaker_states(self) -> Dict[str, CircuitState]:
+        # The state of the circuit breaker for each "platform:endpoint" that has been requested, for monitoring
+        states = {}
+        for sources in self._sources.values():
+            for source in sources:
+                if isinstance(source, RiotAPIService):
+                    states.update(source._circuit_breakers.states())
+        return states
+
     def set_api_key(self, key: str):
         for sources in self._sources.values():
             for source in sources:
                 if isinstance(source, RiotAPIService):
                     source._headers["X-Riot-Token"] = key
+
+    async def aget(self, type: Type[T], query: Mapping[str, Any], context: PipelineContext = None, priority: RequestPriority = None) -> T:
+        # The same as `get`, but the sources are run in the event loop's executor, so they don't block the loop
+        if priority is not None:
+            with request_priority(priority):
+                return await self.aget(type, query, context)
+        try:
+            sources = self._sources[type]
+        except KeyError as error:
+            raise DataSource.unsupported(type) from error
+
+        for source in sources:
+            try:
+                return await _run_in_executor(source.get, type, deepcopy(query), context)
+            except NotFoundError:
+                continue
+        raise NotFoundError()
+
+    async def aget_many(self, type: Type[T], query: Mapping[str, Any], context: PipelineContext = None, priority: RequestPriority = None) -> List[T]:
+        if priority is not None:
+            with request_priority(priority):
+                return await self.aget_many(type, query, context)
+        try:
+            sources = self._sources[type]
+        except KeyError as error:
+            raise DataSource.unsupported(type) from error
+
+        for source in sources:
+            try:
+                return await _run_in_executor(lambda *args: list(source.get_many(*args)), type, deepcopy(query), context)
+            except NotFoundError:
+                continue
+        raise NotFoundError()
@@ -0,0 +1,111 @@
+import threading
+from enum import Enum
+from time import monotonic
+from typing import Dict
+
+
+class CircuitState(Enum):
+    closed = "closed"  # Requests are sent as usual
+    open = "open"  # Requests fail immediately
+    half_open = "half_open"  # A few probe requests are sent to check whether the endpoint has recovered
+
+
+class CircuitBreaker(object):
+    """Tracks the health of one endpoint on one platform.
+
+    After `failure_threshold` consecutive server errors or timeouts the circuit opens and requests fail immediately
+    instead of each waiting through its own backoff. Once `recovery_timeout` seconds have passed, up to `probe_requests`
+    requests at a time are let through: if one succeeds the circuit closes again, and if one fails it opens for another
+    `recovery_timeout` seconds.
+    """
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0, probe_requests: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.probe_requests = probe_requests
+        self._lock = threading.Lock()
+        self._state = CircuitState.closed
+        self._failures = 0
+        self._opened_at = None
+        self._probes = 0
+
+    def _update(self, now: float) -> None:
+        # Must be called with the lock held
+        if self._state is CircuitState.open and now - self._opened_at >= self.recovery_timeout:
+            self._state = CircuitState.half_open
+            self._probes = 0
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            self._update(monotonic())
+            return self._state
+
+    @property
+    def retry_after(self) -> float:
+        # How many seconds until the circuit lets a probe request through
+        with self._lock:
+            if self._state is not CircuitState.open:
+                return 0.0
+            return max(0.0, self._opened_at + self.recovery_timeout - monotonic())
+
+    def allow_request(self) -> bool:
+        # Returns whether a request may be sent now. If it returns True, the caller must report the request's outcome
+        # with `record_success` or `record_failure` (or `record_neutral` if the outcome says nothing about the endpoint's health).
+        with self._lock:
+            self._update(monotonic())
+            if self._state is CircuitState.closed:
+                return True
+            if self._state is CircuitState.half_open and self._probes < self.probe_requests:
+                self._probes += 1
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state is not CircuitState.closed:
+                print("INFO: Circuit for {} closed; requests are being sent again.".format(self.name))
+            self._state = CircuitState.closed
+            self._failures = 0
+            self._probes = 0
+
+    def record_neutral(self) -> None:
+        with self._lock:
+            if self._state is CircuitState.half_open:
+                self._probes = max(0, self._probes - 1)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            now = monotonic()
+            self._update(now)
+            self._failures += 1
+            if self._state is CircuitState.half_open or (self._state is CircuitState.closed and self._failures >= self.failure_threshold):
+                print("INFO: Circuit for {} opened after {} consecutive failures; failing fast for {} seconds.".format(self.name, self._failures, self.recovery_timeout))
+                self._state = CircuitState.open
+                self._opened_at = now
+                self._probes = 0
+
+
+class CircuitBreakers(object):
+    """The circuit breakers for every (platform, endpoint), created as they're needed."""
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0, probe_requests: int = 1, enabled: bool = True):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.probe_requests = probe_requests
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._breakers = {}  # type: Dict[str, CircuitBreaker]
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            try:
+                return self._breakers[name]
+            except KeyError:
+                breaker = CircuitBreaker(name, failure_threshold=self.failure_threshold, recovery_timeout=self.recovery_timeout, probe_requests=self.probe_requests)
+                self._breakers[name] = breaker
+                return breaker
+
+    def states(self) -> Dict[str, CircuitState]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.state for breaker in breakers}
@@ -1,14 +1,19 @@
-import time
 import copy
+import random
+import asyncio
 import functools
 import collections
 from abc import abstractmethod, ABC
-from typing import MutableMapping, Any, Union, TypeVar, Iterable, Type, List, Tuple, Dict, Callable
+from concurrent.futures import Future
+from typing import MutableMapping, Any, Union, TypeVar, Iterable, Type, List, Tuple, Dict, Callable, Generator
 
+import pycurl
 from datapipelines import DataSource, PipelineContext
-from merakicommons.ratelimits import FixedWindowRateLimiter, MultiRateLimiter
+from merakicommons.ratelimits import RateLimiter
 
-from ..common import HTTPClient, HTTPError, Curl
+from ..common import HTTPClient, AsyncHTTPClient, HTTPError, Curl, background_loop
+from .ratelimits import RiotAPIRateLimiter, RequestPriority, request_priority, current_request_priority, copy_context
+from .circuitbreaker import CircuitBreaker, CircuitBreakers, CircuitState
 from ...data import Platform
 
 
@@ -24,6 +29,10 @@ class APINotFoundError(HTTPError):
     pass
 
 
+class APICircuitOpenError(APIError):
+    pass
+
+
 class APIForbiddenError(APINotFoundError):
     pass
 
@@ -44,41 +53,11 @@ _ERROR_CODES = {
 T = TypeVar("T")
 
 
-
-class RiotAPIRateLimiter(MultiRateLimiter):
-    # The application limiter and method limiters will each be an instance of this.
-
-    def __init__(self, limiting_share):
-        self.limiting_share = limiting_share
-        super().__init__()  # Initialize with no underlying limiters
-        self._limiters = []  # Make it a list rather than a tuple so we can append
-
-    def restrict_for(self, seconds: int) -> None:
-        for limiter in self._limiters:
-            limiter.restrict_for(seconds)
-
-    def _construct_limiters(self, limits: List[List[int]]):
-        # Creates the necessary FixedWindowRateLimiters from the rates in the headers
-        assert len(self._limiters) == 0
-        # Create the rate limiters
-        for permits, window in limits:
-            self._limiters.append(
-                FixedWindowRateLimiter(window_seconds=window, window_permits=permits)
-            )
-
-    def adjust_rate_limits_if_necessary(self, limits: List[List[int]]) -> None:
-        if len(self._limiters) == 0:
-            self._construct_limiters(limits)
-        for permits, window in limits:
-            permits = permits * self.limiting_share
-            for_window = self._get_specific_limiter_for_window(window)
-            if permits != for_window._window_permits:
-                for_window.set_permits(permits)
-
-    def _get_specific_limiter_for_window(self, window: int) -> FixedWindowRateLimiter:
-        for limiter in self._limiters:
-            if limiter._window_seconds == window:
-                return limiter
+async def _run_in_executor(function, *args):
+    # The endpoints (and the sources other than the Riot API services) are synchronous, so they're run in the loop's
+    # executor rather than blocking the event loop. The request priority and other context variables go with them.
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, functools.partial(copy_context().run, function, *args))
 
 
 def _split_rate_limit_header(header):
@@ -92,15 +71,28 @@ def _split_rate_limit_header(header):
 
 
 class RiotAPIService(DataSource):
-    def __init__(self, api_key: str, app_rate_limiter: RiotAPIRateLimiter, request_by_id: bool = True, request_error_handling: Dict = None, http_client: HTTPClient = None):
+    def __init__(self, api_key: str, app_rate_limiter: RiotAPIRateLimiter, request_by_id: bool = True, request_error_handling: Dict = None, http_client: HTTPClient = None, max_concurrent_requests: int = 1, async_http_client: AsyncHTTPClient = None, circuit_breakers: CircuitBreakers = None):
         self._limiting_share = app_rate_limiter.limiting_share
         self._request_by_id = request_by_id
+        self._max_concurrent_requests = max_concurrent_requests
 
         if http_client is None:
             self._client = HTTPClient()
         else:
             self._client = http_client
 
+        if async_http_client is None:
+            # Share the connections to each host with the synchronous client
+            pool = self._client.connection_pool
+            self._async_client = AsyncHTTPClient(connection_pool=pool) if pool is not None else AsyncHTTPClient(connection_pool_size=0)
+        else:
+            self._async_client = async_http_client
+
+        if circuit_breakers is None:
+            self._circuit_breakers = CircuitBreakers()
+        else:
+            self._circuit_breakers = circuit_breakers
+
         self._headers = {
             "X-Riot-Token": api_key
         }
@@ -191,19 +183,57 @@ class RiotAPIService(DataSource):
         try:
             limiter = self._rate_limiters[(platform, endpoint)]
         except KeyError:
-            limiter = RiotAPIRateLimiter(self._limiting_share)
+            limiter = RiotAPIRateLimiter(self._limiting_share, scheduler=self._rate_limiters["application"].scheduler, name="{platform}:{endpoint}".format(platform=getattr(platform, "value", platform), endpoint=endpoint))
             self._rate_limiters[(platform, endpoint)] = limiter
         return limiter
 
+    def _get_circuit_breaker(self, rate_limiter: RiotAPIRateLimiter) -> Union[CircuitBreaker, None]:
+        # There is one circuit breaker for each (platform, endpoint), just like the method rate limiters
+        if rate_limiter is None or not self._circuit_breakers.enabled:
+            return None
+        return self._circuit_breakers.get(rate_limiter.name)
+
+    def _request_rate_limiters(self, rate_limiter: RiotAPIRateLimiter, priority: RequestPriority = None) -> List[RateLimiter]:
+        # The application and method permits are granted together by the scheduler, so a request never holds an
+        # application permit while it waits for a method permit.
+        application = self._rate_limiters["application"]
+        return [application.scheduler.permit(application, rate_limiter, priority=priority)]
+
     def _adjust_rate_limiters_from_headers(self, rate_limiter, response_headers):
         # If Riot changes the # of permits allowed in their response headers, change our rate limiters.
-        # We are currently ignoring the X-*-Rate-Limit-Count headers and assuming our rate limiter logic agrees.
+        # Then, if Riot has counted more requests in the current windows than we have, catch our rate limiters up.
         if "X-App-Rate-Limit" in response_headers:
             limits = _split_rate_limit_header(response_headers["X-App-Rate-Limit"])
             self._rate_limiters["application"].adjust_rate_limits_if_necessary(limits)
         if "X-Method-Rate-Limit" in response_headers:
             limits = _split_rate_limit_header(response_headers["X-Method-Rate-Limit"])
             rate_limiter.adjust_rate_limits_if_necessary(limits)
+        if "X-App-Rate-Limit-Count" in response_headers:
+            counts = _split_rate_limit_header(response_headers["X-App-Rate-Limit-Count"])
+            self._rate_limiters["application"].reconcile_counts(counts)
+        if "X-Method-Rate-Limit-Count" in response_headers:
+            counts = _split_rate_limit_header(response_headers["X-Method-Rate-Limit-Count"])
+            rate_limiter.reconcile_counts(counts)
+
+    @staticmethod
+    def _convert_error(error: HTTPError) -> Exception:
+        # The error handlers didn't work, so create an appropriate error to raise.
+        if isinstance(error, APICircuitOpenError):
+            return error
+        new_error_type = _ERROR_CODES[error.code]
+        if new_error_type is RuntimeError:
+            new_error = RuntimeError("Encountered an HTTP error code {code} with message \"{message}\" which should have already been handled. Report this to the Cassiopeia team.".format(code=error.code, message=str(error)))
+        elif new_error_type is APIError:
+            new_error = APIError("The Riot API experienced an internal error on the request. You may want to retry the request after a short wait or continue without the result. The received error was {code}: \"{message}\"".format(code=error.code, message=str(error)), error.code)
+        elif new_error_type is APINotFoundError:
+            new_error = APINotFoundError("The Riot API returned a NOT FOUND error for the request. The received error was {code}: \"{message}\"".format(code=error.code, message=str(error)), error.code)
+        elif new_error_type is APIRequestError:
+            new_error = APIRequestError("The Riot API returned an error on the request. The received error was {code}: \"{message}\"".format(code=error.code, message=str(error)), error.code)
+        elif new_error_type is APIForbiddenError:
+            new_error = APIForbiddenError("The Riot API returned a FORBIDDEN error for the request. The received error was {code}: \"{message}\"".format(code=error.code, message=str(error)), error.code)
+        else:
+            new_error = new_error_type(str(error))
+        return new_error
 
     def _get(self, url: str, parameters: MutableMapping[str, Any] = None, rate_limiter: RiotAPIRateLimiter = None, connection: Curl = None) -> Union[dict, list, Any]:
         # Make a new RiotAPIRequest and run it until it returns or fails.
@@ -213,22 +243,86 @@ class RiotAPIService(DataSource):
         try:
             return request()
         except HTTPError as error:
-            # The error handlers didn't work, so raise an appropriate error.
-            new_error_type = _ERROR_CODES[error.code]
-            if new_error_type is RuntimeError:
-                new_error = RuntimeError("Encountered an HTTP error code {code} with message \"{message}\" which should have already been handled. Report this to the Cassiopeia team.".format(code=error.code, message=str(error)))
-            elif new_error_type is APIError:
-                new_error = APIError("The Riot API experienced an internal error on the request. You may want to retry the request after a short wait or continue without the result. The received error was {code}: \"{message}\"".format(code=error.code, message=str(error)), error.code)
-            elif new_error_type is APINotFoundError:
-                new_error = APINotFoundError("The Riot API returned a NOT FOUND error for the request. The received error was {code}: \"{message}\"".format(code=error.code, message=str(error)), error.code)
-            elif new_error_type is APIRequestError:
-                new_error = APIRequestError("The Riot API returned an error on the request. The received error was {code}: \"{message}\"".format(code=error.code, message=str(error)), error.code)
-            elif new_error_type is APIForbiddenError:
-                new_error = APIForbiddenError("The Riot API returned a FORBIDDEN error for the request. The received error was {code}: \"{message}\"".format(code=error.code, message=str(error)), error.code)
-            else:
-                new_error = new_error_type(str(error))
-
-            raise new_error from error
+            raise self._convert_error(error) from error
+
+    def _get_many(self, requests: Iterable[Tuple[str, MutableMapping[str, Any]]], rate_limiter: RiotAPIRateLimiter = None) -> Generator[Union[dict, list, Any], None, None]:
+        # Runs a RiotAPIRequest for each (url, parameters) pair and yields the results in the same order as `requests`.
+        # If `max_concurrent_requests` allows it, the requests are sent as one concurrent batch rather than one at a time.
+        # Failed requests are retried by the error handlers just like in `_get`; if they still fail, the appropriate error is
+        # raised when its position in `requests` is reached.
+        circuit_breaker = self._get_circuit_breaker(rate_limiter)
+        if self._max_concurrent_requests <= 1 or (circuit_breaker is not None and circuit_breaker.state is not CircuitState.closed):
+            # If the endpoint isn't healthy, let each request check the circuit breaker instead of sending a whole batch
+            for url, parameters in requests:
+                yield self._get(url, parameters, rate_limiter)
+            return
+
+        requests = list(requests)
+        responses = self._client.get_many(requests=requests,
+                                          headers=self._headers,
+                                          rate_limiters=self._request_rate_limiters(rate_limiter),
+                                          max_concurrent=self._max_concurrent_requests)
+        finished = {}
+
+        def record(index, response):
+            url, parameters = requests[index]
+            request = RiotAPIRequest(service=self, url=url, parameters=parameters, rate_limiter=rate_limiter, connection=None)
+            # Each response counts towards the circuit breaker as soon as it arrives rather than when it's handled, which
+            # it never is if an earlier request fails
+            request.record_response(response)
+            if isinstance(response, HTTPError) and request.retries(response):
+                # The retry is parked straight away, so the rest of the batch carries on while it waits for its backoff
+                response = request.retry(response)
+            finished[index] = (request, response)
+
+        next_index = 0
+        try:
+            for index, response in responses:
+                record(index, response)
+                while next_index in finished:
+                    request, response = finished[next_index]
+                    if isinstance(response, Future) and not response.done():
+                        # Waiting for the retry here would leave the transfers of the suspended batch stalled while they
+                        # hold rate limit permits, so the rest of the batch is finished first
+                        for index, response in responses:
+                            record(index, response)
+                    request, response = finished.pop(next_index)
+                    try:
+                        body = request.handle_response(response)
+                    except HTTPError as error:
+                        raise self._convert_error(error) from error
+                    next_index += 1
+                    yield body
+        finally:
+            # Don't send the retries that nobody is going to get the results of
+            for request, response in finished.values():
+                if isinstance(response, Future):
+                    response.cancel()
+
+    async def aget(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None, priority: RequestPriority = None) -> T:
+        # The endpoints are synchronous, so `get` is run in the event loop's executor
+        if priority is not None:
+            with request_priority(priority):
+                return await self.aget(type, query, context)
+        return await _run_in_executor(self.get, type, query, context)
+
+    async def aget_many(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None, priority: RequestPriority = None) -> List[T]:
+        if priority is not None:
+            with request_priority(priority):
+                return await self.aget_many(type, query, context)
+        return await _run_in_executor(lambda *args: list(self.get_many(*args)), type, query, context)
+
+    def submit(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None, priority: RequestPriority = None) -> "Future[T]":
+        # Runs `aget` on the background event loop and returns a future for its result, so the calling thread is free
+        # while the request is made.
+        if priority is None:
+            priority = current_request_priority()
+        return background_loop.submit(self.aget(type, query, context, priority))
+
+    def submit_many(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None, priority: RequestPriority = None) -> "Future[List[T]]":
+        if priority is None:
+            priority = current_request_priority()
+        return background_loop.submit(self.aget_many(type, query, context, priority))
 
     @abstractmethod
     def get(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> T:
@@ -239,7 +333,6 @@ class RiotAPIService(DataSource):
         pass
 
 
-
 class RiotAPIRequest(object):
     def __init__(self, service: RiotAPIService, url: str, parameters: MutableMapping[str, Any], rate_limiter: RiotAPIRateLimiter, connection: Curl):
         self.service = service
@@ -247,22 +340,95 @@ class RiotAPIRequest(object):
         self.parameters = parameters
         self.rate_limiter = rate_limiter
         self.connection = connection
+        self.circuit_breaker = service._get_circuit_breaker(rate_limiter)
+        # Retries are sent from the background event loop, so they're given the priority of the thread that made the request
+        self.priority = current_request_priority()
+
+    def _check_circuit(self, allow: bool = True) -> None:
+        # Fails fast if the circuit for this endpoint is open. If `allow` is True, the request is going to be sent and
+        # (if the circuit is half open) uses up one of the probes.
+        if self.circuit_breaker is None:
+            return
+        if allow:
+            allowed = self.circuit_breaker.allow_request()
+        else:
+            allowed = self.circuit_breaker.state is not CircuitState.open
+        if not allowed:
+            raise APICircuitOpenError("The Riot API has been failing for {name}, so the request was not sent. Requests will be tried again in {seconds:.0f} seconds.".format(name=self.circuit_breaker.name, seconds=self.circuit_breaker.retry_after), 503)
+
+    def _record_outcome(self, error: BaseException = None) -> None:
+        if self.circuit_breaker is None:
+            return
+        if error is None or (isinstance(error, HTTPError) and error.code < 500):
+            # Any response other than a server error means the endpoint is up
+            self.circuit_breaker.record_success()
+        elif isinstance(error, (HTTPError, pycurl.error)):
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_neutral()
+
+    def _send(self, requester: Callable, *args) -> Tuple[Union[dict, list, str, bytes], dict]:
+        self._check_circuit()
+        try:
+            response = requester(*args)
+        except BaseException as error:
+            self._record_outcome(error)
+            raise
+        self._record_outcome()
+        return response
+
+    async def _send_async(self, requester: Callable, *args) -> Tuple[Union[dict, list, str, bytes], dict]:
+        self._check_circuit()
+        try:
+            response = await requester(*args)
+        except BaseException as error:
+            self._record_outcome(error)
+            raise
+        self._record_outcome()
+        return response
+
+    def record_response(self, response: Union[Tuple[Union[dict, list, str, bytes], dict], HTTPError, pycurl.error]) -> None:
+        # Reports the outcome of a response that was made outside of this request (e.g. as part of a batch by
+        # `RiotAPIService._get_many`) to the circuit breaker
+        self._record_outcome(response if isinstance(response, BaseException) else None)
+
+    def retries(self, error: HTTPError) -> bool:
+        # Whether handling `error` retries the request rather than raising it
+        if isinstance(error, APICircuitOpenError):
+            return False
+        try:
+            return not self._get_handler(error, []).stop
+        except (KeyError, ValueError):
+            # There's no handler for the error, so handling it fails straight away
+            return False
+
+    def handle_response(self, response: Union[Tuple[Union[dict, list, str, bytes], dict], HTTPError, pycurl.error, "Future"]):
+        # Handles a response that was made outside of this request, after `record_response` has been called with it, or
+        # the future of the retry that was parked for it
+        if isinstance(response, Future):
+            return response.result()
+        if isinstance(response, pycurl.error):
+            raise response
+        if isinstance(response, HTTPError):
+            return self._retry_request_by_handling_error(response)
+        body, response_headers = response
+        self.service._adjust_rate_limiters_from_headers(self.rate_limiter, response_headers)
+        return body
 
     def __call__(self):
         try:
-            body, response_headers = self.service._client.get(url=self.url,
-                                                      parameters=self.parameters,
-                                                      headers=self.service._headers,
-                                                      rate_limiters=[self.service._rate_limiters["application"], self.rate_limiter],
-                                                      connection=self.connection)
+            body, response_headers = self._send(self.service._client.get,
+                                                self.url,
+                                                self.parameters,
+                                                self.service._headers,
+                                                self.service._request_rate_limiters(self.rate_limiter, self.priority),
+                                                self.connection)
             self.service._adjust_rate_limiters_from_headers(self.rate_limiter, response_headers)
             return body
         except HTTPError as error:
             return self._retry_request_by_handling_error(error)
 
-    def _retry_request_by_handling_error(self, error: HTTPError, handlers=None):
-            if handlers is None:
-                handlers = []
+    def _get_handler(self, error: HTTPError, handlers: List["FailedRequestHandler"]) -> "FailedRequestHandler":
             # Try to properly handling the 429 and retry the call after the appropriate time limit.
             if error.code == 429:
                 # Identify which rate limit was hit (application, method, or service)
@@ -287,74 +453,108 @@ class RiotAPIRequest(object):
                 if isinstance(new_handler, handler.__class__):
                     new_handler = handler
                     break
+            return new_handler
 
-            if new_handler.stop:
-                raise error
-            else:
-                try:
-                    body, response_headers = new_handler(error=error,
-                                                     requester=self.service._client.get,
-                                                     url=self.url,
-                                                     parameters=self.parameters,
-                                                     headers=self.service._headers,
-                                                     rate_limiters=[self.service._rate_limiters["application"], self.rate_limiter],
-                                                     connection=self.connection
-                                                     )
-                    self.service._adjust_rate_limiters_from_headers(self.rate_limiter, response_headers)
-                    return body
-                except HTTPError as error:
-                    if new_handler not in handlers:
-                        handlers.append(new_handler)
-                    return self._retry_request_by_handling_error(error, handlers=handlers)
+    def retry(self, error: HTTPError) -> "Future":
+        # Parks the retry of the failed request on the background event loop and returns a future for its result. The
+        # backoff is waited through on the loop's timers (or, for a rate limit, on the scheduler) rather than by a
+        # sleeping thread, and the request is sent again from the loop.
+        return background_loop.submit(self._retry_request_by_handling_error_async(error))
+
+    def _retry_request_by_handling_error(self, error: HTTPError):
+        if not self.retries(error):
+            raise error
+        return self.retry(error).result()
+
+    async def _retry_request_by_handling_error_async(self, error: HTTPError, handlers=None):
+        if isinstance(error, APICircuitOpenError):
+            raise error
+        if handlers is None:
+            handlers = []
+        new_handler = self._get_handler(error, handlers)
+
+        if new_handler.stop:
+            raise error
+        else:
+            try:
+                self._check_circuit(allow=False)
+                body, response_headers = await new_handler.call_async(error=error,
+                                                                      requester=functools.partial(self._send_async, self.service._async_client.get),
+                                                                      url=self.url,
+                                                                      parameters=self.parameters,
+                                                                      headers=self.service._headers,
+                                                                      rate_limiters=self.service._request_rate_limiters(self.rate_limiter, self.priority))
+                self.service._adjust_rate_limiters_from_headers(self.rate_limiter, response_headers)
+                return body
+            except HTTPError as error:
+                if new_handler not in handlers:
+                    handlers.append(new_handler)
+                return await self._retry_request_by_handling_error_async(error, handlers=handlers)
 
 
 class FailedRequestHandler(ABC):
+    # Handlers are run on the background event loop, so they wait without blocking a thread
     @abstractmethod
-    def __call__(self, error, requester, url, parameters, headers, rate_limiters, connection) -> Tuple[Union[dict, list, str, bytes], dict]:
+    async def call_async(self, error, requester, url, parameters, headers, rate_limiters) -> Tuple[Union[dict, list, str, bytes], dict]:
         pass
 
 
+def _add_jitter(backoff: float, jitter: float) -> float:
+    # Spreads out retries that failed at the same time (up to `jitter` * `backoff` later) so they don't all retry at once
+    return backoff * (1.0 + random.uniform(0.0, jitter))
+
+
 class ExponentialBackoff(FailedRequestHandler):
-    def __init__(self, initial_backoff: int, backoff_factor: int, max_attempts: int):
+    def __init__(self, initial_backoff: int, backoff_factor: int, max_attempts: int, jitter: float = 0.1):
         self.backoff = initial_backoff
         self.factor = backoff_factor
         self.max_attempts = max_attempts
+        self.jitter = jitter
         self.attempts = 0
         self.stop = False
 
-    def __call__(self, error, requester, url, parameters, headers, rate_limiters, connection) ->  Tuple[Union[dict, list, str, bytes], dict]:
+    def _next_backoff(self, error, headers) -> float:
         if self.attempts >= self.max_attempts:
             self.stop = True
             raise error
         print("INFO: Unexpected {} error ({}), backing off for {} seconds.".format(headers.get('X-Rate-Limit-Type', 'service'), error.code, self.backoff))
-        time.sleep(self.backoff)
+        backoff = _add_jitter(self.backoff, self.jitter)
         self.backoff = self.backoff * self.factor
         self.attempts += 1
-        return requester(url, parameters, headers, rate_limiters, connection)
+        return backoff
+
+    async def call_async(self, error, requester, url, parameters, headers, rate_limiters) -> Tuple[Union[dict, list, str, bytes], dict]:
+        await asyncio.sleep(self._next_backoff(error, headers))
+        return await requester(url, parameters, headers, rate_limiters)
 
 
 class RetryFromHeaders(object):
-    def __init__(self, max_attempts: int):
+    def __init__(self, max_attempts: int, jitter: float = 0.1):
         self.max_attempts = int(max_attempts)
+        self.jitter = jitter
         self.attempts = 0
         self.stop = False
 
-    def __call__(self, error, requester, url, parameters, headers, rate_limiters, connection) -> Tuple[Union[dict, list, str, bytes], dict]:
+    def _next_backoff(self, error, headers) -> int:
         if self.attempts >= self.max_attempts:
             self.stop = True
             raise error
         backoff = int(error.response_headers["Retry-After"])
         print("INFO: Unexpected {} rate limit, backing off for {} seconds (from headers).".format(headers.get('X-Rate-Limit-Type', 'service'), backoff))
-        time.sleep(backoff)
+        self.attempts += 1
+        return _add_jitter(backoff, self.jitter)
+
+    async def call_async(self, error, requester, url, parameters, headers, rate_limiters) -> Tuple[Union[dict, list, str, bytes], dict]:
+        backoff = self._next_backoff(error, headers)
+        # The retry is parked on the scheduler, which sends it once the restriction is over
         for rate_limiter in rate_limiters:
             rate_limiter.restrict_for(backoff)
-        self.attempts += 1
-        return requester(url, parameters, headers, rate_limiters, connection)
+        return await requester(url, parameters, headers, rate_limiters)
 
 
 class ThrowException(FailedRequestHandler):
     def __init__(self):
         self.stop  = True
 
-    def __call__(self, error, requester, url, parameters, headers, rate_limiters, connection) -> Tuple[Union[dict, list, str, bytes], dict]:
+    async def call_async(self, error, requester, url, parameters, headers, rate_limiters) -> Tuple[Union[dict, list, str, bytes], dict]:
         raise error
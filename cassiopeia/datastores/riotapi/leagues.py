@@ -48,10 +48,12 @@ class LeaguesAPI(RiotAPIService):
     @validate_query(_validate_get_many_league_positions_query, convert_region_to_platform)
     def get_leagues(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> Generator[LeaguePositionsDto, None, None]:
         def generator():
-            for id in query["summoner.ids"]:
-                url = "https://{platform}.api.riotgames.com/lol/league/v3/positions/by-summoner/{summonerId}".format(platform=query["platform"].value.lower(), summonerId=id)
+            ids = list(query["summoner.ids"])
+            requests = [("https://{platform}.api.riotgames.com/lol/league/v3/positions/by-summoner/{summonerId}".format(platform=query["platform"].value.lower(), summonerId=id), {}) for id in ids]
+            responses = self._get_many(requests, self._get_rate_limiter(query["platform"], "positions/by-summoner/summonerId {}".format(query["platform"].value)))
+            for id in ids:
                 try:
-                    data = self._get(url, {}, self._get_rate_limiter(query["platform"], "positions/by-summoner/summonerId {}".format(query["platform"].value)))
+                    data = next(responses)
                 except APINotFoundError as error:
                     raise NotFoundError(str(error)) from error
 
@@ -93,10 +95,12 @@ class LeaguesAPI(RiotAPIService):
     @validate_query(_validate_get_many_leagues_by_summoner_query, convert_region_to_platform)
     def get_many_leagues_list(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> Generator[LeaguesListDto, None, None]:
         def generator():
-            for id in query["summoner.ids"]:
-                url = "https://{platform}.api.riotgames.com/lol/league/v3/leagues/by-summoner/{summonerId}".format(platform=query["platform"].value.lower(), summonerId=id)
+            ids = list(query["summoner.ids"])
+            requests = [("https://{platform}.api.riotgames.com/lol/league/v3/leagues/by-summoner/{summonerId}".format(platform=query["platform"].value.lower(), summonerId=id), {}) for id in ids]
+            responses = self._get_many(requests, self._get_rate_limiter(query["platform"], "leagues/by-summoner/summonerId {}".format(query["platform"].value)))
+            for id in ids:
                 try:
-                    data = self._get(url, {}, self._get_rate_limiter(query["platform"], "leagues/by-summoner/summonerId {}".format(query["platform"].value)))
+                    data = next(responses)
                 except APINotFoundError as error:
                     raise NotFoundError(str(error)) from error
 
@@ -116,10 +120,12 @@ class LeaguesAPI(RiotAPIService):
     @validate_query(_validate_get_many_leagues_query, convert_region_to_platform)
     def get_many_leagues_list(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> Generator[LeagueListDto, None, None]:
         def generator():
-            for id in query["ids"]:
-                url = "https://{platform}.api.riotgames.com/lol/league/v3/leagues/{leagueId}".format(platform=query["platform"].value.lower(), leagueId=id)
+            ids = list(query["ids"])
+            requests = [("https://{platform}.api.riotgames.com/lol/league/v3/leagues/{leagueId}".format(platform=query["platform"].value.lower(), leagueId=id), {}) for id in ids]
+            responses = self._get_many(requests, self._get_rate_limiter(query["platform"], "leagues/leagueId {}".format(query["platform"].value)))
+            for id in ids:
                 try:
-                    data = self._get(url, {}, self._get_rate_limiter(query["platform"], "leagues/leagueId {}".format(query["platform"].value)))
+                    data = next(responses)
                 except APINotFoundError as error:
                     raise NotFoundError(str(error)) from error
 
@@ -161,10 +167,12 @@ class LeaguesAPI(RiotAPIService):
     @validate_query(_validate_get_many_challenger_league_query, convert_region_to_platform)
     def get_challenger_leagues_list(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> Generator[ChallengerLeagueListDto, None, None]:
         def generator():
-            for queue in query["queues"]:
-                url = "https://{platform}.api.riotgames.com/lol/league/v3/challengerleagues/by-queue/{queueName}".format(platform=query["platform"].value.lower(), queueName=queue.value)
+            queues = list(query["queues"])
+            requests = [("https://{platform}.api.riotgames.com/lol/league/v3/challengerleagues/by-queue/{queueName}".format(platform=query["platform"].value.lower(), queueName=queue.value), {}) for queue in queues]
+            responses = self._get_many(requests, self._get_rate_limiter(query["platform"], "challengerleagues/by-queue {}".format(query["platform"].value)))
+            for queue in queues:
                 try:
-                    data = self._get(url, {}, self._get_rate_limiter(query["platform"], "challengerleagues/by-queue {}".format(query["platform"].value)))
+                    data = next(responses)
                 except APINotFoundError as error:
                     raise NotFoundError(str(error)) from error
 
@@ -205,10 +213,12 @@ class LeaguesAPI(RiotAPIService):
     @validate_query(_validate_get_many_master_league_query, convert_region_to_platform)
     def get_master_leagues_list(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> Generator[MasterLeagueListDto, None, None]:
         def generator():
-            for queue in query["queues"]:
-                url = "https://{platform}.api.riotgames.com/lol/league/v3/masterleagues/by-queue/{queueName}".format(platform=query["platform"].value.lower(), queueName=queue.value)
+            queues = list(query["queues"])
+            requests = [("https://{platform}.api.riotgames.com/lol/league/v3/masterleagues/by-queue/{queueName}".format(platform=query["platform"].value.lower(), queueName=queue.value), {}) for queue in queues]
+            responses = self._get_many(requests, self._get_rate_limiter(query["platform"], "masterleagues/by-queue {}".format(query["platform"].value)))
+            for queue in queues:
                 try:
-                    data = self._get(url, {}, self._get_rate_limiter(query["platform"], "masterleagues/by-queue {}".format(query["platform"].value)))
+                    data = next(responses)
                 except APINotFoundError as error:
                     raise NotFoundError(str(error)) from error
 
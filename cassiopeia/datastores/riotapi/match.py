@@ -18,6 +18,24 @@ def _get_current_time(query: MutableMapping[str, Any], context: PipelineContext
     return int(time()) * 1000
 
 
+def _mark_bots(match: MutableMapping[str, Any]) -> bool:
+    # Returns whether any participant was marked as a bot
+    changed = False
+    for p in match["participantIdentities"]:
+        aid = p.get("player", {}).get("currentAccountId", None)
+        if aid == 0:
+            p["player"]["bot"] = True
+            changed = True
+    return changed
+
+
+def _drop_raw_json(data: MutableMapping[str, Any]) -> None:
+    # The response's JSON no longer matches its data, so it mustn't be stored in its place (e.g. by the MatchArchive).
+    # The game id and region don't count, since data stores add those back themselves.
+    if getattr(data, "raw_json", None) is not None:
+        data.raw_json = None
+
+
 class MatchAPI(RiotAPIService):
     @DataSource.dispatch
     def get(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> T:
@@ -42,10 +60,8 @@ class MatchAPI(RiotAPIService):
 
         data["gameId"] = query["id"]
         data["region"] = query["platform"].region.value
-        for p in data["participantIdentities"]:
-            aid = p.get("player", {}).get("currentAccountId", None)
-            if aid == 0:
-                p["player"]["bot"] = True
+        if _mark_bots(data):
+            _drop_raw_json(data)
         return MatchDto(data)
 
     _validate_get_many_match_query = Query. \
@@ -56,19 +72,22 @@ class MatchAPI(RiotAPIService):
     @validate_query(_validate_get_many_match_query, convert_region_to_platform)
     def get_many_match(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> Generator[MatchDto, None, None]:
         def generator():
-            for id in query["ids"]:
-                url = "https://{platform}.api.riotgames.com/lol/match/v3/matches/{id}".format(platform=query["platform"].value.lower(), id=id)
+            ids = list(query["ids"])
+            requests = [("https://{platform}.api.riotgames.com/lol/match/v3/matches/{id}".format(platform=query["platform"].value.lower(), id=id), {}) for id in ids]
+            responses = self._get_many(requests, self._get_rate_limiter(query["platform"], "matches/id"))
+            for id in ids:
                 try:
-                    data = self._get(url, {}, self._get_rate_limiter(query["platform"], "matches/id"))
+                    data = next(responses)
                 except APINotFoundError as error:
                     raise NotFoundError(str(error)) from error
-                
+
+                changed = False
                 for participant in data["participants"]:
-                    participant.setdefault("runes", [])
-                for p in data["participantIdentities"]:
-                    aid = p.get("player", {}).get("currentAccountId", None)
-                    if aid == 0:
-                        p["player"]["bot"] = True
+                    if "runes" not in participant:
+                        participant["runes"] = []
+                        changed = True
+                if _mark_bots(data) or changed:
+                    _drop_raw_json(data)
 
                 data["gameId"] = id
                 data["region"] = query["platform"].region.value
@@ -269,10 +288,12 @@ class MatchAPI(RiotAPIService):
     @validate_query(_validate_get_many_timeline_query, convert_region_to_platform)
     def get_many_match_timeline(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> Generator[TimelineDto, None, None]:
         def generator():
-            for id in query["ids"]:
-                url = "https://{platform}.api.riotgames.com/lol/match/v3/timelines/by-match/{id}".format(platform=query["platform"].value.lower(), id=id)
+            ids = list(query["ids"])
+            requests = [("https://{platform}.api.riotgames.com/lol/match/v3/timelines/by-match/{id}".format(platform=query["platform"].value.lower(), id=id), {}) for id in ids]
+            responses = self._get_many(requests, self._get_rate_limiter(query["platform"], "timelines/by-match/id"))
+            for id in ids:
                 try:
-                    data = self._get(url, {}, self._get_rate_limiter(query["platform"], "timelines/by-match/id"))
+                    data = next(responses)
                 except APINotFoundError as error:
                     raise NotFoundError(str(error)) from error
 
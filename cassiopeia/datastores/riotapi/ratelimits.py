@@ -0,0 +1,678 @@
+import os
+import json
+import mmap
+import math
+import time
+import atexit
+import struct
+import asyncio
+import hashlib
+import threading
+import weakref
+from enum import Enum
+from time import monotonic
+from contextlib import contextmanager
+from typing import List, Tuple, Dict, Union, Iterable, Any, Callable
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    from contextvars import ContextVar, copy_context
+except ImportError:
+    # Python 3.6 doesn't have contextvars, so the context variables are kept per thread instead. A copied context holds
+    # the values of every such variable and sets them in whichever thread it's run in, which is enough to pass the
+    # request priority on to the executor. Tasks on the same event loop share the loop thread's values, though.
+    _context_vars = weakref.WeakSet()
+
+    class ContextVar(object):
+        def __init__(self, name: str, default: Any = None):
+            self.name = name
+            self._default = default
+            self._local = threading.local()
+            _context_vars.add(self)
+
+        def get(self) -> Any:
+            return getattr(self._local, "value", self._default)
+
+        def set(self, value: Any) -> Any:
+            # The token is the previous value
+            token = self.get()
+            self._local.value = value
+            return token
+
+        def reset(self, token: Any) -> None:
+            self._local.value = token
+
+    class _Context(object):
+        def __init__(self):
+            self._values = {var: var.get() for var in _context_vars}
+
+        def run(self, function: Callable, *args, **kwargs) -> Any:
+            tokens = [(var, var.set(value)) for var, value in self._values.items()]
+            try:
+                return function(*args, **kwargs)
+            finally:
+                for var, token in reversed(tokens):
+                    var.reset(token)
+
+    def copy_context() -> _Context:
+        return _Context()
+
+from merakicommons.ratelimits import RateLimiter
+
+
+class RequestPriority(Enum):
+    # Interactive requests are granted permits before bulk requests whenever both are waiting on the same limit.
+    interactive = "interactive"
+    bulk = "bulk"
+
+
+_request_priority = ContextVar("request_priority", default=RequestPriority.interactive)
+
+
+@contextmanager
+def request_priority(priority: Union[RequestPriority, str]):
+    """Sets the priority of the Riot API requests made inside the block (or inside the decorated function)."""
+    token = _request_priority.set(RequestPriority(priority))
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+def current_request_priority() -> RequestPriority:
+    return _request_priority.get()
+
+
+class _Window(object):
+    # One of the fixed windows (e.g. 100 requests every 120 seconds) that a RiotAPIRateLimiter enforces.
+    # Like merakicommons' FixedWindowRateLimiter, the window starts when the first request in it completes, and requests
+    # that are still in flight when it resets count against the next window.
+    def __init__(self, seconds: int, permits: float):
+        self.seconds = seconds
+        self.permits = permits
+        self.used = 0
+        self.in_flight = 0
+        self.resets_at = None
+        self.last_change = monotonic()
+
+    def _roll(self, now: float) -> None:
+        if self.resets_at is not None and now >= self.resets_at:
+            self.used = self.in_flight
+            self.resets_at = None
+
+    def available(self, now: float) -> float:
+        self._roll(now)
+        return self.permits - self.used
+
+    def wait_time(self, now: float) -> float:
+        self._roll(now)
+        if self.used < self.permits:
+            return 0.0
+        if self.resets_at is None:
+            # Every permit is in flight, so the window won't start until one of them completes
+            return math.inf
+        return self.resets_at - now
+
+    def take(self) -> None:
+        self.used += 1
+        self.in_flight += 1
+        self.last_change = monotonic()
+
+    def release(self, now: float) -> None:
+        # The window may have been created (from the response headers) while this request was in flight
+        self.in_flight = max(0, self.in_flight - 1)
+        self.last_change = now
+        if self.resets_at is None:
+            self.resets_at = now + self.seconds
+
+    def restrict_for(self, seconds: float, now: float) -> None:
+        self.used = max(self.used, self.permits)
+        self.resets_at = now + seconds
+
+    def reconcile(self, count: float, now: float) -> None:
+        # `count` is how many permits the server says have been used in its window, which can be more than we know about
+        # (e.g. if this process restarted mid-window)
+        self._roll(now)
+        if count > self.used:
+            self.used = count
+            if self.resets_at is None and self.in_flight == 0:
+                # Nothing in flight will start the window, and the server's window has already started
+                self.resets_at = now + self.seconds
+
+
+class RequestScheduler(object):
+    """Grants permits for the application and method rate limits of a Riot API key.
+
+    A request waits until *all* of its limiters have a permit and then takes them together, so a request that is blocked
+    by one method's limit never holds an application permit that a request to another method could be using. Every
+    waiting request wakes up when it could next be eligible (or when a permit is returned), so whichever request is
+    eligible first is sent first.
+
+    Interactive requests that are waiting reserve a permit on each of their limiters, and bulk requests only take the
+    permits that are left over, so bulk traffic can use all of the spare capacity without delaying interactive traffic.
+    """
+    def __init__(self, shared_state: "SharedRateLimitState" = None, persistent_state: "PersistentRateLimitState" = None):
+        self._condition = threading.Condition()
+        self._async_waiters = []  # type: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]
+        self._interactive_waiting = {}  # type: Dict[RiotAPIRateLimiter, int]
+        self._shared_state = shared_state
+        self._persistent_state = persistent_state
+
+    @contextmanager
+    def _synchronized(self, limiters: Iterable["RiotAPIRateLimiter"]):
+        # Must be called with the condition held. If the windows are shared with other processes, they are read from the
+        # shared state before the block and written back after it, all while holding the shared lock.
+        if self._shared_state is None:
+            yield
+        else:
+            with self._shared_state.lock():
+                for limiter in limiters:
+                    self._shared_state.load(limiter)
+                yield
+                for limiter in limiters:
+                    self._shared_state.store(limiter)
+
+    def _record(self, limiters: Iterable["RiotAPIRateLimiter"]) -> None:
+        # Must be called with the condition held, after a permit was taken or returned or the windows otherwise changed
+        if self._persistent_state is not None:
+            self._persistent_state.record(limiters)
+
+    def _save(self) -> None:
+        # Must be called *without* the condition held, so that no request waits for the file to be written
+        if self._persistent_state is not None:
+            self._persistent_state.save_if_due()
+
+    def _restore(self, limiter: "RiotAPIRateLimiter") -> None:
+        if self._persistent_state is not None:
+            with self._condition:
+                with self._synchronized((limiter,)):
+                    self._persistent_state.restore(limiter)
+
+    def _timeout(self, wait: float) -> Union[float, None]:
+        # Other processes can't wake us up when they return a permit, so poll the shared state instead
+        if self._shared_state is not None:
+            wait = min(wait, self._shared_state.poll_interval)
+        return None if wait == math.inf else wait
+
+    def permit(self, *limiters: "RiotAPIRateLimiter", priority: RequestPriority = None) -> "ScheduledPermit":
+        if priority is None:
+            priority = current_request_priority()
+        return ScheduledPermit(self, limiters, priority)
+
+    def _try_acquire(self, limiters: Tuple["RiotAPIRateLimiter", ...], priority: RequestPriority) -> float:
+        # Must be called with the condition held. Takes a permit from every limiter and returns 0 if all of them have
+        # one available; otherwise takes nothing and returns how long until they might.
+        with self._synchronized(limiters):
+            now = monotonic()
+            wait = 0.0
+            for limiter in limiters:
+                wait = max(wait, limiter._wait_time(now))
+            if wait <= 0 and priority is RequestPriority.bulk:
+                for limiter in limiters:
+                    if limiter._available(now) <= self._interactive_waiting.get(limiter, 0):
+                        # The remaining permits are reserved for interactive requests; wait until one of them is sent
+                        wait = math.inf
+                        break
+            if wait <= 0:
+                for limiter in limiters:
+                    limiter._take()
+                self._record(limiters)
+        return wait
+
+    def _wait(self, limiters: Tuple["RiotAPIRateLimiter", ...], priority: RequestPriority) -> None:
+        # Must be called with the condition held
+        if priority is RequestPriority.interactive:
+            for limiter in limiters:
+                self._interactive_waiting[limiter] = self._interactive_waiting.get(limiter, 0) + 1
+
+    def _stop_waiting(self, limiters: Tuple["RiotAPIRateLimiter", ...], priority: RequestPriority) -> None:
+        # Must be called with the condition held
+        if priority is RequestPriority.interactive:
+            for limiter in limiters:
+                self._interactive_waiting[limiter] -= 1
+                if self._interactive_waiting[limiter] == 0:
+                    del self._interactive_waiting[limiter]
+            # Bulk requests may have been waiting on this request's reservation
+            self._notify()
+
+    def try_acquire(self, limiters: Tuple["RiotAPIRateLimiter", ...], priority: RequestPriority = RequestPriority.interactive) -> float:
+        # Like `acquire`, but never waits: returns 0 if the permits were taken, and otherwise how long until they might be
+        with self._condition:
+            wait = self._try_acquire(limiters, priority)
+        self._save()
+        return wait
+
+    def acquire(self, limiters: Tuple["RiotAPIRateLimiter", ...], priority: RequestPriority = RequestPriority.interactive) -> None:
+        with self._condition:
+            wait = self._try_acquire(limiters, priority)
+            if wait > 0:
+                self._wait(limiters, priority)
+                try:
+                    while wait > 0:
+                        self._condition.wait(self._timeout(wait))
+                        wait = self._try_acquire(limiters, priority)
+                finally:
+                    self._stop_waiting(limiters, priority)
+        self._save()
+
+    async def acquire_async(self, limiters: Tuple["RiotAPIRateLimiter", ...], priority: RequestPriority = RequestPriority.interactive) -> None:
+        loop = asyncio.get_event_loop()
+        with self._condition:
+            wait = self._try_acquire(limiters, priority)
+            if wait > 0:
+                self._wait(limiters, priority)
+        if wait <= 0:
+            self._save()
+            return
+        try:
+            while wait > 0:
+                with self._condition:
+                    waiter = loop.create_future()
+                    self._async_waiters.append((loop, waiter))
+                try:
+                    await asyncio.wait_for(waiter, self._timeout(wait))
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    with self._condition:
+                        try:
+                            self._async_waiters.remove((loop, waiter))
+                        except ValueError:
+                            pass
+                with self._condition:
+                    wait = self._try_acquire(limiters, priority)
+        finally:
+            with self._condition:
+                self._stop_waiting(limiters, priority)
+        self._save()
+
+    def release(self, limiters: Tuple["RiotAPIRateLimiter", ...]) -> None:
+        with self._condition:
+            with self._synchronized(limiters):
+                now = monotonic()
+                for limiter in limiters:
+                    limiter._release(now)
+            self._record(limiters)
+            self._notify()
+        self._save()
+
+    def _notify(self) -> None:
+        # Must be called with the condition held. Wakes every waiting request so that it can check whether it's eligible.
+        self._condition.notify_all()
+        for loop, waiter in self._async_waiters:
+            loop.call_soon_threadsafe(_wake, waiter)
+        self._async_waiters.clear()
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class ScheduledPermit(RateLimiter):
+    """A permit from every one of `limiters`, granted together by their scheduler. This is what gets passed to the
+    HTTP clients as a request's rate limiter."""
+    def __init__(self, scheduler: RequestScheduler, limiters: Tuple["RiotAPIRateLimiter", ...], priority: RequestPriority = RequestPriority.interactive):
+        self._scheduler = scheduler
+        self._limiters = tuple(limiter for limiter in limiters if limiter is not None)
+        self.priority = priority
+
+    def __enter__(self) -> "ScheduledPermit":
+        self._scheduler.acquire(self._limiters, self.priority)
+        return self
+
+    async def acquire_async(self) -> "ScheduledPermit":
+        await self._scheduler.acquire_async(self._limiters, self.priority)
+        return self
+
+    def try_acquire(self) -> float:
+        # Takes the permit if it's available right away and returns 0, and otherwise returns how long until it might be
+        return self._scheduler.try_acquire(self._limiters, self.priority)
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._scheduler.release(self._limiters)
+
+    def restrict_for(self, seconds: int) -> None:
+        for limiter in self._limiters:
+            limiter.restrict_for(seconds)
+
+    @property
+    def permits_issued(self) -> int:
+        return min((limiter.permits_issued for limiter in self._limiters), default=0)
+
+    def reset_permits_issued(self) -> None:
+        for limiter in self._limiters:
+            limiter.reset_permits_issued()
+
+
+class RiotAPIRateLimiter(RateLimiter):
+    # The application limiter and method limiters will each be an instance of this.
+    # The application limiter creates the scheduler, and the method limiters share it.
+
+    def __init__(self, limiting_share, scheduler: RequestScheduler = None, name: str = "application"):
+        self.limiting_share = limiting_share
+        if scheduler is None:
+            scheduler = RequestScheduler()
+        self.scheduler = scheduler
+        self.name = name
+        self._windows = []  # type: List[_Window]
+        self._restricted_until = None  # Also applies before the limits are known (when there are no windows yet)
+        self._permits_issued = 0
+        self.scheduler._restore(self)
+
+    def _available(self, now: float) -> float:
+        return min((window.available(now) for window in self._windows), default=math.inf)
+
+    def _wait_time(self, now: float) -> float:
+        wait = max((window.wait_time(now) for window in self._windows), default=0.0)
+        if self._restricted_until is not None:
+            wait = max(wait, self._restricted_until - now)
+        return wait
+
+    def _take(self) -> None:
+        for window in self._windows:
+            window.take()
+        self._permits_issued += 1
+
+    def _release(self, now: float) -> None:
+        for window in self._windows:
+            window.release(now)
+
+    def __enter__(self) -> "RiotAPIRateLimiter":
+        self.scheduler.acquire((self,))
+        return self
+
+    def try_acquire(self) -> float:
+        return self.scheduler.try_acquire((self,))
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.scheduler.release((self,))
+
+    def restrict_for(self, seconds: int) -> None:
+        with self.scheduler._condition:
+            with self.scheduler._synchronized((self,)):
+                now = monotonic()
+                for window in self._windows:
+                    window.restrict_for(seconds, now)
+                self._restricted_until = max(self._restricted_until or now, now + seconds)
+            self.scheduler._record((self,))
+            self.scheduler._notify()
+        self.scheduler._save()
+
+    def adjust_rate_limits_if_necessary(self, limits: List[List[int]]) -> None:
+        # Creates the windows from the rates in the headers the first time they're seen, and updates them if Riot changes them
+        with self.scheduler._condition:
+            changed = False
+            with self.scheduler._synchronized((self,)):
+                for permits, window_seconds in limits:
+                    permits = permits * self.limiting_share
+                    window = self._get_specific_window(window_seconds)
+                    if window is None:
+                        self._windows.append(_Window(seconds=window_seconds, permits=permits))
+                        changed = True
+                    elif permits != window.permits:
+                        window.permits = permits
+                        changed = True
+            if changed:
+                self.scheduler._record((self,))
+                self.scheduler._notify()
+        self.scheduler._save()
+
+    def reconcile_counts(self, counts: List[List[int]]) -> None:
+        # Brings the windows up to date with the counts the server reports in the X-*-Rate-Limit-Count headers.
+        # The server counts requests from every server sharing the API key, so the part of each limit that belongs to
+        # the other servers (see `limiting_share`) isn't counted against us.
+        with self.scheduler._condition:
+            with self.scheduler._synchronized((self,)):
+                now = monotonic()
+                for count, window_seconds in counts:
+                    window = self._get_specific_window(window_seconds)
+                    if window is not None and self.limiting_share:
+                        others = window.permits / self.limiting_share * (1 - self.limiting_share)
+                        window.reconcile(count - others, now)
+            self.scheduler._record((self,))
+        self.scheduler._save()
+
+    def _get_specific_window(self, window_seconds: int) -> _Window:
+        for window in self._windows:
+            if window.seconds == window_seconds:
+                return window
+
+    @property
+    def permits_issued(self) -> int:
+        with self.scheduler._condition:
+            return self._permits_issued
+
+    def reset_permits_issued(self) -> None:
+        with self.scheduler._condition:
+            self._permits_issued = 0
+
+
+class SharedRateLimitState(object):
+    """Keeps the rate limit windows in a memory-mapped file so that every process on this machine that uses the same
+    file (and the same API key) draws from the same budgets.
+
+    Each (API key, limiter) pair has a slot in the file. A process reads a limiter's windows from its slot before it
+    grants or returns a permit and writes them back afterwards, holding an exclusive lock on the file throughout. The
+    windows are timed with the system-wide monotonic clock, so the file must only be shared between processes on the
+    same machine. If a process dies with requests in flight, their permits are returned once the limiter hasn't been
+    used for `stale_after` seconds.
+    """
+    _MAGIC = b"CASSRL01"
+    _MAX_WINDOWS = 4
+    _HEADER = struct.Struct("<8sI")
+    # Each slot is a key, the number of windows, and for each window: seconds, permits, used, in_flight, resets_at (NaN if
+    # the window hasn't started), and the last time a permit was taken or returned
+    _SLOT = struct.Struct("<20sI" + "dddddd" * _MAX_WINDOWS)
+
+    def __init__(self, path: str, api_key: str, slots: int = 4096, poll_interval: float = 0.05, stale_after: float = 120.0):
+        if fcntl is None:
+            raise RuntimeError("Sharing rate limits between processes requires fcntl, which isn't available on this platform.")
+        self.path = path
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self._namespace = hashlib.sha1(api_key.encode("utf-8")).hexdigest() if api_key else ""
+        self._slots = slots
+        self._lock = threading.Lock()  # flock is per open file description, so threads in this process also need a lock
+
+        size = self._HEADER.size + slots * self._SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, self._HEADER.pack(self._MAGIC, slots), 0)
+            magic, file_slots = self._HEADER.unpack(os.pread(self._fd, self._HEADER.size, 0))
+            if magic != self._MAGIC or file_slots != slots:
+                raise ValueError("{} is not a Cassiopeia rate limit file with {} slots.".format(path, slots))
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+
+    @contextmanager
+    def lock(self):
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _key(self, limiter: "RiotAPIRateLimiter") -> bytes:
+        return hashlib.sha1("{}|{}".format(self._namespace, limiter.name).encode("utf-8")).digest()
+
+    def _offset(self, key: bytes, claim: bool) -> Union[int, None]:
+        # Must be called with the lock held. Finds the slot for `key` by linear probing, and claims an empty one if asked to.
+        start = int.from_bytes(key[:4], "little") % self._slots
+        for i in range(self._slots):
+            offset = self._HEADER.size + ((start + i) % self._slots) * self._SLOT.size
+            slot_key = self._map[offset:offset + 20]
+            if slot_key == key:
+                return offset
+            if slot_key == bytes(20):
+                if claim:
+                    self._map[offset:offset + 20] = key
+                    return offset
+                return None
+        return None
+
+    def load(self, limiter: "RiotAPIRateLimiter") -> None:
+        # Must be called with the lock held
+        offset = self._offset(self._key(limiter), claim=False)
+        if offset is None:
+            return
+        values = self._SLOT.unpack_from(self._map, offset)
+        count = values[1]
+        now = monotonic()
+        for i in range(count):
+            seconds, permits, used, in_flight, resets_at, last_change = values[2 + 6 * i: 8 + 6 * i]
+            window = limiter._get_specific_window(seconds)
+            if window is None:
+                # Another process has already learned this limit from the response headers
+                window = _Window(seconds=seconds, permits=permits * limiter.limiting_share)
+                limiter._windows.append(window)
+            if in_flight and now - last_change > self.stale_after:
+                in_flight = 0
+                if math.isnan(resets_at):
+                    resets_at = now
+            window.used = used
+            window.in_flight = in_flight
+            window.resets_at = None if math.isnan(resets_at) else resets_at
+            window.last_change = last_change
+
+    def store(self, limiter: "RiotAPIRateLimiter") -> None:
+        # Must be called with the lock held
+        if not limiter._windows:
+            return
+        offset = self._offset(self._key(limiter), claim=True)
+        if offset is None:
+            return  # The file is full, so this limiter is only enforced locally
+        windows = limiter._windows[:self._MAX_WINDOWS]
+        values = []
+        for window in windows:
+            permits = window.permits / limiter.limiting_share if limiter.limiting_share else window.permits
+            values.extend([window.seconds, permits, window.used, window.in_flight,
+                           math.nan if window.resets_at is None else window.resets_at, window.last_change])
+        values.extend([0.0] * 6 * (self._MAX_WINDOWS - len(windows)))
+        self._SLOT.pack_into(self._map, offset, self._map[offset:offset + 20], len(windows), *values)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+
+class PersistentRateLimitState(object):
+    """Saves the state of the active rate limit windows to a JSON file so that a process that restarts mid-window
+    resumes with the permits it had already used instead of assuming a fresh budget.
+
+    The limits learned from the response headers are saved too, for the API key and for each (platform, endpoint), so
+    that a new process enforces them from its first request rather than only after its first response.
+
+    The file is written at most once every `save_interval` seconds while permits are being used, and again when the
+    process exits. Times are saved as wall clock times because the monotonic clock doesn't survive a restart.
+    """
+    def __init__(self, path: str, api_key: str, save_interval: float = 1.0):
+        self.path = path
+        self.save_interval = save_interval
+        self._namespace = hashlib.sha1(api_key.encode("utf-8")).hexdigest() if api_key else ""
+        self._lock = threading.Lock()  # Guards the data
+        self._write_lock = threading.Lock()  # Guards the file
+        self._last_save = 0.0
+        self._dirty = False
+        self._snapshots = 0  # How many times the data has been serialized to be saved
+        self._written = 0  # The number of the latest of those snapshots that has been written to the file
+        try:
+            with open(path, "r") as f:
+                self._data = json.load(f)
+        except (OSError, ValueError):
+            self._data = {}
+        self._windows = self._data.setdefault("windows", {}).setdefault(self._namespace, {})  # limiter name -> windows
+        self._limits = self._data.setdefault("limits", {}).setdefault(self._namespace, {})  # limiter name -> [[permits, seconds], ...]
+        _persistent_states.add(self)
+
+    def restore(self, limiter: "RiotAPIRateLimiter") -> None:
+        # Must be called with the scheduler's condition held
+        now, wall_now = monotonic(), time.time()
+        for permits, seconds in self._limits.get(limiter.name, []):
+            if limiter._get_specific_window(seconds) is None:
+                limiter._windows.append(_Window(seconds=seconds, permits=permits * limiter.limiting_share))
+        for saved in self._windows.get(limiter.name, []):
+            if saved["resets_at"] <= wall_now:
+                continue  # This window is over
+            window = limiter._get_specific_window(saved["seconds"])
+            if window is None:
+                window = _Window(seconds=saved["seconds"], permits=saved["permits"] * limiter.limiting_share)
+                limiter._windows.append(window)
+            window.used = max(window.used, saved["used"])
+            window.resets_at = now + (saved["resets_at"] - wall_now)
+
+    def record(self, limiters: Iterable["RiotAPIRateLimiter"]) -> None:
+        # Must be called with the scheduler's condition held. Only the data in memory is updated; `save` writes it.
+        now, wall_now = monotonic(), time.time()
+        with self._lock:
+            for limiter in limiters:
+                if not limiter._windows:
+                    continue
+                windows = []
+                for window in limiter._windows:
+                    # A window that hasn't started yet will reset at the latest one window's length from now
+                    resets_at = window.resets_at if window.resets_at is not None else now + window.seconds
+                    windows.append({
+                        "seconds": window.seconds,
+                        "permits": window.permits / limiter.limiting_share if limiter.limiting_share else window.permits,
+                        "used": window.used,
+                        "resets_at": wall_now + (resets_at - now)
+                    })
+                self._windows[limiter.name] = windows
+                self._limits[limiter.name] = [[window["permits"], window["seconds"]] for window in windows]
+            self._dirty = True
+
+    def save_if_due(self) -> None:
+        # Must be called without the scheduler's condition held
+        if self._dirty and monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+    def save(self) -> None:
+        # Must be called without the scheduler's condition held
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._last_save = monotonic()
+            wall_now = time.time()
+            for name, windows in list(self._windows.items()):
+                windows = [window for window in windows if window["resets_at"] > wall_now]
+                if windows:
+                    self._windows[name] = windows
+                else:
+                    del self._windows[name]
+            data = json.dumps(self._data)
+            self._snapshots += 1
+            snapshot = self._snapshots
+        with self._write_lock:
+            if snapshot < self._written:
+                return  # A newer snapshot has already been written
+            temporary = "{}.{}.tmp".format(self.path, os.getpid())
+            try:
+                with open(temporary, "w") as f:
+                    f.write(data)
+                os.replace(temporary, self.path)
+            except OSError:
+                pass
+            self._written = snapshot
+
+
+# Every PersistentRateLimitState that is still in use is saved when the process exits
+_persistent_states = weakref.WeakSet()
+
+
+def _save_persistent_states() -> None:
+    for state in list(_persistent_states):
+        state.save()
+
+
+atexit.register(_save_persistent_states)
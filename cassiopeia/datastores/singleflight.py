@@ -0,0 +1,65 @@
+import threading
+from typing import Callable, Hashable, Iterable, TypeVar, Dict
+
+T = TypeVar("T")
+
+
+class _Flight(object):
+    __slots__ = ["owner", "done", "result", "error"]
+
+    def __init__(self):
+        self.owner = threading.get_ident()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Coalesces concurrent calls that fetch the same thing.
+
+    The first caller for a set of keys runs the fetch; anyone who asks for any of those keys while it's running waits
+    for it and gets the same result (or the same exception) instead of running the fetch again.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}  # type: Dict[Hashable, _Flight]
+
+    def do(self, keys: Iterable[Hashable], function: Callable[[], T]) -> T:
+        keys = list(keys)
+        with self._lock:
+            flight = None
+            for key in keys:
+                flight = self._flights.get(key)
+                if flight is not None:
+                    break
+            if flight is None:
+                flight = _Flight()
+                for key in keys:
+                    self._flights[key] = flight
+                leader = True
+            elif flight.owner == threading.get_ident():
+                # This thread is already fetching these keys further up the stack; waiting for itself would deadlock
+                leader = None
+            else:
+                leader = False
+
+        if leader is None:
+            return function()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = function()
+            return flight.result
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                for key in keys:
+                    if self._flights.get(key) is flight:
+                        del self._flights[key]
+            flight.done.set()
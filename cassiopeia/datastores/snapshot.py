@@ -0,0 +1,296 @@
+from typing import Type, TypeVar, MutableMapping, Any, Iterable, Dict, Optional, Tuple
+import json
+import mmap
+import os
+import pickle
+import struct
+import threading
+
+from datapipelines import DataSource, PipelineContext, Query, NotFoundError, validate_query
+
+from ..data import Platform
+from ..dto.staticdata.champion import ChampionDto, ChampionListDto
+from ..dto.staticdata.rune import RuneDto, RuneListDto
+from ..dto.staticdata.item import ItemDto, ItemListDto
+from ..dto.staticdata.summonerspell import SummonerSpellDto, SummonerSpellListDto
+from ..dto.staticdata.map import MapDto, MapListDto
+from ..dto.staticdata.profileicon import ProfileIconDataDto
+from ..dto.staticdata.language import LanguageStringsDto
+from .uniquekeys import convert_region_to_platform
+
+T = TypeVar("T")
+
+# A snapshot is the magic number, the length of the index, the JSON index, and then the pickled DTOs the index points to.
+# Each list is pickled whole, already converted to its DTO types, so reading one is a single `pickle.loads`. The objects in
+# a list are also pickled separately so that one can be read without reading the rest.
+_MAGIC = b"CASSSNP2"
+_HEADER = struct.Struct("<8sI")
+
+# The list types in a snapshot, the type of the objects in their "data", and the fields those objects are found by
+_LIST_TYPES = {
+    ChampionListDto: (ChampionDto, "id", "name"),
+    ItemListDto: (ItemDto, "id", "name"),
+    RuneListDto: (RuneDto, "id", "name"),
+    SummonerSpellListDto: (SummonerSpellDto, "id", "name"),
+    MapListDto: (MapDto, "mapId", "mapName"),
+}
+# Types that are stored whole
+_WHOLE_TYPES = (ProfileIconDataDto, LanguageStringsDto)
+
+
+def _file_name(version: str, locale: str) -> str:
+    return "{version}-{locale}.snapshot".format(version=version, locale=locale)
+
+
+class _Snapshot(object):
+    """A snapshot file, memory-mapped so that every process that opens it shares the same pages."""
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_length = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            raise ValueError("{path} is not a static data snapshot".format(path=path))
+        self._index = json.loads(self._map[_HEADER.size:_HEADER.size + index_length].decode("utf-8"))
+        self._start = _HEADER.size + index_length
+
+    def _read(self, location: Tuple[int, int]) -> Any:
+        offset, length = location
+        offset += self._start
+        return pickle.loads(self._map[offset:offset + length])
+
+    def _types(self, type: Type[T]) -> Dict[str, Any]:
+        try:
+            return self._index["types"][type.__name__]
+        except KeyError:
+            raise NotFoundError
+
+    def get_list(self, type: Type[T]) -> T:
+        return self._read(self._types(type)["body"])
+
+    def find(self, type: Type[T], field: str, value: Any) -> Optional[Any]:
+        index = self._types(type)
+        position = index["by"][field].get(str(value))
+        if position is None:
+            return None
+        return self._read(index["data"][position])
+
+    def close(self) -> None:
+        self._map.close()
+
+
+class StaticDataSnapshot(DataSource):
+    """Provides static data from read-only snapshots built by `StaticDataSnapshot.build`.
+
+    A snapshot holds the static data of one version and locale, already converted from Data Dragon's format, so
+    providing it is only a matter of reading it. Snapshots are memory-mapped, so processes on the same machine that use
+    the same snapshot share it, and only read the parts of it they use.
+
+    Snapshots hold pickled DTOs, so only use snapshots you built yourself.
+    """
+    def __init__(self, directory: str = "snapshots") -> None:
+        self._directory = directory
+        self._snapshots = {}  # type: Dict[Tuple[str, str], _Snapshot]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, directory: str, version: str, locale: str, source: DataSource = None) -> str:
+        """Gets the static data for `version` and `locale` from `source` (a new DDragon by default) and writes a snapshot
+        of it to `directory`, replacing any previous one. Returns the snapshot's path."""
+        if source is None:
+            from .ddragon import DDragon
+            source = DDragon()
+        query = {"platform": Platform.north_america, "version": version, "locale": locale}
+
+        data = bytearray()
+        types = {}
+
+        def append(obj: Any) -> Tuple[int, int]:
+            encoded = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+            location = (len(data), len(encoded))
+            data.extend(encoded)
+            return location
+
+        for type in _WHOLE_TYPES:
+            types[type.__name__] = {"body": append(type(source.get(type, dict(query))))}
+        for type, (item_type, id_field, name_field) in _LIST_TYPES.items():
+            body = type(source.get(type, dict(query)))
+            if isinstance(body["data"], dict):
+                body["data"] = {key: item_type(item) for key, item in body["data"].items()}
+                items = list(body["data"].values())
+            else:
+                body["data"] = [item_type(item) for item in body["data"]]
+                items = body["data"]
+            index = {"body": append(body), "data": [append(item) for item in items], "by": {id_field: {}, name_field: {}}}
+            for position, item in enumerate(items):
+                for field in (id_field, name_field):
+                    if field in item:
+                        index["by"][field].setdefault(str(item[field]), position)
+            types[type.__name__] = index
+
+        index = json.dumps({"version": version, "locale": locale, "types": types}, separators=(",", ":")).encode("utf-8")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, _file_name(version, locale))
+        # Processes may have the old snapshot mapped, so the new one is written beside it and then moved into place
+        temporary = "{path}.{pid}.tmp".format(path=path, pid=os.getpid())
+        with open(temporary, "wb") as file:
+            file.write(_HEADER.pack(_MAGIC, len(index)))
+            file.write(index)
+            file.write(data)
+        os.replace(temporary, path)
+        return path
+
+    def _snapshot(self, query: MutableMapping[str, Any]) -> _Snapshot:
+        if "version" not in query:
+            raise NotFoundError("A version is required to look up static data in a snapshot")
+        key = (query["version"], query["locale"] if "locale" in query else query["platform"].default_locale)
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is None:
+                path = os.path.join(self._directory, _file_name(*key))
+                if not os.path.exists(path):
+                    raise NotFoundError
+                snapshot = _Snapshot(path)
+                self._snapshots[key] = snapshot
+        return snapshot
+
+    def _get_list(self, type: Type[T], query: MutableMapping[str, Any]) -> T:
+        result = self._snapshot(query).get_list(type)
+        region = query["platform"].region.value
+        result["region"] = region
+        if type in _LIST_TYPES:
+            for item in result["data"].values() if isinstance(result["data"], dict) else result["data"]:
+                if "region" in item:
+                    item["region"] = region
+        return result
+
+    def _get_item(self, list_type: Type[T], query: MutableMapping[str, Any]) -> Any:
+        item_type, id_field, name_field = _LIST_TYPES[list_type]
+        if "id" in query:
+            item = self._snapshot(query).find(list_type, id_field, query["id"])
+        else:
+            item = self._snapshot(query).find(list_type, name_field, query["name"])
+        if item is None:
+            raise NotFoundError
+        item["region"] = query["platform"].region.value
+        item["version"] = query["version"]
+        if "locale" in query:
+            item["locale"] = query["locale"]
+        if "includedData" in query and item_type is not MapDto:
+            item["includedData"] = query["includedData"]
+        return item
+
+    @DataSource.dispatch
+    def get(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> T:
+        pass
+
+    @DataSource.dispatch
+    def get_many(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> Iterable[T]:
+        pass
+
+    _validate_get_list_query = Query. \
+        has("platform").as_(Platform).also. \
+        can_have("version").as_(str).also. \
+        can_have("locale").also. \
+        can_have("includedData")
+
+    _validate_get_item_query = Query. \
+        has("platform").as_(Platform).also. \
+        has("id").as_(int).or_("name").as_(str).also. \
+        can_have("version").as_(str).also. \
+        can_have("locale").also. \
+        can_have("includedData")
+
+    #############
+    # Champions #
+    #############
+
+    @get.register(ChampionDto)
+    @validate_query(_validate_get_item_query, convert_region_to_platform)
+    def get_champion(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> ChampionDto:
+        return self._get_item(ChampionListDto, query)
+
+    @get.register(ChampionListDto)
+    @validate_query(_validate_get_list_query, convert_region_to_platform)
+    def get_champion_list(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> ChampionListDto:
+        return self._get_list(ChampionListDto, query)
+
+    #########
+    # Items #
+    #########
+
+    @get.register(ItemDto)
+    @validate_query(_validate_get_item_query, convert_region_to_platform)
+    def get_item(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> ItemDto:
+        return self._get_item(ItemListDto, query)
+
+    @get.register(ItemListDto)
+    @validate_query(_validate_get_list_query, convert_region_to_platform)
+    def get_item_list(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> ItemListDto:
+        return self._get_list(ItemListDto, query)
+
+    #########
+    # Runes #
+    #########
+
+    @get.register(RuneDto)
+    @validate_query(_validate_get_item_query, convert_region_to_platform)
+    def get_rune(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> RuneDto:
+        return self._get_item(RuneListDto, query)
+
+    @get.register(RuneListDto)
+    @validate_query(_validate_get_list_query, convert_region_to_platform)
+    def get_rune_list(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> RuneListDto:
+        return self._get_list(RuneListDto, query)
+
+    ###################
+    # Summoner Spells #
+    ###################
+
+    @get.register(SummonerSpellDto)
+    @validate_query(_validate_get_item_query, convert_region_to_platform)
+    def get_summoner_spell(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> SummonerSpellDto:
+        return self._get_item(SummonerSpellListDto, query)
+
+    @get.register(SummonerSpellListDto)
+    @validate_query(_validate_get_list_query, convert_region_to_platform)
+    def get_summoner_spell_list(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> SummonerSpellListDto:
+        return self._get_list(SummonerSpellListDto, query)
+
+    ########
+    # Maps #
+    ########
+
+    @get.register(MapDto)
+    @validate_query(_validate_get_item_query, convert_region_to_platform)
+    def get_map(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> MapDto:
+        return self._get_item(MapListDto, query)
+
+    @get.register(MapListDto)
+    @validate_query(_validate_get_list_query, convert_region_to_platform)
+    def get_map_list(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> MapListDto:
+        return self._get_list(MapListDto, query)
+
+    #################
+    # Profile Icons #
+    #################
+
+    @get.register(ProfileIconDataDto)
+    @validate_query(_validate_get_list_query, convert_region_to_platform)
+    def get_profile_icons(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> ProfileIconDataDto:
+        result = self._snapshot(query).get_list(ProfileIconDataDto)
+        region = query["platform"].region.value
+        result["region"] = region
+        for icon in result["data"].values():
+            icon["region"] = region
+        return result
+
+    ####################
+    # Language Strings #
+    ####################
+
+    @get.register(LanguageStringsDto)
+    @validate_query(_validate_get_list_query, convert_region_to_platform)
+    def get_language_strings(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> LanguageStringsDto:
+        result = self._snapshot(query).get_list(LanguageStringsDto)
+        result["region"] = query["platform"].region.value
+        return result
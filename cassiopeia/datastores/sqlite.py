@@ -0,0 +1,450 @@
+from typing import Type, TypeVar, Mapping, MutableMapping, Any, Iterable, Generator, Callable, List, Tuple
+import datetime
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+from datapipelines import DataSource, DataSink, PipelineContext, Query, NotFoundError, validate_query
+
+from ..data import Region, Platform
+from ..dto.match import MatchDto, TimelineDto
+from ..dto.summoner import SummonerDto
+from ..dto.staticdata.champion import ChampionListDto
+from ..dto.staticdata.rune import RuneListDto
+from ..dto.staticdata.item import ItemListDto
+from ..dto.staticdata.summonerspell import SummonerSpellListDto
+from ..dto.staticdata.map import MapListDto
+from ..dto.staticdata.profileicon import ProfileIconDataDto
+from ..dto.staticdata.language import LanguagesDto, LanguageStringsDto
+from ..dto.staticdata.realm import RealmDto
+from ..dto.staticdata.version import VersionListDto
+from . import uniquekeys
+from .uniquekeys import convert_region_to_platform
+
+T = TypeVar("T")
+
+
+# The same expirations the in-memory cache uses for the core types these DTOs become
+default_expirations = {
+    RealmDto: datetime.timedelta(hours=6),
+    VersionListDto: datetime.timedelta(hours=6),
+    LanguagesDto: datetime.timedelta(days=20),
+    LanguageStringsDto: datetime.timedelta(days=20),
+    ChampionListDto: datetime.timedelta(days=20),
+    RuneListDto: datetime.timedelta(days=20),
+    ItemListDto: datetime.timedelta(days=20),
+    SummonerSpellListDto: datetime.timedelta(days=20),
+    MapListDto: datetime.timedelta(days=20),
+    ProfileIconDataDto: datetime.timedelta(days=20),
+    MatchDto: datetime.timedelta(days=3),
+    TimelineDto: datetime.timedelta(days=1),
+    SummonerDto: datetime.timedelta(days=1),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    id INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    data BLOB NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS objects_expires_at ON objects (expires_at);
+CREATE TABLE IF NOT EXISTS keys (
+    type TEXT NOT NULL,
+    key TEXT NOT NULL,
+    object_id INTEGER NOT NULL,
+    PRIMARY KEY (type, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS keys_object_id ON keys (object_id);
+"""
+
+
+def _encode(obj: Any) -> Any:
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError("{type} is not JSON serializable".format(type=obj.__class__.__name__))
+
+
+def _key(key: Any) -> str:
+    # Keys are the ones `uniquekeys` gives the in-memory cache, stored as text so that they are the same in every process
+    # (unlike `hash`)
+    return json.dumps(key, separators=(",", ":"))
+
+
+def _keys(key_function: Callable[[Mapping[str, Any]], List[Any]], query: Mapping[str, Any]) -> List[str]:
+    return [_key(key) for key in key_function(query)]
+
+
+def _platform(dto: Mapping[str, Any]) -> Platform:
+    return Region(dto["region"]).platform
+
+
+def _sanitize_name(name: str) -> str:
+    # The same as `Summoner.sanitized_name`, so that a summoner is found however their name is spaced or capitalized
+    return name.replace(" ", "").lower()
+
+
+# Key functions. Each returns the keys an item is stored under, or that a query is looked up by. DTOs are turned into the
+# query they answer so that both go through the same `uniquekeys` function.
+
+def _for_match_dto(match: MatchDto) -> List[str]:
+    return _keys(uniquekeys.for_match_query, {"platform": _platform(match), "id": match["gameId"]})
+
+
+def _for_match_query(query: Mapping[str, Any]) -> List[str]:
+    return _keys(uniquekeys.for_match_query, query)
+
+
+def _for_timeline_dto(timeline: TimelineDto) -> List[str]:
+    return _keys(uniquekeys.for_match_timeline_query, {"platform": _platform(timeline), "id": timeline["matchId"]})
+
+
+def _for_timeline_query(query: Mapping[str, Any]) -> List[str]:
+    return _keys(uniquekeys.for_match_timeline_query, query)
+
+
+def _for_summoner_dto(summoner: SummonerDto) -> List[str]:
+    return _keys(uniquekeys.for_summoner_query, {"platform": _platform(summoner), "id": summoner["id"],
+                                                 "account.id": summoner["accountId"], "name": _sanitize_name(summoner["name"])})
+
+
+def _for_summoner_query(query: Mapping[str, Any]) -> List[str]:
+    if "name" in query:
+        query = dict(query, name=_sanitize_name(query["name"]))
+    return _keys(uniquekeys.for_summoner_query, query)
+
+
+def _for_static_list_dto(dto: Mapping[str, Any]) -> List[str]:
+    return _keys(uniquekeys.for_maps_query, {"platform": _platform(dto), "version": dto["version"], "locale": dto["locale"]})
+
+
+def _for_static_list_query(query: Mapping[str, Any]) -> List[str]:
+    # The latest version is found by asking the rest of the pipeline, so queries without one aren't answered here
+    if "version" not in query:
+        raise NotFoundError("A version is required to look up static data")
+    platform = query["platform"]
+    return _keys(uniquekeys.for_maps_query, {"platform": platform, "version": query["version"], "locale": query.get("locale", platform.default_locale)})
+
+
+def _for_region_dto(dto: Mapping[str, Any]) -> List[str]:
+    return _keys(uniquekeys.for_realms_query, {"platform": _platform(dto)})
+
+
+def _for_region_query(query: Mapping[str, Any]) -> List[str]:
+    return _keys(uniquekeys.for_realms_query, query)
+
+
+def _complete_static_list(dto: Mapping[str, Any]) -> bool:
+    # Only lists with all of their data answer every query for their version and locale
+    return "all" in dto.get("includedData", {"all"})
+
+
+class SQLiteStore(DataSource, DataSink):
+    """A data store that persists DTOs in a SQLite database file, so that they survive restarts.
+
+    Each object is stored once, compressed, along with the keys it can be looked up by. The database is opened in WAL
+    mode, so several threads or processes can read it while one writes.
+    """
+    def __init__(self, path: str = "cassiopeia.sqlite", expirations: Mapping[type, float] = None, compression_level: int = 6) -> None:
+        self._path = path
+        self._compression_level = compression_level
+        if expirations is not None:
+            expirations = {globals()[key] if isinstance(key, str) else key: value for key, value in expirations.items()}
+        else:
+            expirations = default_expirations
+        self._expirations = {}
+        for type, value in expirations.items():
+            if isinstance(value, datetime.timedelta):
+                value = value.total_seconds()
+            self._expirations[type] = value
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads, so each thread opens its own
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self._path, timeout=30.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @DataSource.dispatch
+    def get(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> T:
+        pass
+
+    @DataSource.dispatch
+    def get_many(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> Iterable[T]:
+        pass
+
+    @DataSink.dispatch
+    def put(self, type: Type[T], item: T, context: PipelineContext = None) -> None:
+        pass
+
+    @DataSink.dispatch
+    def put_many(self, type: Type[T], items: Iterable[T], context: PipelineContext = None) -> None:
+        pass
+
+    def _load(self, type: Type[T], data: bytes) -> T:
+        item = type(json.loads(zlib.decompress(data).decode("utf-8")))
+        if "includedData" in item:
+            item["includedData"] = set(item["includedData"])
+        return item
+
+    def _get(self, type: Type[T], keys: List[str]) -> T:
+        now = time.time()
+        for key in keys:
+            row = self._connection().execute(
+                "SELECT objects.data FROM keys JOIN objects ON objects.id = keys.object_id "
+                "WHERE keys.type = ? AND keys.key = ? AND (objects.expires_at IS NULL OR objects.expires_at > ?)",
+                (type.__name__, key, now)).fetchone()
+            if row is not None:
+                return self._load(type, row[0])
+        raise NotFoundError
+
+    def _get_many(self, type: Type[T], keys: Iterable[List[str]]) -> Generator[T, None, None]:
+        # Everything is read up front so that a missing item is reported before any are returned
+        items = [self._get(type, item_keys) for item_keys in keys]
+
+        def generator():
+            yield from items
+
+        return generator()
+
+    def _put_many(self, type: Type[T], items: Iterable[T], key_function: Callable[[T], List[str]]) -> None:
+        expire_seconds = self._expirations.get(type, -1)
+        if expire_seconds == 0:
+            return
+        expires_at = time.time() + expire_seconds if expire_seconds != -1 else None
+        rows = []  # type: List[Tuple[List[str], bytes]]
+        for item in items:
+            data = zlib.compress(json.dumps(item, default=_encode, separators=(",", ":")).encode("utf-8"), self._compression_level)
+            rows.append((key_function(item), data))
+        if not rows:
+            return
+
+        connection = self._connection()
+        with connection:  # One transaction for the whole batch
+            for keys, data in rows:
+                # Replace whatever is stored under any of these keys
+                for key in keys:
+                    row = connection.execute("SELECT object_id FROM keys WHERE type = ? AND key = ?", (type.__name__, key)).fetchone()
+                    if row is not None:
+                        connection.execute("DELETE FROM keys WHERE object_id = ?", row)
+                        connection.execute("DELETE FROM objects WHERE id = ?", row)
+                object_id = connection.execute("INSERT INTO objects (type, data, expires_at) VALUES (?, ?, ?)", (type.__name__, data, expires_at)).lastrowid
+                connection.executemany("INSERT OR REPLACE INTO keys (type, key, object_id) VALUES (?, ?, ?)", [(type.__name__, key, object_id) for key in keys])
+
+    def _put(self, type: Type[T], item: T, key_function: Callable[[T], List[str]]) -> None:
+        self._put_many(type, [item], key_function)
+
+    def clear(self, type: Type[T] = None):
+        connection = self._connection()
+        with connection:
+            if type is None:
+                connection.execute("DELETE FROM keys")
+                connection.execute("DELETE FROM objects")
+            else:
+                connection.execute("DELETE FROM keys WHERE type = ?", (type.__name__,))
+                connection.execute("DELETE FROM objects WHERE type = ?", (type.__name__,))
+
+    def expire(self, type: Type[T] = None):
+        connection = self._connection()
+        now = time.time()
+        with connection:
+            if type is None:
+                expired = "SELECT id FROM objects WHERE expires_at <= ?"
+                parameters = (now,)
+            else:
+                expired = "SELECT id FROM objects WHERE type = ? AND expires_at <= ?"
+                parameters = (type.__name__, now)
+            connection.execute("DELETE FROM keys WHERE object_id IN ({expired})".format(expired=expired), parameters)
+            connection.execute("DELETE FROM objects WHERE id IN ({expired})".format(expired=expired), parameters)
+
+    #########
+    # Match #
+    #########
+
+    _validate_get_match_query = Query. \
+        has("id").as_(int).also. \
+        has("platform").as_(Platform)
+
+    @get.register(MatchDto)
+    @validate_query(_validate_get_match_query, convert_region_to_platform)
+    def get_match(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> MatchDto:
+        return self._get(MatchDto, _for_match_query(query))
+
+    _validate_get_many_match_query = Query. \
+        has("ids").as_(Iterable).also. \
+        has("platform").as_(Platform)
+
+    @get_many.register(MatchDto)
+    @validate_query(_validate_get_many_match_query, convert_region_to_platform)
+    def get_many_match(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> Generator[MatchDto, None, None]:
+        return self._get_many(MatchDto, ([_key(key) for key in keys] for keys in uniquekeys.for_many_match_query(query)))
+
+    @put.register(MatchDto)
+    def put_match(self, item: MatchDto, context: PipelineContext = None) -> None:
+        self._put(MatchDto, item, _for_match_dto)
+
+    @put_many.register(MatchDto)
+    def put_many_match(self, items: Iterable[MatchDto], context: PipelineContext = None) -> None:
+        self._put_many(MatchDto, items, _for_match_dto)
+
+    ############
+    # Timeline #
+    ############
+
+    @get.register(TimelineDto)
+    @validate_query(_validate_get_match_query, convert_region_to_platform)
+    def get_timeline(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> TimelineDto:
+        return self._get(TimelineDto, _for_timeline_query(query))
+
+    @get_many.register(TimelineDto)
+    @validate_query(_validate_get_many_match_query, convert_region_to_platform)
+    def get_many_timeline(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> Generator[TimelineDto, None, None]:
+        return self._get_many(TimelineDto, ([_key(key) for key in keys] for keys in uniquekeys.for_many_match_timeline_query(query)))
+
+    @put.register(TimelineDto)
+    def put_timeline(self, item: TimelineDto, context: PipelineContext = None) -> None:
+        self._put(TimelineDto, item, _for_timeline_dto)
+
+    @put_many.register(TimelineDto)
+    def put_many_timeline(self, items: Iterable[TimelineDto], context: PipelineContext = None) -> None:
+        self._put_many(TimelineDto, items, _for_timeline_dto)
+
+    ############
+    # Summoner #
+    ############
+
+    _validate_get_summoner_query = Query. \
+        has("id").as_(int). \
+        or_("account.id").as_(int). \
+        or_("name").as_(str).also. \
+        has("platform").as_(Platform)
+
+    @get.register(SummonerDto)
+    @validate_query(_validate_get_summoner_query, convert_region_to_platform)
+    def get_summoner(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> SummonerDto:
+        return self._get(SummonerDto, _for_summoner_query(query))
+
+    @put.register(SummonerDto)
+    def put_summoner(self, item: SummonerDto, context: PipelineContext = None) -> None:
+        self._put(SummonerDto, item, _for_summoner_dto)
+
+    @put_many.register(SummonerDto)
+    def put_many_summoner(self, items: Iterable[SummonerDto], context: PipelineContext = None) -> None:
+        self._put_many(SummonerDto, items, _for_summoner_dto)
+
+    ###############
+    # Static Data #
+    ###############
+
+    _validate_get_static_list_query = Query. \
+        has("platform").as_(Platform).also. \
+        can_have("version").as_(str).also. \
+        can_have("locale").also. \
+        can_have("includedData")
+
+    def _get_static_list(self, type: Type[T], query: MutableMapping[str, Any]) -> T:
+        return self._get(type, _for_static_list_query(query))
+
+    def _put_static_lists(self, type: Type[T], items: Iterable[T]) -> None:
+        self._put_many(type, (item for item in items if _complete_static_list(item)), _for_static_list_dto)
+
+    @get.register(ChampionListDto)
+    @validate_query(_validate_get_static_list_query, convert_region_to_platform)
+    def get_champion_list(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> ChampionListDto:
+        return self._get_static_list(ChampionListDto, query)
+
+    @put.register(ChampionListDto)
+    def put_champion_list(self, item: ChampionListDto, context: PipelineContext = None) -> None:
+        self._put_static_lists(ChampionListDto, [item])
+
+    @get.register(RuneListDto)
+    @validate_query(_validate_get_static_list_query, convert_region_to_platform)
+    def get_rune_list(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> RuneListDto:
+        return self._get_static_list(RuneListDto, query)
+
+    @put.register(RuneListDto)
+    def put_rune_list(self, item: RuneListDto, context: PipelineContext = None) -> None:
+        self._put_static_lists(RuneListDto, [item])
+
+    @get.register(ItemListDto)
+    @validate_query(_validate_get_static_list_query, convert_region_to_platform)
+    def get_item_list(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> ItemListDto:
+        return self._get_static_list(ItemListDto, query)
+
+    @put.register(ItemListDto)
+    def put_item_list(self, item: ItemListDto, context: PipelineContext = None) -> None:
+        self._put_static_lists(ItemListDto, [item])
+
+    @get.register(SummonerSpellListDto)
+    @validate_query(_validate_get_static_list_query, convert_region_to_platform)
+    def get_summoner_spell_list(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> SummonerSpellListDto:
+        return self._get_static_list(SummonerSpellListDto, query)
+
+    @put.register(SummonerSpellListDto)
+    def put_summoner_spell_list(self, item: SummonerSpellListDto, context: PipelineContext = None) -> None:
+        self._put_static_lists(SummonerSpellListDto, [item])
+
+    @get.register(MapListDto)
+    @validate_query(_validate_get_static_list_query, convert_region_to_platform)
+    def get_map_list(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> MapListDto:
+        return self._get_static_list(MapListDto, query)
+
+    @put.register(MapListDto)
+    def put_map_list(self, item: MapListDto, context: PipelineContext = None) -> None:
+        self._put_static_lists(MapListDto, [item])
+
+    @get.register(ProfileIconDataDto)
+    @validate_query(_validate_get_static_list_query, convert_region_to_platform)
+    def get_profile_icons(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> ProfileIconDataDto:
+        return self._get_static_list(ProfileIconDataDto, query)
+
+    @put.register(ProfileIconDataDto)
+    def put_profile_icons(self, item: ProfileIconDataDto, context: PipelineContext = None) -> None:
+        self._put_static_lists(ProfileIconDataDto, [item])
+
+    @get.register(LanguageStringsDto)
+    @validate_query(_validate_get_static_list_query, convert_region_to_platform)
+    def get_language_strings(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> LanguageStringsDto:
+        return self._get_static_list(LanguageStringsDto, query)
+
+    @put.register(LanguageStringsDto)
+    def put_language_strings(self, item: LanguageStringsDto, context: PipelineContext = None) -> None:
+        self._put_static_lists(LanguageStringsDto, [item])
+
+    _validate_get_region_query = Query. \
+        has("platform").as_(Platform)
+
+    @get.register(RealmDto)
+    @validate_query(_validate_get_region_query, convert_region_to_platform)
+    def get_realms(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> RealmDto:
+        return self._get(RealmDto, _for_region_query(query))
+
+    @put.register(RealmDto)
+    def put_realms(self, item: RealmDto, context: PipelineContext = None) -> None:
+        self._put(RealmDto, item, _for_region_dto)
+
+    @get.register(VersionListDto)
+    @validate_query(_validate_get_region_query, convert_region_to_platform)
+    def get_versions(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> VersionListDto:
+        return self._get(VersionListDto, _for_region_query(query))
+
+    @put.register(VersionListDto)
+    def put_versions(self, item: VersionListDto, context: PipelineContext = None) -> None:
+        self._put(VersionListDto, item, _for_region_dto)
+
+    @get.register(LanguagesDto)
+    @validate_query(_validate_get_region_query, convert_region_to_platform)
+    def get_languages(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> LanguagesDto:
+        return self._get(LanguagesDto, _for_region_query(query))
+
+    @put.register(LanguagesDto)
+    def put_languages(self, item: LanguagesDto, context: PipelineContext = None) -> None:
+        self._put(LanguagesDto, item, _for_region_dto)
@@ -1,5 +1,38 @@
+import pickle
+
+# The version of the format DTOs are pickled in. It's increased whenever that format changes, so that DTOs pickled by
+# one version of Cassiopeia aren't silently misread by another.
+_PICKLE_VERSION = 1
+
+
+def _unpickle_dto(cls, version, data, raw_json):
+    if version != _PICKLE_VERSION:
+        raise ValueError("{cls} was pickled in format version {version}, but only version {supported} can be read".format(cls=cls.__name__, version=version, supported=_PICKLE_VERSION))
+    dto = cls(data)
+    if raw_json is not None:
+        dto.raw_json = raw_json
+    return dto
+
+
 class DtoObject(dict):
+    # The UTF-8 JSON this DTO was decoded from, if it was kept (see `cassiopeia.datastores.common.set_json_decoder`).
+    # Fields added to the DTO after it was decoded (e.g. its region) aren't in it, and it isn't updated when the DTO is
+    # changed, so whatever changes a DTO's data in any other way must set it to None.
+    raw_json = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if args and getattr(args[0], "raw_json", None) is not None:
+            self.raw_json = args[0].raw_json
 
     @property
     def __dict__(self):
         return {k: v for k, v in self.items()}
+
+    def __reduce_ex__(self, protocol):
+        # With protocol 5, the raw JSON can be passed out-of-band (see `pickle.PickleBuffer`) instead of being copied
+        # into the pickle. It's then read back as whatever bytes-like object the buffer is given as.
+        raw_json = self.raw_json
+        if raw_json is not None and protocol >= 5:
+            raw_json = pickle.PickleBuffer(raw_json)
+        return _unpickle_dto, (self.__class__, _PICKLE_VERSION, dict(self), raw_json)
@@ -0,0 +1,138 @@
+import json
+import os
+
+import pytest
+from datapipelines import NotFoundError
+
+from cassiopeia.data import Platform
+from cassiopeia.dto.match import MatchDto, TimelineDto
+from cassiopeia.core.match import MatchData
+from cassiopeia.datastores.archive import MatchArchive
+from cassiopeia.datastores.common import JSONObject
+from cassiopeia.datastores.riotapi.match import MatchAPI
+from cassiopeia.datastores.riotapi.ratelimits import RiotAPIRateLimiter
+
+
+def _match(game_id: int, duration: int = 1800) -> MatchDto:
+    return MatchDto(region="NA", gameId=game_id, gameDuration=duration, participants=[{"participantId": 1, "championId": 7}])
+
+
+def _query(game_id: int) -> dict:
+    return {"platform": Platform.north_america, "id": game_id}
+
+
+def test_matches_are_found_after_reopening(tmpdir):
+    path = str(tmpdir)
+    archive = MatchArchive(path)
+    archive.put_many(MatchDto, [_match(1), _match(2)])
+    archive.put(TimelineDto, TimelineDto(region="NA", matchId=1, frameInterval=60000))
+    archive.close()
+
+    archive = MatchArchive(path)
+    assert archive.get(MatchDto, _query(1)) == _match(1)
+    assert archive.get(TimelineDto, _query(1)) == TimelineDto(region="NA", matchId=1, frameInterval=60000)
+    with pytest.raises(NotFoundError):
+        archive.get(TimelineDto, _query(2))
+    with pytest.raises(NotFoundError):
+        archive.get(MatchDto, {"platform": Platform.europe_west, "id": 1})
+    archive.close()
+
+
+def test_storing_a_match_again_returns_the_newest_copy(tmpdir):
+    path = str(tmpdir)
+    archive = MatchArchive(path)
+    archive.put(MatchDto, _match(1, duration=1))
+    archive.put(MatchDto, _match(1, duration=2))
+    assert archive.get(MatchDto, _query(1))["gameDuration"] == 2
+    archive.close()
+
+    assert MatchArchive(path).get(MatchDto, _query(1))["gameDuration"] == 2
+
+
+def test_a_partly_written_record_is_cut_off(tmpdir):
+    path = str(tmpdir)
+    archive = MatchArchive(path)
+    archive.put_many(MatchDto, [_match(1), _match(2)])
+    archive.close()
+    segment = os.path.join(path, "MatchDto", "00000000.seg")
+    with open(segment, "r+b") as file:
+        file.truncate(os.path.getsize(segment) - 3)
+
+    archive = MatchArchive(path)
+    assert archive.get(MatchDto, _query(1)) == _match(1)
+    with pytest.raises(NotFoundError):
+        archive.get(MatchDto, _query(2))
+    archive.put(MatchDto, _match(3))
+    archive.close()
+
+    assert MatchArchive(path).get(MatchDto, _query(3)) == _match(3)
+
+
+def test_full_segments_are_followed_by_new_ones(tmpdir):
+    path = str(tmpdir)
+    archive = MatchArchive(path, segment_size=1)
+    archive.put_many(MatchDto, [_match(game_id) for game_id in range(3)])
+
+    assert sorted(os.listdir(os.path.join(path, "MatchDto"))) == ["00000000.seg", "00000001.seg", "00000002.seg"]
+    assert [match["gameId"] for match in archive.get_many(MatchDto, {"platform": Platform.north_america, "ids": [2, 0, 1]})] == [2, 0, 1]
+    archive.close()
+
+
+def test_get_many_fails_before_returning_anything_if_one_is_missing(tmpdir):
+    archive = MatchArchive(str(tmpdir))
+    archive.put(MatchDto, _match(1))
+
+    with pytest.raises(NotFoundError):
+        archive.get_many(MatchDto, {"platform": Platform.north_america, "ids": [1, 2]})
+    archive.clear()
+    with pytest.raises(NotFoundError):
+        archive.get(MatchDto, _query(1))
+    archive.close()
+
+
+def _response() -> JSONObject:
+    # A match as the Riot API returns it, with a bot whose participant has no runes
+    body = {"gameDuration": 1800,
+            "participants": [{"participantId": 1, "teamId": 100, "stats": {"kills": 1}}],
+            "participantIdentities": [{"participantId": 1, "player": {"currentAccountId": 0, "summonerName": "Bot"}}]}
+    return JSONObject(body, json.dumps(body).encode("utf-8"))
+
+
+def _match_api(responses) -> MatchAPI:
+    api = MatchAPI("RGAPI-test", RiotAPIRateLimiter(1.0))
+    api._get = lambda url, parameters, rate_limiter: responses.pop(0)
+    api._get_many = lambda requests, rate_limiter: iter([responses.pop(0) for _ in requests])
+    return api
+
+
+def test_matches_changed_by_the_riot_api_service_are_stored_as_changed(tmpdir):
+    archive = MatchArchive(str(tmpdir))
+    api = _match_api([_response(), _response()])
+
+    archive.put(MatchDto, api.get(MatchDto, _query(1)))
+    archive.put_many(MatchDto, api.get_many(MatchDto, {"platform": Platform.north_america, "ids": [2]}))
+
+    match = archive.get(MatchDto, _query(1))
+    assert match["participantIdentities"][0]["player"]["bot"] is True
+    assert match["gameId"] == 1
+    match = archive.get(MatchDto, _query(2))
+    assert match["participants"][0]["runes"] == []
+    assert match["participantIdentities"][0]["player"]["bot"] is True
+    archive.close()
+
+
+def test_unchanged_matches_are_stored_as_they_were_received(tmpdir):
+    archive = MatchArchive(str(tmpdir))
+    response = _response()
+    response["participantIdentities"][0]["player"]["currentAccountId"] = 1
+    response.raw_json = json.dumps(response).encode("utf-8")
+    match = _match_api([response]).get(MatchDto, _query(1))
+    assert match.raw_json is response.raw_json
+
+    # Reading the match builds its participants, which mustn't change the DTO whose raw JSON is stored
+    assert MatchData(**match).participants[0].summonerName == "Bot"
+    assert "player" not in match["participants"][0]
+    archive.put(MatchDto, match)
+
+    assert archive.get(MatchDto, _query(1)) == dict(json.loads(response.raw_json.decode("utf-8")), gameId=1, region="NA")
+    archive.close()
@@ -0,0 +1,90 @@
+import pytest
+from datapipelines import NotFoundError, PipelineContext
+
+from cassiopeia.data import Platform
+from cassiopeia.core.summoner import Summoner
+from cassiopeia.datastores.cache import Cache
+
+
+def _not_found():
+    raise NotFoundError
+
+
+def _query(id: int) -> dict:
+    return {"platform": Platform.north_america, "id": id}
+
+
+def _missed_keys(cache: Cache, id: int) -> list:
+    # The keys of a summoner the cache doesn't have, as the pipeline gets them
+    context = PipelineContext()
+    with pytest.raises(NotFoundError):
+        cache.get(Summoner, _query(id), context)
+    return cache.lookup_keys(Summoner, context)
+
+
+def test_a_miss_leaves_the_keys_it_looked_up_in_the_context():
+    cache = Cache()
+    cache.put(Summoner, Summoner(id=1, region="NA"))
+
+    assert _missed_keys(cache, 2) == [(Summoner, Summoner, ("NA1", 2))]
+    assert cache.lookup_keys(Summoner, PipelineContext()) == []
+
+
+def test_tombstone_skips_the_pipeline_until_the_object_is_put():
+    cache = Cache(tombstone_expirations={"Summoner": 60})
+    keys = _missed_keys(cache, 1)
+    calls = []
+
+    with pytest.raises(NotFoundError):
+        cache.single_flight(keys, _not_found)
+    with pytest.raises(NotFoundError):
+        cache.single_flight(keys, lambda: calls.append(1))
+    assert calls == []
+
+    cache.put(Summoner, Summoner(id=1, region="NA"))
+    assert cache.single_flight(keys, lambda: "found") == "found"
+
+
+def test_tombstones_dont_evict_or_count_as_cached_objects():
+    cache = Cache(max_entries=1, tombstone_expirations={"Summoner": 60})
+    cache.put(Summoner, Summoner(id=1, region="NA"))
+
+    for id in range(2, 10):
+        with pytest.raises(NotFoundError):
+            cache.single_flight(_missed_keys(cache, id), _not_found)
+
+    assert cache.get(Summoner, _query(1)).id == 1
+    assert set(cache.stats()) == {Summoner}
+    assert cache.stats()[Summoner]["entries"] == 1
+
+
+def test_tombstones_are_bounded():
+    cache = Cache(tombstone_expirations={"Summoner": 60}, max_tombstones=2)
+    keys = {id: _missed_keys(cache, id) for id in range(1, 4)}
+    calls = []
+
+    for id in range(1, 4):
+        with pytest.raises(NotFoundError):
+            cache.single_flight(keys[id], _not_found)
+
+    # The oldest tombstone was dropped, so that query goes down the pipeline again
+    assert cache.single_flight(keys[1], lambda: calls.append(1) or "found") == "found"
+    with pytest.raises(NotFoundError):
+        cache.single_flight(keys[3], lambda: calls.append(3))
+    assert calls == [1]
+
+
+def test_each_lookup_is_one_hit_or_one_miss():
+    cache = Cache()
+    cache.put(Summoner, Summoner(id=1, region="NA"))
+    cache.put(Summoner, Summoner(id=2, region="NA"))
+
+    assert cache.get(Summoner, _query(1)).id == 1
+    with pytest.raises(NotFoundError):
+        cache.get(Summoner, _query(3))
+    assert [summoner.id for summoner in cache.get_many(Summoner, {"platform": Platform.north_america, "ids": [1, 2]})] == [1, 2]
+    with pytest.raises(NotFoundError):
+        list(cache.get_many(Summoner, {"platform": Platform.north_america, "ids": [2, 3]}))
+
+    stats = cache.stats()[Summoner]
+    assert (stats["hits"], stats["misses"], stats["puts"]) == (4, 2, 2)
@@ -0,0 +1,152 @@
+import time
+
+import pytest
+
+from cassiopeia.datastores.cachestorage import CacheStorage, EvictionPolicy, approximate_size
+
+
+class A(object):
+    pass
+
+
+class B(object):
+    pass
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    storage = CacheStorage(max_entries=2)
+    storage.put(A, [1], "one")
+    storage.put(A, [2], "two")
+    storage.get(A, 1)
+    storage.put(A, [3], "three")
+
+    assert storage.get(A, 1) == "one"
+    assert storage.get(A, 3) == "three"
+    with pytest.raises(KeyError):
+        storage.get(A, 2)
+
+
+def test_lfu_evicts_the_least_often_used_entry():
+    storage = CacheStorage(max_entries=2, eviction_policy=EvictionPolicy.lfu)
+    storage.put(A, [1], "one")
+    storage.put(A, [2], "two")
+    storage.get(A, 1)
+    storage.get(A, 1)
+    storage.get(A, 2)
+    storage.put(A, [3], "three")
+    storage.get(A, 3)
+    storage.put(A, [4], "four")
+
+    assert storage.get(A, 1) == "one"
+    assert storage.get(A, 4) == "four"
+    with pytest.raises(KeyError):
+        storage.get(A, 3)
+
+
+def test_max_bytes_bounds_the_approximate_size():
+    value = "x" * 1000
+    storage = CacheStorage(max_bytes=3 * approximate_size(value))
+    for key in range(10):
+        storage.put(A, [key], "x" * 1000)
+
+    stats = storage.stats()[A]
+    assert stats["entries"] == 3
+    assert stats["evictions"] == 7
+    assert stats["bytes"] <= 3 * approximate_size(value)
+
+
+def test_per_type_bounds_only_evict_that_type():
+    storage = CacheStorage(max_entries_per_type={A: 1})
+    storage.put(B, [1], "b")
+    storage.put(A, [1], "one")
+    storage.put(A, [2], "two")
+
+    assert storage.get(B, 1) == "b"
+    assert storage.get(A, 2) == "two"
+    with pytest.raises(KeyError):
+        storage.get(A, 1)
+
+
+def test_an_entry_with_several_keys_is_one_entry():
+    storage = CacheStorage(max_entries=2)
+    storage.put(A, [1, "one"], "one")
+    storage.put(A, [2, "two"], "two")
+
+    assert storage.get(A, "one") is storage.get(A, 1)
+    assert storage.stats()[A]["entries"] == 2
+    storage.delete(A, "one")
+    with pytest.raises(KeyError):
+        storage.get(A, 1)
+
+
+def test_expired_entries_arent_returned():
+    storage = CacheStorage()
+    storage.put(A, [1], "one", expire_seconds=0.05)
+    storage.put(A, [2], "two")
+    time.sleep(0.1)
+
+    with pytest.raises(KeyError):
+        storage.get(A, 1)
+    assert storage.get(A, 2) == "two"
+    assert storage.stats()[A]["expirations"] == 1
+
+
+def test_sweep_removes_expired_entries_soonest_first():
+    storage = CacheStorage()
+    for key in range(5):
+        storage.put(A, [key], key, expire_seconds=0.01 * (key + 1))
+    storage.put(A, [5], 5, expire_seconds=60)
+    time.sleep(0.1)
+
+    assert storage.sweep(limit=2) == 2
+    assert not storage.contains(A, 0) and not storage.contains(A, 1)
+    assert len(storage._data[A]) == 4
+    assert storage.sweep() == 3
+    assert list(storage._data[A]) == [5]
+
+
+def test_sweep_skips_entries_that_were_replaced():
+    storage = CacheStorage()
+    storage.put(A, [1], "old", expire_seconds=0.05)
+    storage.put(A, [1], "new", expire_seconds=60)
+    time.sleep(0.1)
+
+    assert storage.sweep() == 0
+    assert storage.get(A, 1) == "new"
+
+
+def test_background_sweeper_removes_expired_entries():
+    storage = CacheStorage(sweep_interval=0.05)
+    try:
+        storage.put(A, [1], "one", expire_seconds=0.01)
+        deadline = time.monotonic() + 2
+        while storage._data[A] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stats = storage.stats()[A]
+        assert stats["entries"] == 0
+        assert stats["expirations"] == 1
+    finally:
+        storage.stop_sweeping()
+
+
+def test_stale_entries_are_only_returned_by_lookup():
+    storage = CacheStorage()
+    storage.put(A, [1], "one", expire_seconds=0.05, stale_seconds=60)
+    time.sleep(0.1)
+
+    assert storage.lookup(A, 1) == ("one", True)
+    assert not storage.contains(A, 1)
+    with pytest.raises(KeyError):
+        storage.get(A, 1)
+    assert storage.sweep() == 0
+
+
+def test_putting_under_a_shared_key_replaces_the_whole_entry():
+    storage = CacheStorage()
+    storage.put(A, [1, "one"], "old")
+    storage.put(A, ["uno", 1], "new")
+
+    assert storage.get(A, 1) == storage.get(A, "uno") == "new"
+    with pytest.raises(KeyError):
+        storage.get(A, "one")
+    assert storage.stats()[A]["entries"] == 1
@@ -0,0 +1,79 @@
+import socket
+import time
+from typing import Type, TypeVar, MutableMapping, Any, Iterable
+
+import pycurl
+import pytest
+from datapipelines import DataSource, PipelineContext
+
+from cassiopeia.data import Platform
+from cassiopeia.datastores.riotapi.circuitbreaker import CircuitBreaker, CircuitBreakers, CircuitState
+from cassiopeia.datastores.riotapi.common import RiotAPIService
+from cassiopeia.datastores.riotapi.ratelimits import RiotAPIRateLimiter
+
+T = TypeVar("T")
+
+
+def test_circuit_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("na1:match", failure_threshold=3)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state is CircuitState.closed
+
+    breaker.record_failure()
+    assert breaker.state is CircuitState.open
+    assert not breaker.allow_request()
+
+
+def test_half_open_circuit_lets_probes_through():
+    breaker = CircuitBreaker("na1:match", failure_threshold=1, recovery_timeout=0.05, probe_requests=1)
+    breaker.record_failure()
+    time.sleep(0.1)
+
+    assert breaker.state is CircuitState.half_open
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_neutral()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state is CircuitState.open
+
+    time.sleep(0.1)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state is CircuitState.closed
+
+
+class _BatchService(RiotAPIService):
+    def __init__(self, circuit_breakers: CircuitBreakers):
+        super().__init__("RGAPI-test", RiotAPIRateLimiter(1.0), max_concurrent_requests=3, circuit_breakers=circuit_breakers)
+
+    @DataSource.dispatch
+    def get(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> T:
+        pass
+
+    @DataSource.dispatch
+    def get_many(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> Iterable[T]:
+        pass
+
+
+def _closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return "http://127.0.0.1:{}/closed".format(port)
+
+
+def test_batch_transport_errors_count_as_failures():
+    breakers = CircuitBreakers(failure_threshold=1)
+    service = _BatchService(breakers)
+    rate_limiter = service._get_rate_limiter(Platform.north_america, "match")
+    url = _closed_port_url()
+
+    with pytest.raises(pycurl.error):
+        list(service._get_many([(url, {}), (url, {})], rate_limiter))
+
+    assert breakers.get(rate_limiter.name).state is CircuitState.open
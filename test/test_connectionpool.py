@@ -0,0 +1,101 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pycurl
+import pytest
+
+from cassiopeia.datastores.common import ConnectionPool, HTTPClient, AsyncHTTPClient
+
+
+def _closed(curl) -> bool:
+    try:
+        curl.getinfo(pycurl.EFFECTIVE_URL)
+    except pycurl.error:
+        return True
+    return False
+
+
+def test_released_handles_are_reused_for_the_same_host():
+    pool = ConnectionPool()
+    curl = pool.acquire("https://na1.api.riotgames.com/lol/a")
+    pool.release("https://na1.api.riotgames.com/lol/a", curl)
+
+    assert pool.acquire("https://euw1.api.riotgames.com/lol/a") is not curl
+    assert pool.acquire("https://na1.api.riotgames.com/lol/b") is curl
+    assert pool.acquire("https://na1.api.riotgames.com/lol/b") is not curl
+
+
+def test_at_most_max_size_handles_are_kept_per_host():
+    pool = ConnectionPool(max_size=2)
+    url = "https://na1.api.riotgames.com/lol/a"
+    handles = [pool.acquire(url) for _ in range(3)]
+    for curl in handles:
+        pool.release(url, curl)
+
+    assert _closed(handles[2])
+    assert {pool.acquire(url), pool.acquire(url)} == set(handles[:2])
+    assert pool.acquire(url) not in handles
+
+
+def test_idle_handles_are_closed():
+    pool = ConnectionPool(idle_timeout=0.05)
+    url = "https://na1.api.riotgames.com/lol/a"
+    curl = pool.acquire(url)
+    pool.release(url, curl)
+    time.sleep(0.1)
+
+    assert pool.acquire(url) is not curl
+    assert _closed(curl)
+
+
+def test_handles_released_without_reuse_are_closed():
+    pool = ConnectionPool()
+    url = "https://na1.api.riotgames.com/lol/a"
+    curl = pool.acquire(url)
+    pool.release(url, curl, reuse=False)
+
+    assert _closed(curl)
+    assert pool.acquire(url) is not curl
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keeps the connection open between requests
+
+    def do_GET(self):
+        self.server.client_ports.append(self.client_address[1])
+        body = json.dumps({"path": self.path}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json;charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def httpd():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.client_ports = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_sync_and_async_clients_share_connections(httpd):
+    url = "http://127.0.0.1:{}".format(httpd.server_address[1])
+    client = HTTPClient()
+    async_client = AsyncHTTPClient(connection_pool=client.connection_pool)
+
+    assert client.get(url + "/1")[0] == {"path": "/1"}
+    assert asyncio.run(async_client.get(url + "/2"))[0] == {"path": "/2"}
+    assert client.get(url + "/3")[0] == {"path": "/3"}
+
+    # All three requests were sent over the same connection
+    assert len(set(httpd.client_ports)) == 1
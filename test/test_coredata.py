@@ -0,0 +1,80 @@
+from cassiopeia.core.common import CoreData, lazy_field, _Raw
+from cassiopeia.core.match import PositionData, ParticipantStatsData, TimelineData, MatchData
+
+
+def test_slotted_data_keeps_declared_and_undeclared_fields():
+    position = PositionData(x=1, y=2, z=3)
+
+    assert position.to_dict() == {"x": 1, "y": 2, "z": 3}
+    assert PositionData(x=1).to_dict() == {"x": 1}
+
+
+def test_only_undeclared_fields_are_kept_in_the_overflow():
+    stats = ParticipantStatsData(participantId=1, kills=2, deaths=3)
+    larger = ParticipantStatsData(participantId=1, kills=2, deaths=3, somethingNew=4)
+
+    assert stats.to_dict() == {"participantId": 1, "kills": 2, "deaths": 3}
+    assert larger.to_dict() == {"participantId": 1, "kills": 2, "deaths": 3, "somethingNew": 4}
+    assert larger.somethingNew == 4
+    assert larger._overflow == {"somethingNew": 4}
+    assert not hasattr(stats, "_overflow")
+    assert not hasattr(larger, "__dict__")
+
+
+def test_renamed_fields_are_stored_under_their_new_names():
+    timeline = TimelineData(matchId=1, frameInterval=60000)
+
+    assert timeline.id == 1
+    assert timeline.to_dict() == {"id": 1, "frame_interval": 60000}
+
+
+class _Built(CoreData):
+    _fields = ("id",)
+    _renamed = {}
+    builds = 0
+
+    def __call__(self, **kwargs):
+        if "children" in kwargs:
+            _Built.children.set_raw(self, kwargs.pop("children"))
+        super().__call__(**kwargs)
+        return self
+
+    @lazy_field
+    def children(self, children):
+        _Built.builds += 1
+        return [PositionData(**child) for child in children]
+
+
+def test_lazy_field_is_built_once_when_first_read():
+    _Built.builds = 0
+    data = _Built(id=1, children=[{"x": 1, "y": 2}])
+    assert _Built.builds == 0
+
+    children = data.children
+    assert data.children is children
+    assert _Built.builds == 1
+    assert children[0].x == 1
+
+
+def test_lazy_field_can_be_set_and_is_listed_by_its_name():
+    data = _Built(id=1, children=[{"x": 1, "y": 2}])
+
+    assert _Built._fields == ("id",)
+    assert _Built.__slots__ == ("id", "_children", "_overflow")
+    assert data.to_dict() == {"id": 1, "children": [{"x": 1, "y": 2}]}
+    data.children = []
+    assert data.to_dict() == {"id": 1, "children": []}
+    assert _Built(id=2).to_dict() == {"id": 2}
+
+
+def test_match_participants_and_teams_are_built_from_the_dto():
+    match = MatchData(gameId=1, gameDuration=60,
+                      participants=[{"participantId": 2, "teamId": 200, "stats": {"kills": 1}}, {"participantId": 1, "teamId": 100, "stats": {"kills": 2}}],
+                      participantIdentities=[{"participantId": 1, "player": {"summonerName": "Blue"}}, {"participantId": 2, "player": {"summonerName": "Red"}}],
+                      teams=[{"teamId": 100, "win": "Win"}, {"teamId": 200, "win": "Fail"}])
+
+    assert isinstance(match._participants, _Raw)
+    assert [participant.summonerName for participant in match.participants] == ["Blue", "Red"]
+    assert match.participants[1].stats.kills == 1
+    assert [[participant.id for participant in team.participants] for team in match.teams] == [[1], [2]]
+    assert [team.isWinner for team in match.teams] == [True, False]
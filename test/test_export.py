@@ -0,0 +1,41 @@
+import io
+import json
+import os
+
+from cassiopeia import export_ndjson
+from cassiopeia.core.match import Match, MatchData, Timeline, TimelineData
+
+
+def _match(id: int) -> Match:
+    data = MatchData(gameId=id, region="NA", gameCreation=1500000000000, gameDuration=1800,
+                     participants=[{"participantId": 1, "teamId": 100, "stats": {"kills": 1}}],
+                     participantIdentities=[{"participantId": 1, "player": {"summonerName": "Blue"}}],
+                     teams=[{"teamId": 100, "win": "Win", "bans": [{"championId": 7}]}])
+    return Match.from_data(data, loaded_groups={MatchData})
+
+
+def _timeline(id: int) -> Timeline:
+    data = TimelineData(matchId=id, region="NA", frameInterval=60000,
+                        frames=[{"timestamp": 0, "events": [{"type": "ITEM_PURCHASED", "timestamp": 10, "itemId": 1001}],
+                                 "participantFrames": {"1": {"participantId": 1, "totalGold": 500, "position": {"x": 1, "y": 2}}}}])
+    return Timeline.from_data(data, loaded_groups={TimelineData})
+
+
+def test_each_line_has_the_same_data_as_to_json():
+    file = io.BytesIO()
+    objects = [_match(1), _timeline(1)]
+
+    assert export_ndjson(objects, file) == 2
+
+    lines = file.getvalue().decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == [json.loads(obj.to_json()) for obj in objects]
+
+
+def test_objects_are_exported_from_a_generator_to_a_path(tmpdir):
+    path = os.path.join(str(tmpdir), "matches.ndjson")
+
+    assert export_ndjson((_match(id) for id in range(100)), path) == 100
+
+    with open(path, "rb") as file:
+        lines = file.read().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == list(range(100))
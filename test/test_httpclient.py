@@ -0,0 +1,135 @@
+import json
+import functools
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Type, TypeVar, MutableMapping, Any, Iterable
+
+import pycurl
+import pytest
+from datapipelines import DataSource, PipelineContext
+
+from cassiopeia.data import Platform
+from cassiopeia.datastores.common import HTTPClient
+from cassiopeia.datastores.riotapi.common import RiotAPIService, ExponentialBackoff
+from cassiopeia.datastores.riotapi.ratelimits import RiotAPIRateLimiter
+
+T = TypeVar("T")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        with self.server.lock:
+            # "/flaky" fails the first time it's requested
+            status = 502 if self.path == "/flaky" and self.path not in self.server.served else 200
+            self.server.served.append(self.path)
+        if self.path.startswith("/slow"):
+            time.sleep(0.2)
+        body = json.dumps({"path": self.path}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def httpd():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.lock = threading.Lock()
+    httpd.served = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def server(httpd):
+    return "http://127.0.0.1:{}".format(httpd.server_address[1])
+
+
+def _closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return "http://127.0.0.1:{}/closed".format(port)
+
+
+def _get_many_in_thread(client, requests, timeout, **kwargs):
+    # Runs the whole batch on another thread so that a deadlock fails the test instead of hanging it
+    results = []
+    thread = threading.Thread(target=lambda: results.extend(client.get_many(requests, **kwargs)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "get_many didn't finish; got {} responses".format(len(results))
+    return results
+
+
+def test_get_many_returns_every_response(server):
+    client = HTTPClient()
+    requests = [(server + "/{}".format(i), None) for i in range(5)]
+    results = _get_many_in_thread(client, requests, timeout=10, max_concurrent=3)
+
+    assert sorted(index for index, _ in results) == list(range(5))
+    for index, (body, headers) in results:
+        assert body == {"path": "/{}".format(index)}
+
+
+def test_get_many_doesnt_deadlock_when_the_window_is_full(server):
+    # The window only starts once a request in it completes, so the requests that are waiting for a permit depend on
+    # the ones in flight being driven to completion
+    limiter = RiotAPIRateLimiter(1.0)
+    limiter.adjust_rate_limits_if_necessary([[2, 1]])
+    permit = limiter.scheduler.permit(limiter)
+    client = HTTPClient()
+    requests = [(server + "/{}".format(i), None) for i in range(4)]
+
+    results = _get_many_in_thread(client, requests, timeout=10, rate_limiters=[permit], max_concurrent=3)
+
+    assert sorted(index for index, _ in results) == list(range(4))
+    assert limiter.permits_issued == 4
+    assert limiter._windows[0].in_flight == 0
+
+
+def test_get_many_yields_transport_errors_per_request(server):
+    client = HTTPClient()
+    requests = [(server + "/0", None), (_closed_port_url(), None), (server + "/2", None)]
+
+    results = dict(_get_many_in_thread(client, requests, timeout=10, max_concurrent=3))
+
+    assert isinstance(results[1], pycurl.error)
+    assert results[0][0] == {"path": "/0"}
+    assert results[2][0] == {"path": "/2"}
+
+
+class _BatchService(RiotAPIService):
+    def __init__(self):
+        super().__init__("RGAPI-test", RiotAPIRateLimiter(1.0), max_concurrent_requests=3)
+        self._handlers[502] = functools.partial(ExponentialBackoff, initial_backoff=0.01, backoff_factor=2.0, max_attempts=2)
+
+    @DataSource.dispatch
+    def get(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> T:
+        pass
+
+    @DataSource.dispatch
+    def get_many(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> Iterable[T]:
+        pass
+
+
+def test_batch_carries_on_while_a_request_is_retried(httpd, server):
+    service = _BatchService()
+    rate_limiter = service._get_rate_limiter(Platform.north_america, "match")
+    paths = ["/flaky", "/slow/1", "/slow/2", "/slow/3", "/slow/4"]
+
+    results = list(service._get_many([(server + path, {}) for path in paths], rate_limiter))
+
+    assert [result["path"] for result in results] == paths
+    assert sorted(httpd.served) == sorted(paths + ["/flaky"])
+    # The retry is parked while the batch is still sending its requests, so it doesn't hold up the ones after it
+    assert httpd.served.index("/flaky", 1) < httpd.served.index("/slow/4")
@@ -0,0 +1,62 @@
+import pickle
+
+import pytest
+
+from cassiopeia.core.common import _unpickle_ghost, _Raw
+from cassiopeia.core.match import Match, MatchData
+from cassiopeia.dto.common import _unpickle_dto
+from cassiopeia.dto.match import MatchDto
+
+
+def _match() -> Match:
+    data = MatchData(gameId=1, region="NA", gameCreation=1500000000000, gameDuration=1800,
+                     participants=[{"participantId": 1, "teamId": 100, "stats": {"kills": 1}}],
+                     participantIdentities=[{"participantId": 1, "player": {"summonerName": "Blue"}}],
+                     teams=[{"teamId": 100, "win": "Win", "bans": [{"championId": 7}]}])
+    return Match.from_data(data, loaded_groups={MatchData})
+
+
+@pytest.mark.parametrize("protocol", [2, pickle.HIGHEST_PROTOCOL])
+def test_loaded_ghost_is_still_loaded_after_unpickling(protocol):
+    match = _match()
+    match.participants  # Caches a lazy property, which isn't pickled
+
+    copy = pickle.loads(pickle.dumps(match, protocol=protocol))
+
+    assert not any(key.startswith("_lazy__") for key in vars(copy))
+    assert copy._Ghost__all_loaded
+    assert copy.to_json() == match.to_json()
+    assert copy.participants[0].stats.kills == 1
+
+
+def test_unbuilt_lazy_fields_are_pickled_unbuilt():
+    match = _match()
+
+    copy = pickle.loads(pickle.dumps(match))
+
+    assert isinstance(copy._data[MatchData]._participants, _Raw)
+    assert copy.teams[0].participants[0].stats.kills == 1
+
+
+def test_dto_raw_json_is_passed_out_of_band():
+    dto = MatchDto(region="NA", gameId=1)
+    dto.raw_json = b'{"gameId":1}'
+    buffers = []
+
+    data = pickle.dumps(dto, protocol=5, buffer_callback=buffers.append)
+    copy = pickle.loads(data, buffers=buffers)
+
+    assert len(buffers) == 1
+    assert b'{"gameId":1}' not in data
+    assert isinstance(copy, MatchDto)
+    assert copy == dto
+    assert bytes(copy.raw_json) == dto.raw_json
+    assert pickle.loads(pickle.dumps(dto, protocol=4)).raw_json == dto.raw_json
+    assert pickle.loads(pickle.dumps(MatchDto(gameId=1))).raw_json is None
+
+
+def test_other_pickle_versions_arent_read():
+    with pytest.raises(ValueError):
+        _unpickle_dto(MatchDto, 0, {}, None)
+    with pytest.raises(ValueError):
+        _unpickle_ghost(Match, 0, {})
@@ -0,0 +1,254 @@
+import atexit
+import builtins
+import contextvars
+import importlib.util
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cassiopeia.datastores.riotapi import ratelimits
+from cassiopeia.datastores.riotapi.ratelimits import RequestScheduler, RiotAPIRateLimiter, RequestPriority, SharedRateLimitState, PersistentRateLimitState, request_priority, current_request_priority
+
+
+def _limiter(scheduler: RequestScheduler, limits, name: str = "application") -> RiotAPIRateLimiter:
+    limiter = RiotAPIRateLimiter(1.0, scheduler=scheduler, name=name)
+    limiter.adjust_rate_limits_if_necessary(limits)
+    return limiter
+
+
+def test_permit_takes_and_returns_every_limiter():
+    scheduler = RequestScheduler()
+    application = _limiter(scheduler, [[10, 10]])
+    method = _limiter(scheduler, [[5, 10]], name="na1:summoner")
+
+    with scheduler.permit(application, method):
+        assert application._windows[0].in_flight == 1
+        assert method._windows[0].in_flight == 1
+
+    assert application._windows[0].in_flight == 0
+    assert method._windows[0].in_flight == 0
+    assert application.permits_issued == method.permits_issued == 1
+
+
+def test_try_acquire_doesnt_take_a_permit_when_the_window_is_full():
+    scheduler = RequestScheduler()
+    limiter = _limiter(scheduler, [[1, 10]])
+
+    assert scheduler.try_acquire((limiter,)) == 0
+    # The window hasn't started because its only request is still in flight
+    assert scheduler.try_acquire((limiter,)) == math.inf
+    assert limiter.permits_issued == 1
+
+
+def test_blocked_method_doesnt_hold_an_application_permit():
+    scheduler = RequestScheduler()
+    application = _limiter(scheduler, [[10, 10]])
+    blocked = _limiter(scheduler, [[1, 1]], name="na1:match")
+    other = _limiter(scheduler, [[10, 10]], name="na1:summoner")
+
+    scheduler.acquire((application, blocked))
+    waiter = threading.Thread(target=scheduler.acquire, args=((application, blocked),), daemon=True)
+    waiter.start()
+    time.sleep(0.1)
+
+    assert waiter.is_alive()
+    assert scheduler.try_acquire((application, other)) == 0
+    assert application._windows[0].used == 2
+
+    scheduler.release((application, blocked))
+    waiter.join(3)
+    assert not waiter.is_alive()
+
+
+def test_waiting_request_is_granted_when_the_window_resets():
+    scheduler = RequestScheduler()
+    limiter = _limiter(scheduler, [[1, 1]])
+
+    with limiter:
+        pass
+    start = time.monotonic()
+    with limiter:
+        waited = time.monotonic() - start
+
+    assert 0.5 < waited < 2
+
+
+def test_interactive_requests_are_granted_before_bulk_requests():
+    scheduler = RequestScheduler()
+    limiter = _limiter(scheduler, [[1, 1]])
+    granted = []
+
+    def request(priority):
+        scheduler.acquire((limiter,), priority)
+        granted.append(priority)
+        scheduler.release((limiter,))
+
+    scheduler.acquire((limiter,))
+    bulk = threading.Thread(target=request, args=(RequestPriority.bulk,), daemon=True)
+    bulk.start()
+    time.sleep(0.1)
+    interactive = threading.Thread(target=request, args=(RequestPriority.interactive,), daemon=True)
+    interactive.start()
+    time.sleep(0.1)
+    scheduler.release((limiter,))
+
+    interactive.join(5)
+    bulk.join(5)
+    assert granted == [RequestPriority.interactive, RequestPriority.bulk]
+
+
+def test_bulk_requests_use_the_permits_interactive_requests_dont_need():
+    scheduler = RequestScheduler()
+    limiter = _limiter(scheduler, [[3, 10]])
+
+    assert scheduler.try_acquire((limiter,), RequestPriority.bulk) == 0
+    assert scheduler.try_acquire((limiter,), RequestPriority.bulk) == 0
+    assert scheduler.try_acquire((limiter,), RequestPriority.bulk) == 0
+    assert scheduler.try_acquire((limiter,), RequestPriority.bulk) > 0
+
+
+def test_request_priority_sets_the_priority_of_permits():
+    scheduler = RequestScheduler()
+    limiter = _limiter(scheduler, [[3, 10]])
+
+    assert current_request_priority() is RequestPriority.interactive
+    with request_priority("bulk"):
+        assert scheduler.permit(limiter).priority is RequestPriority.bulk
+    assert scheduler.permit(limiter).priority is RequestPriority.interactive
+
+
+def test_request_priority_without_contextvars(monkeypatch):
+    # Python 3.6 doesn't have contextvars
+    import_module = builtins.__import__
+
+    def _import(name, *args, **kwargs):
+        if name == "contextvars":
+            raise ImportError(name)
+        return import_module(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", _import)
+    spec = importlib.util.spec_from_file_location("_ratelimits_without_contextvars", ratelimits.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.undo()
+
+    assert module.ContextVar is not contextvars.ContextVar
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with module.request_priority("bulk"):
+            assert module.current_request_priority() is module.RequestPriority.bulk
+            assert executor.submit(module.current_request_priority).result() is module.RequestPriority.interactive
+            context = module.copy_context()
+        assert module.current_request_priority() is module.RequestPriority.interactive
+        assert executor.submit(context.run, module.current_request_priority).result() is module.RequestPriority.bulk
+        assert executor.submit(module.current_request_priority).result() is module.RequestPriority.interactive
+
+
+def test_shared_state_shares_windows_between_schedulers(tmpdir):
+    # Each scheduler stands in for a different process
+    path = os.path.join(str(tmpdir), "ratelimits")
+    first = _limiter(RequestScheduler(shared_state=SharedRateLimitState(path, api_key="RGAPI-test")), [[2, 10]])
+    second = _limiter(RequestScheduler(shared_state=SharedRateLimitState(path, api_key="RGAPI-test")), [[2, 10]])
+
+    assert first.try_acquire() == 0
+    assert second.try_acquire() == 0
+    assert first.try_acquire() > 0
+    assert second.try_acquire() > 0
+
+    first.scheduler.release((first,))
+    second.scheduler.release((second,))
+    assert first.try_acquire() > 0  # The window started when the permits were returned
+
+
+def test_shared_state_is_separate_for_each_api_key(tmpdir):
+    path = os.path.join(str(tmpdir), "ratelimits")
+    first = _limiter(RequestScheduler(shared_state=SharedRateLimitState(path, api_key="RGAPI-first")), [[1, 10]])
+    second = _limiter(RequestScheduler(shared_state=SharedRateLimitState(path, api_key="RGAPI-second")), [[1, 10]])
+
+    assert first.try_acquire() == 0
+    assert second.try_acquire() == 0
+
+
+def test_shared_state_learns_limits_from_other_schedulers(tmpdir):
+    path = os.path.join(str(tmpdir), "ratelimits")
+    first = _limiter(RequestScheduler(shared_state=SharedRateLimitState(path, api_key="RGAPI-test")), [[1, 10]])
+    second = RiotAPIRateLimiter(1.0, scheduler=RequestScheduler(shared_state=SharedRateLimitState(path, api_key="RGAPI-test")))
+
+    assert first.try_acquire() == 0
+    assert second.try_acquire() > 0
+    assert second._windows[0].permits == 1
+
+
+def test_persistent_state_resumes_the_windows_after_a_restart(tmpdir):
+    path = os.path.join(str(tmpdir), "ratelimits.json")
+    state = PersistentRateLimitState(path, api_key="RGAPI-test")
+    limiter = _limiter(RequestScheduler(persistent_state=state), [[3, 60]])
+    with limiter:
+        pass
+    with limiter:
+        pass
+    state.save()
+
+    # The limits are known before the first response, and the permits already used in the window are still used
+    restarted = RiotAPIRateLimiter(1.0, scheduler=RequestScheduler(persistent_state=PersistentRateLimitState(path, api_key="RGAPI-test")))
+    assert restarted._windows[0].permits == 3
+    assert restarted.try_acquire() == 0
+    assert restarted.try_acquire() > 0
+
+
+def test_persistent_state_only_changes_when_permits_do(tmpdir):
+    state = PersistentRateLimitState(os.path.join(str(tmpdir), "ratelimits.json"), api_key="RGAPI-test")
+    limiter = _limiter(RequestScheduler(persistent_state=state), [[1, 60]])
+    assert limiter.try_acquire() == 0
+    state.save()
+
+    assert limiter.try_acquire() > 0
+    assert not state._dirty
+    limiter.scheduler.release((limiter,))
+    assert state._dirty
+
+
+def test_persistent_state_is_written_without_holding_the_scheduler(tmpdir):
+    state = PersistentRateLimitState(os.path.join(str(tmpdir), "ratelimits.json"), api_key="RGAPI-test", save_interval=0)
+    scheduler = RequestScheduler(persistent_state=state)
+    limiter = _limiter(scheduler, [[10, 60]])
+    held = []
+    save = state.save
+
+    def checked_save():
+        held.append(scheduler._condition._is_owned())
+        save()
+
+    state.save = checked_save
+    with limiter:
+        pass
+
+    assert held and not any(held)
+    assert os.path.exists(state.path)
+
+
+def test_persistent_states_dont_register_at_exit(tmpdir, monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, "register", registered.append)
+    for _ in range(3):
+        PersistentRateLimitState(os.path.join(str(tmpdir), "ratelimits.json"), api_key="RGAPI-test")
+    assert registered == []
+
+
+def test_persistent_state_remembers_the_limits_of_each_method(tmpdir):
+    path = os.path.join(str(tmpdir), "ratelimits.json")
+    state = PersistentRateLimitState(path, api_key="RGAPI-test")
+    scheduler = RequestScheduler(persistent_state=state)
+    _limiter(scheduler, [[20, 1], [100, 120]])
+    _limiter(scheduler, [[2000, 10]], name="na1:match")
+    state.save()
+
+    scheduler = RequestScheduler(persistent_state=PersistentRateLimitState(path, api_key="RGAPI-test"))
+    method = RiotAPIRateLimiter(1.0, scheduler=scheduler, name="na1:match")
+    other = RiotAPIRateLimiter(1.0, scheduler=scheduler, name="euw1:match")
+    application = RiotAPIRateLimiter(0.5, scheduler=scheduler)
+    assert [(window.permits, window.seconds) for window in method._windows] == [(2000, 10)]
+    assert other._windows == []
+    # Limits are saved as Riot gives them, and this process's share is taken when they're restored
+    assert sorted((window.permits, window.seconds) for window in application._windows) == [(10, 1), (50, 120)]
@@ -0,0 +1,150 @@
+import json
+import functools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Type, TypeVar, MutableMapping, Any, Iterable
+
+import pytest
+from datapipelines import DataSource, PipelineContext
+
+from cassiopeia.data import Platform
+from cassiopeia.datastores.common import HTTPError
+from cassiopeia.datastores.riotapi.common import RiotAPIService, ExponentialBackoff, _add_jitter
+from cassiopeia.datastores.riotapi.ratelimits import RiotAPIRateLimiter, RequestPriority, current_request_priority
+
+T = TypeVar("T")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        with self.server.lock:
+            first = self.path not in self.server.served
+            self.server.served.append(self.path)
+        headers = {"Content-Type": "application/json;charset=utf-8"}
+        if first and self.path.startswith("/flaky"):
+            status = 502
+        elif first and self.path.startswith("/limited"):
+            status = 429
+            headers.update({"X-Rate-Limit-Type": "method", "Retry-After": "1"})
+        else:
+            status = 200
+        body = json.dumps({"path": self.path}).encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def httpd():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.lock = threading.Lock()
+    httpd.served = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class PathDto(dict):
+    pass
+
+
+class _Service(RiotAPIService):
+    def __init__(self, url: str):
+        super().__init__("RGAPI-test", RiotAPIRateLimiter(1.0))
+        self._handlers[502] = functools.partial(ExponentialBackoff, initial_backoff=0.2, backoff_factor=2.0, max_attempts=2)
+        self.url = url
+        self.rate_limiter = self._get_rate_limiter(Platform.north_america, "path")
+
+    @DataSource.dispatch
+    def get(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> T:
+        pass
+
+    @DataSource.dispatch
+    def get_many(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> Iterable[T]:
+        pass
+
+    @get.register(PathDto)
+    def get_path(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> PathDto:
+        body = self._get(self.url + query["path"], {}, self.rate_limiter)
+        return PathDto(body, priority=current_request_priority())
+
+    @get_many.register(PathDto)
+    def get_many_path(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> Iterable[PathDto]:
+        for body in self._get_many([(self.url + path, {}) for path in query["paths"]], self.rate_limiter):
+            yield PathDto(body)
+
+
+@pytest.fixture
+def service(httpd):
+    return _Service("http://127.0.0.1:{}".format(httpd.server_address[1]))
+
+
+def test_add_jitter_delays_by_up_to_the_jitter():
+    backoffs = [_add_jitter(2.0, 0.1) for _ in range(1000)]
+
+    assert all(2.0 <= backoff <= 2.2 for backoff in backoffs)
+    assert len(set(backoffs)) > 1
+    assert _add_jitter(2.0, 0.0) == 2.0
+
+
+def test_exponential_backoff_grows_until_the_last_attempt():
+    handler = ExponentialBackoff(initial_backoff=1.0, backoff_factor=2.0, max_attempts=2, jitter=0.0)
+    error = HTTPError("", 502)
+
+    assert handler._next_backoff(error, {}) == 1.0
+    assert handler._next_backoff(error, {}) == 2.0
+    with pytest.raises(HTTPError):
+        handler._next_backoff(error, {})
+    assert handler.stop
+
+
+def test_retry_is_parked_on_the_background_loop(service, monkeypatch):
+    sent_from = []
+    send = service._async_client.get
+
+    async def get(*args, **kwargs):
+        sent_from.append(threading.current_thread().name)
+        return await send(*args, **kwargs)
+
+    monkeypatch.setattr(service._async_client, "get", get)
+    monkeypatch.setattr(time, "sleep", lambda seconds: pytest.fail("A thread slept through the backoff"))
+
+    assert service._get(service.url + "/flaky", {}, service.rate_limiter) == {"path": "/flaky"}
+    assert sent_from == ["cassiopeia-event-loop"]
+
+
+def test_rate_limited_retry_waits_on_the_scheduler(service):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(service._get(service.url + "/limited", {}, service.rate_limiter)), daemon=True)
+    start = time.monotonic()
+    thread.start()
+    time.sleep(0.5)
+
+    # The method limit is held back for everyone while the retry waits
+    assert service.rate_limiter.try_acquire() > 0
+    thread.join(5)
+    assert results == [{"path": "/limited"}]
+    assert time.monotonic() - start >= 1.0
+
+
+def test_submit_returns_a_future(service):
+    future = service.submit(PathDto, {"path": "/a"}, priority=RequestPriority.bulk)
+
+    assert future.result(5) == {"path": "/a", "priority": RequestPriority.bulk}
+
+
+def test_submit_many_returns_a_future_of_every_result(service):
+    service._max_concurrent_requests = 3
+
+    future = service.submit_many(PathDto, {"paths": ["/a", "/flaky/b", "/c"]})
+
+    assert future.result(5) == [{"path": "/a"}, {"path": "/flaky/b"}, {"path": "/c"}]
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Type, TypeVar, MutableMapping, Any, Iterable
+
+import pytest
+from datapipelines import DataSource, PipelineContext
+
+from cassiopeia.datastores.riotapi import RiotAPI
+from cassiopeia.datastores.riotapi.common import RiotAPIService
+from cassiopeia.datastores.riotapi.ratelimits import RiotAPIRateLimiter, RequestPriority, current_request_priority
+
+T = TypeVar("T")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        body = json.dumps({"path": self.path}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json;charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.paths = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class PathsDto(dict):
+    pass
+
+
+class ImageDto(dict):
+    pass
+
+
+class PriorityDto(dict):
+    pass
+
+
+class _SerialService(RiotAPIService):
+    def __init__(self, url: str, count: int):
+        super().__init__("RGAPI-test", RiotAPIRateLimiter(1.0))
+        self.url = url
+        self.count = count
+        self.runs = 0
+
+    @DataSource.dispatch
+    def get(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> T:
+        pass
+
+    @DataSource.dispatch
+    def get_many(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> Iterable[T]:
+        pass
+
+    @get.register(PathsDto)
+    def get_paths(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> PathsDto:
+        self.runs += 1
+        paths = []
+        for i in range(self.count):
+            paths.append(self._get("{}/{}".format(self.url, i), {})["path"])
+        return PathsDto(paths=paths)
+
+    @get.register(PriorityDto)
+    def get_priority(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> PriorityDto:
+        return PriorityDto(priority=current_request_priority())
+
+
+class _SynchronousSource(DataSource):
+    @DataSource.dispatch
+    def get(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> T:
+        pass
+
+    @DataSource.dispatch
+    def get_many(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> Iterable[T]:
+        pass
+
+    @get.register(ImageDto)
+    def get_image(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> ImageDto:
+        return ImageDto(thread=threading.current_thread())
+
+
+def test_aget_runs_the_endpoint_once(server):
+    url = "http://127.0.0.1:{}".format(server.server_address[1])
+    service = _SerialService(url, count=5)
+
+    result = asyncio.run(service.aget(PathsDto, {}))
+
+    assert result["paths"] == ["/{}".format(i) for i in range(5)]
+    assert server.paths == ["/{}".format(i) for i in range(5)]
+    assert service.runs == 1
+
+
+def test_aget_keeps_the_request_priority(server):
+    url = "http://127.0.0.1:{}".format(server.server_address[1])
+    service = _SerialService(url, count=1)
+
+    result = asyncio.run(service.aget(PriorityDto, {}, priority=RequestPriority.bulk))
+
+    assert result["priority"] is RequestPriority.bulk
+
+
+def test_aget_runs_synchronous_sources_off_the_event_loop():
+    riotapi = RiotAPI(api_key="RGAPI-test", services=[_SynchronousSource()])
+
+    async def get():
+        return threading.current_thread(), await riotapi.aget(ImageDto, {})
+
+    loop_thread, image = asyncio.run(get())
+
+    assert image["thread"] is not loop_thread
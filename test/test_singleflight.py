@@ -0,0 +1,157 @@
+import threading
+import time
+from typing import Type, TypeVar, MutableMapping, Any, Iterable
+
+import pytest
+from datapipelines import DataSource, PipelineContext, NotFoundError
+
+from cassiopeia.data import Platform
+from cassiopeia.core.summoner import Summoner
+from cassiopeia.datastores.cache import Cache
+from cassiopeia.datastores.singleflight import SingleFlight
+from cassiopeia._configuration.settings import _SingleFlightPipeline
+
+T = TypeVar("T")
+
+
+def test_concurrent_calls_for_the_same_key_run_once():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def fetch():
+        calls.append(threading.get_ident())
+        started.set()
+        release.wait(5)
+        return "result"
+
+    leader = threading.Thread(target=lambda: results.append(flight.do(["key"], fetch)), daemon=True)
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do(["other", "key"], fetch)), daemon=True) for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == ["result"] * 4
+    assert flight._flights == {}
+
+
+def test_waiting_callers_get_the_leaders_exception():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def fetch():
+        started.set()
+        release.wait(5)
+        raise LookupError("not found")
+
+    def call():
+        try:
+            flight.do(["key"], fetch)
+        except LookupError as error:
+            errors.append(error)
+
+    leader = threading.Thread(target=call, daemon=True)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call, daemon=True)
+    follower.start()
+    time.sleep(0.1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(errors) == 2
+    assert errors[0] is errors[1]
+
+
+def test_calls_after_a_flight_has_landed_run_again():
+    flight = SingleFlight()
+    calls = []
+
+    assert flight.do(["key"], lambda: calls.append(1) or len(calls)) == 1
+    assert flight.do(["key"], lambda: calls.append(1) or len(calls)) == 2
+    with pytest.raises(LookupError):
+        flight.do(["key"], lambda: {}["missing"])
+    assert flight.do(["key"], lambda: "after an error") == "after an error"
+
+
+def test_nested_call_for_the_same_key_doesnt_deadlock():
+    flight = SingleFlight()
+    result = []
+
+    thread = threading.Thread(target=lambda: result.append(flight.do(["key"], lambda: flight.do(["key"], lambda: "inner"))), daemon=True)
+    thread.start()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert result == ["inner"]
+
+
+class _SlowSource(DataSource):
+    def __init__(self):
+        self.calls = 0
+
+    @DataSource.dispatch
+    def get(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> T:
+        pass
+
+    @DataSource.dispatch
+    def get_many(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> Iterable[T]:
+        pass
+
+    @get.register(Summoner)
+    def get_summoner(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> Summoner:
+        self.calls += 1
+        time.sleep(0.2)
+        if query["id"] < 0:
+            raise NotFoundError
+        return Summoner(id=query["id"], region="NA")
+
+
+def _pipeline(cache: Cache, source: DataSource) -> _SingleFlightPipeline:
+    pipeline = _SingleFlightPipeline([cache, source])
+    pipeline._cache = cache
+    return pipeline
+
+
+def test_pipeline_cache_hits_dont_take_part_in_flights(monkeypatch):
+    cache = Cache()
+    source = _SlowSource()
+    pipeline = _pipeline(cache, source)
+    cache.put(Summoner, Summoner(id=1, region="NA"))
+    monkeypatch.setattr(cache, "single_flight", lambda keys, get: pytest.fail("A cache hit was coalesced"))
+
+    assert pipeline.get(Summoner, {"platform": Platform.north_america, "id": 1}).id == 1
+    assert source.calls == 0
+
+
+def test_pipeline_coalesces_concurrent_misses():
+    cache = Cache()
+    source = _SlowSource()
+    pipeline = _pipeline(cache, source)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(pipeline.get(Summoner, {"platform": Platform.north_america, "id": 2})), daemon=True) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert source.calls == 1
+    assert len(results) == 4
+    assert all(result is results[0] for result in results)
+    # The result was put in the cache, so the next request doesn't reach the source
+    assert pipeline.get(Summoner, {"platform": Platform.north_america, "id": 2}) is results[0]
+    assert source.calls == 1
+    with pytest.raises(NotFoundError):
+        pipeline.get(Summoner, {"platform": Platform.north_america, "id": -1})
@@ -0,0 +1,102 @@
+import os
+
+import pytest
+from datapipelines import NotFoundError
+
+from cassiopeia.data import Platform
+from cassiopeia.dto.staticdata.champion import ChampionDto, ChampionListDto
+from cassiopeia.dto.staticdata.rune import RuneDto, RuneListDto
+from cassiopeia.dto.staticdata.item import ItemDto, ItemListDto
+from cassiopeia.dto.staticdata.summonerspell import SummonerSpellListDto
+from cassiopeia.dto.staticdata.map import MapDto, MapListDto
+from cassiopeia.dto.staticdata.profileicon import ProfileIconDataDto
+from cassiopeia.dto.staticdata.language import LanguageStringsDto
+from cassiopeia.datastores.snapshot import StaticDataSnapshot
+
+
+class _StaticData(object):
+    # Stands in for DDragon when building a snapshot
+    def __init__(self):
+        self.queries = []
+
+    def get(self, type, query):
+        self.queries.append((type, query))
+        body = {"region": "NA", "version": query["version"], "locale": query["locale"], "includedData": {"all"}}
+        if type is ChampionListDto:
+            body["data"] = {"Annie": {"id": 1, "name": "Annie", "region": "NA"}, "Olaf": {"id": 2, "name": "Olaf", "region": "NA"}}
+        elif type is ItemListDto:
+            body["data"] = {"1001": {"id": 1001, "name": "Boots of Speed", "region": "NA"}}
+        elif type is RuneListDto:
+            body["data"] = [{"id": 8005, "name": "Press the Attack", "region": "NA"}]
+        elif type is SummonerSpellListDto:
+            body["data"] = {"SummonerFlash": {"id": 4, "name": "Flash", "region": "NA"}}
+        elif type is MapListDto:
+            body["data"] = {"11": {"mapId": 11, "mapName": "Summoner's Rift"}}
+        elif type is ProfileIconDataDto:
+            body["data"] = {"1": {"id": 1, "region": "NA"}}
+        elif type is LanguageStringsDto:
+            body["data"] = {"Armor": "Armor"}
+        return type(body)
+
+
+def _query(**query) -> dict:
+    return dict({"platform": Platform.europe_west, "version": "8.1.1", "locale": "en_US"}, **query)
+
+
+@pytest.fixture
+def snapshots(tmpdir):
+    directory = str(tmpdir)
+    StaticDataSnapshot.build(directory, "8.1.1", "en_US", source=_StaticData())
+    return StaticDataSnapshot(directory)
+
+
+def test_build_writes_one_snapshot_per_version_and_locale(tmpdir):
+    source = _StaticData()
+    path = StaticDataSnapshot.build(str(tmpdir), "8.1.1", "en_US", source=source)
+
+    assert os.listdir(str(tmpdir)) == [os.path.basename(path)]
+    assert {type for type, _ in source.queries} == {ChampionListDto, ItemListDto, RuneListDto, SummonerSpellListDto, MapListDto, ProfileIconDataDto, LanguageStringsDto}
+
+
+def test_lists_are_read_back_for_the_requested_region(snapshots):
+    champions = snapshots.get(ChampionListDto, _query())
+    runes = snapshots.get(RuneListDto, _query())
+
+    assert isinstance(champions, ChampionListDto)
+    assert champions["region"] == "EUW"
+    assert champions["includedData"] == {"all"}
+    assert isinstance(champions["data"]["Olaf"], ChampionDto)
+    assert champions["data"]["Olaf"]["region"] == "EUW"
+    assert [rune["id"] for rune in runes["data"]] == [8005]
+    assert snapshots.get(ProfileIconDataDto, _query())["data"]["1"]["region"] == "EUW"
+    assert snapshots.get(LanguageStringsDto, _query())["data"] == {"Armor": "Armor"}
+
+
+def test_each_list_is_read_in_one_piece_and_not_shared(snapshots, monkeypatch):
+    reads = []
+    read = snapshots._snapshot(_query())._read
+    monkeypatch.setattr(snapshots._snapshot(_query()), "_read", lambda location: reads.append(location) or read(location))
+
+    champions = snapshots.get(ChampionListDto, _query())
+    champions["data"]["Olaf"]["name"] = "Changed"
+
+    assert len(reads) == 1
+    assert snapshots.get(ChampionListDto, _query())["data"]["Olaf"]["name"] == "Olaf"
+
+
+def test_objects_are_found_by_id_or_name(snapshots):
+    assert snapshots.get(ChampionDto, _query(id=2))["name"] == "Olaf"
+    assert snapshots.get(ItemDto, _query(name="Boots of Speed"))["id"] == 1001
+    game_map = snapshots.get(MapDto, _query(id=11, includedData={"all"}))
+    assert isinstance(game_map, MapDto)
+    assert game_map["mapName"] == "Summoner's Rift"
+    assert "includedData" not in game_map
+    with pytest.raises(NotFoundError):
+        snapshots.get(ChampionDto, _query(id=3))
+
+
+def test_only_versions_with_a_snapshot_are_provided(snapshots):
+    with pytest.raises(NotFoundError):
+        snapshots.get(ChampionListDto, _query(version="8.2.1"))
+    with pytest.raises(NotFoundError):
+        snapshots.get(ChampionListDto, {"platform": Platform.europe_west, "locale": "en_US"})
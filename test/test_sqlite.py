@@ -0,0 +1,95 @@
+import os
+import time
+
+import pytest
+from datapipelines import NotFoundError
+
+from cassiopeia.data import Platform
+from cassiopeia.dto.match import MatchDto, TimelineDto
+from cassiopeia.dto.summoner import SummonerDto
+from cassiopeia.dto.staticdata.champion import ChampionListDto
+from cassiopeia.datastores.sqlite import SQLiteStore
+
+
+def _summoner(name: str = "Summoner") -> SummonerDto:
+    return SummonerDto(region="NA", id=1, accountId=2, name=name, summonerLevel=30)
+
+
+def test_objects_survive_a_restart(tmpdir):
+    path = os.path.join(str(tmpdir), "cassiopeia.sqlite")
+    SQLiteStore(path).put(MatchDto, MatchDto(region="NA", gameId=1, participants=[{"participantId": 1}]))
+
+    match = SQLiteStore(path).get(MatchDto, {"platform": Platform.north_america, "id": 1})
+
+    assert isinstance(match, MatchDto)
+    assert match == {"region": "NA", "gameId": 1, "participants": [{"participantId": 1}]}
+
+
+def test_an_object_is_found_by_each_of_its_keys(tmpdir):
+    store = SQLiteStore(os.path.join(str(tmpdir), "cassiopeia.sqlite"))
+    store.put(SummonerDto, _summoner())
+
+    for key, value in (("id", 1), ("account.id", 2), ("name", "Summoner")):
+        assert store.get(SummonerDto, {"platform": Platform.north_america, key: value})["name"] == "Summoner"
+    with pytest.raises(NotFoundError):
+        store.get(SummonerDto, {"platform": Platform.europe_west, "id": 1})
+
+
+def test_summoners_are_found_by_their_sanitized_name(tmpdir):
+    store = SQLiteStore(os.path.join(str(tmpdir), "cassiopeia.sqlite"))
+    store.put(SummonerDto, _summoner("Some Summoner"))
+
+    assert store.get(SummonerDto, {"platform": Platform.north_america, "name": "somesummoner"})["name"] == "Some Summoner"
+    assert store.get(SummonerDto, {"platform": Platform.north_america, "name": "SOME summoner"})["id"] == 1
+
+
+def test_putting_an_object_again_replaces_it_under_every_key(tmpdir):
+    store = SQLiteStore(os.path.join(str(tmpdir), "cassiopeia.sqlite"))
+    store.put(SummonerDto, _summoner("Old"))
+    store.put(SummonerDto, _summoner("New"))
+
+    assert store.get(SummonerDto, {"platform": Platform.north_america, "id": 1})["name"] == "New"
+    with pytest.raises(NotFoundError):
+        store.get(SummonerDto, {"platform": Platform.north_america, "name": "Old"})
+    assert store._connection().execute("SELECT COUNT(*) FROM objects").fetchone()[0] == 1
+
+
+def test_get_many_fails_before_returning_anything_if_one_is_missing(tmpdir):
+    store = SQLiteStore(os.path.join(str(tmpdir), "cassiopeia.sqlite"))
+    store.put_many(MatchDto, [MatchDto(region="NA", gameId=1), MatchDto(region="NA", gameId=2)])
+
+    matches = store.get_many(MatchDto, {"platform": Platform.north_america, "ids": [1, 2]})
+    assert [match["gameId"] for match in matches] == [1, 2]
+    timelines = [TimelineDto(region="NA", matchId=1)]
+    store.put_many(TimelineDto, timelines)
+    assert list(store.get_many(TimelineDto, {"platform": Platform.north_america, "ids": [1]})) == timelines
+    with pytest.raises(NotFoundError):
+        store.get_many(MatchDto, {"platform": Platform.north_america, "ids": [1, 3]})
+
+
+def test_expired_objects_arent_returned(tmpdir):
+    store = SQLiteStore(os.path.join(str(tmpdir), "cassiopeia.sqlite"), expirations={"SummonerDto": 0.05, "MatchDto": 0})
+    store.put(SummonerDto, _summoner())
+    store.put(MatchDto, MatchDto(region="NA", gameId=1))
+    time.sleep(0.1)
+
+    with pytest.raises(NotFoundError):
+        store.get(SummonerDto, {"platform": Platform.north_america, "id": 1})
+    with pytest.raises(NotFoundError):
+        store.get(MatchDto, {"platform": Platform.north_america, "id": 1})
+    store.expire()
+    assert store._connection().execute("SELECT COUNT(*) FROM keys").fetchone()[0] == 0
+
+
+def test_only_complete_static_data_is_stored(tmpdir):
+    store = SQLiteStore(os.path.join(str(tmpdir), "cassiopeia.sqlite"))
+    store.put(ChampionListDto, ChampionListDto(region="NA", version="8.1.1", locale="en_US", includedData={"image"}, data={}))
+    with pytest.raises(NotFoundError):
+        store.get(ChampionListDto, {"platform": Platform.north_america, "version": "8.1.1", "locale": "en_US"})
+
+    store.put(ChampionListDto, ChampionListDto(region="NA", version="8.1.1", locale="en_US", includedData={"all"}, data={}))
+    champions = store.get(ChampionListDto, {"platform": Platform.north_america, "version": "8.1.1", "locale": "en_US"})
+    assert champions["includedData"] == {"all"}
+    # The latest version is found by the rest of the pipeline
+    with pytest.raises(NotFoundError):
+        store.get(ChampionListDto, {"platform": Platform.north_america, "locale": "en_US"})